@@ -1178,6 +1178,16 @@ class CloudController(object):
             except exception.NotFound:
                 instances = []
 
+        # NOTE: Resolve the ec2 ids of all the instances and their images
+        # in bulk. This fills the caches the per-instance lookups below use,
+        # instead of querying the mapping tables once per instance.
+        ec2utils.id_to_ec2_inst_ids([inst['uuid'] for inst in instances])
+        ec2utils.glance_ids_to_ids(context, [inst[key]
+                                             for inst in instances
+                                             for key in ('image_ref',
+                                                         'kernel_id',
+                                                         'ramdisk_id')])
+
         for instance in instances:
             if not context.is_admin:
                 if pipelib.is_vpn_image(instance['image_ref']):
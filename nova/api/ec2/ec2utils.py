@@ -18,14 +18,15 @@ import functools
 import re
 
 from nova import availability_zones
+from nova import cache_utils
 from nova import context
+from nova import db
 from nova import exception
 from nova.i18n import _
 from nova.network import model as network_model
 from nova import objects
 from nova.objects import base as obj_base
 from nova.openstack.common import log as logging
-from nova.openstack.common import memorycache
 from nova.openstack.common import timeutils
 from nova.openstack.common import uuidutils
 
@@ -35,22 +36,61 @@ _CACHE_TIME = 7 * 24 * 60 * 60
 _CACHE = None
 
 
+def _get_cache():
+    global _CACHE
+    if not _CACHE:
+        _CACHE = cache_utils.get_client()
+    return _CACHE
+
+
+def _memoize_key(func, reqid):
+    key = "%s:%s" % (func.__name__, reqid)
+    return str(key)
+
+
 def memoize(func):
     @functools.wraps(func)
     def memoizer(context, reqid):
-        global _CACHE
-        if not _CACHE:
-            _CACHE = memorycache.get_client()
-        key = "%s:%s" % (func.__name__, reqid)
-        key = str(key)
-        value = _CACHE.get(key)
+        cache = _get_cache()
+        key = _memoize_key(func, reqid)
+        value = cache.get(key)
         if value is None:
             value = func(context, reqid)
-            _CACHE.set(key, value, time=_CACHE_TIME)
+            cache.set(key, value, time=_CACHE_TIME)
         return value
     return memoizer
 
 
+def _memoize_many(func, context, reqids, lookup):
+    """Call a memoized function for many ids with a single bulk lookup.
+
+    Ids which are not cached yet are resolved with lookup(context, ids),
+    which returns a dict of the values it found, and the results are
+    stored in func's cache. Ids lookup() did not find go through func one
+    by one, which creates any missing mapping.
+
+    :returns: a dict of reqid -> value
+    """
+    cache = _get_cache()
+    values = {}
+    missing = []
+    for reqid in set(reqids):
+        value = cache.get(_memoize_key(func, reqid))
+        if value is None:
+            missing.append(reqid)
+        else:
+            values[reqid] = value
+    if missing:
+        found = lookup(context, missing)
+        for reqid, value in found.iteritems():
+            cache.set(_memoize_key(func, reqid), value, time=_CACHE_TIME)
+        values.update(found)
+        for reqid in missing:
+            if reqid not in found:
+                values[reqid] = func(context, reqid)
+    return values
+
+
 def reset_cache():
     global _CACHE
     _CACHE = None
@@ -117,6 +157,21 @@ def glance_id_to_id(context, glance_id):
         return s3imap.id
 
 
+def _get_s3_image_ids(context, glance_ids):
+    return dict((s3image['uuid'], s3image['id']) for s3image in
+                db.s3_image_get_all_by_uuids(context, glance_ids))
+
+
+def glance_ids_to_ids(context, glance_ids):
+    """Convert many glance ids to internal (db) ids at once.
+
+    :returns: a dict of glance id -> internal id
+    """
+    glance_ids = [glance_id for glance_id in glance_ids if glance_id]
+    return _memoize_many(glance_id_to_id, context, glance_ids,
+                         _get_s3_image_ids)
+
+
 def ec2_id_to_glance_id(context, ec2_id):
     image_id = ec2_id_to_id(ec2_id)
     return id_to_glance_id(context, image_id)
@@ -195,6 +250,20 @@ def id_to_ec2_inst_id(instance_id):
         return id_to_ec2_id(instance_id)
 
 
+def id_to_ec2_inst_ids(instance_uuids):
+    """Get or create ec2 instance IDs for many instance uuids at once.
+
+    :returns: a dict of instance uuid -> ec2 instance ID
+    """
+    ctxt = context.get_admin_context()
+    instance_uuids = [instance_uuid for instance_uuid in instance_uuids
+                      if instance_uuid]
+    int_ids = _memoize_many(get_int_id_from_instance_uuid, ctxt,
+                            instance_uuids, _get_instance_int_ids)
+    return dict((instance_uuid, id_to_ec2_id(int_id))
+                for instance_uuid, int_id in int_ids.iteritems())
+
+
 def ec2_inst_id_to_uuid(context, ec2_id):
     """"Convert an instance id to uuid."""
     int_id = ec2_id_to_id(ec2_id)
@@ -311,6 +380,11 @@ def get_int_id_from_instance_uuid(context, instance_uuid):
         return imap.id
 
 
+def _get_instance_int_ids(context, instance_uuids):
+    return dict((imap['uuid'], imap['id']) for imap in
+                db.ec2_instance_get_all_by_uuids(context, instance_uuids))
+
+
 @memoize
 def get_int_id_from_volume_uuid(context, volume_uuid):
     if volume_uuid is None:
@@ -196,6 +196,10 @@ class InstanceMetadata():
 
         self.route_configuration = None
 
+        # Rendered responses, by request path
+        self._rendered = {}
+        self._response_cacheable = True
+
     def _route_configuration(self):
         if self.route_configuration:
             return self.route_configuration
@@ -325,6 +329,7 @@ class InstanceMetadata():
 
         if self._check_os_version(GRIZZLY, version):
             metadata['random_seed'] = base64.b64encode(os.urandom(512))
+            self._response_cacheable = False
 
         self.set_mimetype(MIME_TYPE_APPLICATION_JSON)
         return jsonutils.dumps(metadata)
@@ -383,6 +388,7 @@ class InstanceMetadata():
 
         # Set default mimeType. It will be modified only if there is a change
         self.set_mimetype(MIME_TYPE_TEXT_PLAIN)
+        self._response_cacheable = True
 
         # fix up requests, prepending /ec2 to anything that does not match
         path_tokens = path.split('/')[1:]
@@ -398,6 +404,8 @@ class InstanceMetadata():
 
         # specifically handle the top level request
         if len(path_tokens) == 1:
+            # The openstack versions listed depend on the current date
+            self._response_cacheable = False
             if path_tokens[0] == "openstack":
                 # NOTE(vish): don't show versions that are in the future
                 today = timeutils.utcnow().strftime("%Y-%m-%d")
@@ -421,6 +429,27 @@ class InstanceMetadata():
 
         return data
 
+    def render(self, path):
+        """Return the (body, mime type) of the response for path, or the
+        callable handling the request if there is one.
+
+        Rendered responses are kept for the life of this object, which the
+        metadata handler only caches for a few seconds, except for those
+        which must differ between requests.
+        """
+        rendered = self._rendered.get(path)
+        if rendered is not None:
+            return rendered
+
+        data = self.lookup(path)
+        if callable(data):
+            return data
+
+        rendered = (ec2_md_print(data), self.get_mimetype())
+        if self._response_cacheable:
+            self._rendered[path] = rendered
+        return rendered
+
     def metadata_for_config_drive(self):
         """Yields (path, value) tuples for metadata elements."""
         # EC2 style metadata
@@ -25,13 +25,13 @@ import webob.dec
 import webob.exc
 
 from nova.api.metadata import base
+from nova import cache_utils
 from nova import conductor
 from nova import exception
 from nova.i18n import _
 from nova.i18n import _LE
 from nova.i18n import _LW
 from nova.openstack.common import log as logging
-from nova.openstack.common import memorycache
 from nova import utils
 from nova import wsgi
 
@@ -66,7 +66,7 @@ class MetadataRequestHandler(wsgi.Application):
     """Serve metadata."""
 
     def __init__(self):
-        self._cache = memorycache.get_client()
+        self._cache = cache_utils.get_client()
         self.conductor_api = conductor.API()
 
     def get_metadata_by_remote_address(self, address):
@@ -125,16 +125,14 @@ class MetadataRequestHandler(wsgi.Application):
             raise webob.exc.HTTPNotFound()
 
         try:
-            data = meta_data.lookup(req.path_info)
+            data = meta_data.render(req.path_info)
         except base.InvalidMetadataPath:
             raise webob.exc.HTTPNotFound()
 
         if callable(data):
             return data(req, meta_data)
 
-        resp = base.ec2_md_print(data)
-        req.response.body = resp
-        req.response.content_type = meta_data.get_mimetype()
+        req.response.body, req.response.content_type = data
         return req.response
 
     def _handle_remote_ip_request(self, req):
@@ -17,6 +17,7 @@ import webob.exc
 from nova.api.openstack import extensions
 from nova.api.openstack import wsgi
 from nova.api.openstack import xmlutil
+from nova.cells import opts as cells_opts
 from nova import compute
 from nova import exception
 from nova.i18n import _
@@ -94,8 +95,11 @@ class ServiceController(object):
 
         return services
 
-    def _get_service_detail(self, svc, detailed):
-        alive = self.servicegroup_api.service_is_up(svc)
+    def _get_service_detail(self, svc, detailed, up_hosts=None):
+        if up_hosts is None:
+            alive = self.servicegroup_api.service_is_up(svc)
+        else:
+            alive = svc['host'] in up_hosts[svc['topic']]
         state = (alive and "up") or "down"
         active = 'enabled'
         if svc['disabled']:
@@ -113,12 +117,24 @@ class ServiceController(object):
 
     def _get_services_list(self, req, detailed):
         services = self._get_services(req)
+        up_hosts = self._get_up_hosts(services)
         svcs = []
         for svc in services:
-            svcs.append(self._get_service_detail(svc, detailed))
+            svcs.append(self._get_service_detail(svc, detailed, up_hosts))
 
         return svcs
 
+    def _get_up_hosts(self, services):
+        """Returns a dict mapping the topic of each service to the set of
+        hosts whose service of that topic is up, or None when services come
+        from child cells, whose liveness can only be checked one by one.
+        """
+        if cells_opts.get_cell_type() == 'api':
+            return None
+        topics = set(svc['topic'] for svc in services)
+        return dict((topic, self.servicegroup_api.get_all_up(topic))
+                    for topic in topics)
+
     def _is_valid_as_reason(self, reason):
         try:
             utils.check_string_length(reason.strip(), 'Disabled reason',
@@ -16,6 +16,7 @@ import webob.exc
 
 from nova.api.openstack import extensions
 from nova.api.openstack import wsgi
+from nova.cells import opts as cells_opts
 from nova import compute
 from nova import exception
 from nova.i18n import _
@@ -51,8 +52,11 @@ class ServiceController(wsgi.Controller):
 
         return services
 
-    def _get_service_detail(self, svc):
-        alive = self.servicegroup_api.service_is_up(svc)
+    def _get_service_detail(self, svc, up_hosts=None):
+        if up_hosts is None:
+            alive = self.servicegroup_api.service_is_up(svc)
+        else:
+            alive = svc['host'] in up_hosts[svc['topic']]
         state = (alive and "up") or "down"
         active = 'enabled'
         if svc['disabled']:
@@ -68,12 +72,24 @@ class ServiceController(wsgi.Controller):
 
     def _get_services_list(self, req):
         services = self._get_services(req)
+        up_hosts = self._get_up_hosts(services)
         svcs = []
         for svc in services:
-            svcs.append(self._get_service_detail(svc))
+            svcs.append(self._get_service_detail(svc, up_hosts))
 
         return svcs
 
+    def _get_up_hosts(self, services):
+        """Returns a dict mapping the topic of each service to the set of
+        hosts whose service of that topic is up, or None when services come
+        from child cells, whose liveness can only be checked one by one.
+        """
+        if cells_opts.get_cell_type() == 'api':
+            return None
+        topics = set(svc['topic'] for svc in services)
+        return dict((topic, self.servicegroup_api.get_all_up(topic))
+                    for topic in topics)
+
     def _is_valid_as_reason(self, reason):
         try:
             utils.check_string_length(reason.strip(), 'Disabled reason',
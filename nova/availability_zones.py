@@ -19,8 +19,8 @@ import collections
 
 from oslo.config import cfg
 
+from nova import cache_utils
 from nova import objects
-from nova.openstack.common import memorycache
 
 # NOTE(vish): azs don't change that often, so cache them for an hour to
 #             avoid hitting the db multiple times on every request.
@@ -44,7 +44,7 @@ def _get_cache():
     global MC
 
     if MC is None:
-        MC = memorycache.get_client()
+        MC = cache_utils.get_client()
 
     return MC
 
@@ -0,0 +1,116 @@
+# Copyright 2015 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Memcache client, or a bounded in process cache without memcached."""
+
+import collections
+import heapq
+
+from oslo.config import cfg
+
+from nova.openstack.common import memorycache
+from nova.openstack.common import timeutils
+
+cache_opts = [
+    cfg.IntOpt('memorycache_max_entries',
+               default=0,
+               help='Maximum number of entries kept by the in process cache, '
+                    'the least recently used ones being evicted first. '
+                    '0 means unlimited.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(cache_opts)
+
+
+def get_client(memcached_servers=None):
+    """Return a memcache client for memcached_servers, or an in process
+    Client if there are none.
+    """
+    if not memcached_servers:
+        memcached_servers = CONF.memcached_servers
+    if memcached_servers:
+        return memorycache.get_client(memcached_servers)
+    return Client(max_entries=CONF.memorycache_max_entries)
+
+
+class Client(memorycache.Client):
+    """In process LRU cache with the interface of memorycache.Client."""
+
+    def __init__(self, max_entries=0):
+        """Keep at most max_entries keys, or any number if it is 0."""
+        super(Client, self).__init__()
+        self.cache = collections.OrderedDict()
+        self.max_entries = max_entries
+        # Heap of (timeout, key) for the keys set with a timeout. Entries
+        # for keys which have been set again since are skipped.
+        self._timeouts = []
+        self.stats = {'get_hits': 0, 'get_misses': 0, 'evictions': 0,
+                      'expirations': 0}
+
+    def _expire(self):
+        """Remove the expired keys."""
+        now = timeutils.utcnow_ts()
+        while self._timeouts and self._timeouts[0][0] <= now:
+            timeout, key = heapq.heappop(self._timeouts)
+            if key in self.cache and self.cache[key][0] == timeout:
+                del self.cache[key]
+                self.stats['expirations'] += 1
+
+    def get(self, key):
+        """Retrieves the value for a key or None.
+
+        This expunges expired keys during each get.
+        """
+        self._expire()
+        try:
+            entry = self.cache.pop(key)
+        except KeyError:
+            self.stats['get_misses'] += 1
+            return None
+        # Move the key to the most recently used end
+        self.cache[key] = entry
+        self.stats['get_hits'] += 1
+        return entry[1]
+
+    def set(self, key, value, time=0, min_compress_len=0):
+        """Sets the value for a key."""
+        self._expire()
+        timeout = 0
+        if time != 0:
+            timeout = timeutils.utcnow_ts() + time
+        old_entry = self.cache.pop(key, None)
+        if timeout and (old_entry is None or old_entry[0] != timeout):
+            heapq.heappush(self._timeouts, (timeout, key))
+        self.cache[key] = (timeout, value)
+        if self.max_entries:
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+                self.stats['evictions'] += 1
+        if len(self._timeouts) > 2 * len(self.cache) + 64:
+            # Drop the entries of keys set again or removed since
+            self._timeouts = [(t, k) for t, k in self._timeouts
+                              if k in self.cache and self.cache[k][0] == t]
+            heapq.heapify(self._timeouts)
+        return True
+
+    def get_stats(self):
+        """Returns the statistics of the cache, in the same format as
+        memcache.Client.get_stats().
+        """
+        stats = dict(self.stats)
+        stats['curr_items'] = len(self.cache)
+        stats['limit_maxitems'] = self.max_entries
+        return [('local', stats)]
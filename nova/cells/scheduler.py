@@ -99,6 +99,7 @@ class CellsScheduler(base.Base):
 
         instances = []
         num_instances = len(instance_uuids)
+        self.compute_api.security_group_api.ensure_default(ctxt)
         for i, instance_uuid in enumerate(instance_uuids):
             instance = objects.Instance()
             instance.update(instance_values)
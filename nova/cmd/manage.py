@@ -906,7 +906,9 @@ class DbCommands(object):
 
     @args('--max_rows', metavar='<number>',
             help='Maximum number of deleted rows to archive')
-    def archive_deleted_rows(self, max_rows):
+    @args('--batch_size', metavar='<number>',
+            help='Maximum number of rows archived per transaction')
+    def archive_deleted_rows(self, max_rows, batch_size=None):
         """Move up to max_rows deleted rows from production tables to shadow
         tables.
         """
@@ -915,8 +917,15 @@ class DbCommands(object):
             if max_rows < 0:
                 print(_("Must supply a positive value for max_rows"))
                 return(1)
+        if batch_size is not None:
+            batch_size = int(batch_size)
+            if batch_size <= 0:
+                print(_("Must supply a positive value for batch_size"))
+                return(1)
         admin_context = context.get_admin_context()
-        db.archive_deleted_rows(admin_context, max_rows)
+        rows_archived = db.archive_deleted_rows(admin_context, max_rows,
+                                                batch_size=batch_size)
+        print(_("%d rows archived") % rows_archived)
 
 
 class AgentBuildCommands(object):
@@ -596,7 +596,6 @@ class API(base.Base):
         instance.display_name = new_name
         if not instance.get('hostname', None):
             instance.hostname = utils.sanitize_hostname(new_name)
-        instance.save()
         return instance
 
     def _check_config_drive(self, config_drive):
@@ -865,6 +864,22 @@ class API(base.Base):
         LOG.debug("Going to run %s instances..." % num_instances)
         instances = []
         try:
+            # NOTE: Everything which does not depend on the individual
+            # instance is done once for the whole request rather than once
+            # per instance, to keep the number of DB round trips down for
+            # large min_count boots.
+            if instance_group and check_server_group_quota:
+                count = QUOTAS.count(context, 'server_group_members',
+                                     instance_group, context.user_id)
+                try:
+                    QUOTAS.limit_check(
+                        context, server_group_members=count + num_instances)
+                except exception.OverQuota:
+                    msg = _("Quota exceeded, too many servers in group")
+                    raise exception.QuotaError(msg)
+            self.security_group_api.ensure_default(context)
+
+            pci_requests = base_options['pci_request_info']
             for i in xrange(num_instances):
                 instance = objects.Instance()
                 instance.update(base_options)
@@ -872,29 +887,19 @@ class API(base.Base):
                         context, instance_type, boot_meta, instance,
                         security_groups, block_device_mapping,
                         num_instances, i, shutdown_terminate)
-                pci_requests = base_options['pci_request_info']
-                pci_requests.instance_uuid = instance.uuid
-                pci_requests.save(context)
                 instances.append(instance)
-
-                if instance_group:
-                    if check_server_group_quota:
-                        count = QUOTAS.count(context,
-                                             'server_group_members',
-                                             instance_group,
-                                             context.user_id)
-                        try:
-                            QUOTAS.limit_check(context,
-                                               server_group_members=count + 1)
-                        except exception.OverQuota:
-                            msg = _("Quota exceeded, too many servers in "
-                                    "group")
-                            raise exception.QuotaError(msg)
-
-                    objects.InstanceGroup.add_members(context,
-                                                      instance_group.uuid,
-                                                      [instance.uuid])
-
+                # NOTE: An instance without a saved PCI request blob reads
+                # back as having no requests, so only save non-empty ones.
+                if pci_requests.requests:
+                    pci_requests.instance_uuid = instance.uuid
+                    pci_requests.save(context)
+
+            if instance_group:
+                objects.InstanceGroup.add_members(
+                    context, instance_group.uuid,
+                    [inst.uuid for inst in instances])
+
+            for instance in instances:
                 # send a state update notification for the initial create to
                 # show it going from non-existent to BUILDING
                 notifications.send_update_with_states(context, instance, None,
@@ -1335,7 +1340,9 @@ class API(base.Base):
         etc).
 
         This is called by the scheduler after a location for the
-        instance has been determined.
+        instance has been determined. Callers are expected to have made
+        sure the context has a default security group (see
+        SecurityGroupAPI.ensure_default()).
         """
         self._populate_instance_for_create(context, instance, image, index,
                                            security_group, instance_type)
@@ -1344,16 +1351,17 @@ class API(base.Base):
 
         instance.shutdown_terminate = shutdown_terminate
 
-        self.security_group_api.ensure_default(context)
-        instance.create(context)
-
         if num_instances > 1:
             # NOTE(russellb) We wait until this spot to handle
             # multi_instance_display_name_template, because we need
-            # the UUID from the instance.
+            # the UUID from the instance. It is generated by
+            # _populate_instance_for_create(), so the name can be set
+            # before the DB entry is created rather than saved afterwards.
             instance = self._apply_instance_name_template(context, instance,
                                                           index)
 
+        instance.create(context)
+
         # NOTE (ndipanov): This can now raise exceptions but the instance
         #                  has been created, so delete it and re-raise so
         #                  that other cleanup can happen.
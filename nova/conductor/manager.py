@@ -414,20 +414,35 @@ class ConductorManager(manager.Manager):
         return (result.obj_to_primitive(target_version=objver)
                 if isinstance(result, nova_object.NovaObject) else result)
 
+    @staticmethod
+    def _snapshot_field(value):
+        """Return a comparable copy of a field value.
+
+        Nested objects have no notion of equality, so they are reduced to
+        their primitive form; that way an untouched nested object compares
+        equal to its snapshot and is not sent back to the caller.
+        """
+        if isinstance(value, nova_object.NovaObject):
+            return value.obj_to_primitive()
+        return copy.deepcopy(value)
+
     def object_action(self, context, objinst, objmethod, args, kwargs):
         """Perform an action on an object."""
-        oldobj = objinst.obj_clone()
+        snapshot = dict((name, self._snapshot_field(objinst[name]))
+                        for name in objinst.fields
+                        if objinst.obj_attr_is_set(name))
         result = self._object_dispatch(objinst, objmethod, context,
                                        args, kwargs)
         updates = dict()
         # NOTE(danms): Diff the object with the one passed to us and
-        # generate a list of changes to forward back
+        # generate a list of changes to forward back. Only fields that
+        # actually changed are returned, which keeps the reply to a delta.
         for name, field in objinst.fields.items():
             if not objinst.obj_attr_is_set(name):
                 # Avoid demand-loading anything
                 continue
-            if (not oldobj.obj_attr_is_set(name) or
-                    oldobj[name] != objinst[name]):
+            if (name not in snapshot or
+                    snapshot[name] != self._snapshot_field(objinst[name])):
                 updates[name] = field.to_primitive(objinst, name,
                                                    objinst[name])
         # This is safe since a field named this would conflict with the
@@ -618,31 +633,35 @@ class ComputeTaskManager(base.Base):
                         instance.uuid, request_spec)
             return
 
-        for (instance, host) in itertools.izip(instances, hosts):
-            try:
-                instance.refresh()
-            except (exception.InstanceNotFound,
-                    exception.InstanceInfoCacheNotFound):
-                LOG.debug('Instance deleted during build', instance=instance)
-                continue
-            local_filter_props = copy.deepcopy(filter_properties)
-            scheduler_utils.populate_filter_properties(local_filter_props,
-                host)
-            # The block_device_mapping passed from the api doesn't contain
-            # instance specific information
-            bdms = objects.BlockDeviceMappingList.get_by_instance_uuid(
-                    context, instance.uuid)
-
-            self.compute_rpcapi.build_and_run_instance(context,
-                    instance=instance, host=host['host'], image=image,
-                    request_spec=request_spec,
-                    filter_properties=local_filter_props,
-                    admin_password=admin_password,
-                    injected_files=injected_files,
-                    requested_networks=requested_networks,
-                    security_groups=security_groups,
-                    block_device_mapping=bdms, node=host['nodename'],
-                    limits=host['limits'])
+        # NOTE: The same objects (e.g. requested_networks) go to every
+        # host, so serialize them only once.
+        with nova_object.obj_primitive_cache():
+            for (instance, host) in itertools.izip(instances, hosts):
+                try:
+                    instance.refresh()
+                except (exception.InstanceNotFound,
+                        exception.InstanceInfoCacheNotFound):
+                    LOG.debug('Instance deleted during build',
+                              instance=instance)
+                    continue
+                local_filter_props = copy.deepcopy(filter_properties)
+                scheduler_utils.populate_filter_properties(local_filter_props,
+                    host)
+                # The block_device_mapping passed from the api doesn't contain
+                # instance specific information
+                bdms = objects.BlockDeviceMappingList.get_by_instance_uuid(
+                        context, instance.uuid)
+
+                self.compute_rpcapi.build_and_run_instance(context,
+                        instance=instance, host=host['host'], image=image,
+                        request_spec=request_spec,
+                        filter_properties=local_filter_props,
+                        admin_password=admin_password,
+                        injected_files=injected_files,
+                        requested_networks=requested_networks,
+                        security_groups=security_groups,
+                        block_device_mapping=bdms, node=host['nodename'],
+                        limits=host['limits'])
 
     def _delete_image(self, context, image_id):
         return self.image_api.delete(context, image_id)
@@ -117,6 +117,13 @@ def service_get_all_by_topic(context, topic):
     return IMPL.service_get_all_by_topic(context, topic)
 
 
+def service_get_all_up_by_topic(context, topic, down_time):
+    """Get the services for a given topic, disabled or not, which have
+    reported within down_time seconds.
+    """
+    return IMPL.service_get_all_up_by_topic(context, topic, down_time)
+
+
 def service_get_all_by_host(context, host):
     """Get all services for a given host."""
     return IMPL.service_get_all_by_host(context, host)
@@ -181,7 +188,7 @@ def compute_node_get_by_service_id(context, service_id):
     return IMPL.compute_node_get_by_service_id(context, service_id)
 
 
-def compute_node_get_all(context, no_date_fields=False):
+def compute_node_get_all(context, no_date_fields=False, updated_since=None):
     """Get all computeNodes.
 
     :param context: The security context
@@ -189,11 +196,14 @@ def compute_node_get_all(context, no_date_fields=False):
                            'deleted_at' and 'deleted' fields from the output,
                            thus significantly reducing its size.
                            Set to False by default
+    :param updated_since: If set, only return compute nodes created or
+                          updated at or after this datetime
 
     :returns: List of dictionaries each containing compute node properties,
               including corresponding service
     """
-    return IMPL.compute_node_get_all(context, no_date_fields)
+    return IMPL.compute_node_get_all(context, no_date_fields,
+                                     updated_since=updated_since)
 
 
 def compute_node_search_by_hypervisor(context, hypervisor_match):
@@ -693,6 +703,11 @@ def instance_get_all_by_host_and_not_type(context, host, type_id=None):
     return IMPL.instance_get_all_by_host_and_not_type(context, host, type_id)
 
 
+def instance_get_hosts_by_not_type(context, type_id=None):
+    """Get the hosts running any instance with a different type_id."""
+    return IMPL.instance_get_hosts_by_not_type(context, type_id)
+
+
 def instance_get_floating_address(context, instance_id):
     """Get the first floating ip address of an instance."""
     return IMPL.instance_get_floating_address(context, instance_id)
@@ -1707,6 +1722,11 @@ def s3_image_get_by_uuid(context, image_uuid):
     return IMPL.s3_image_get_by_uuid(context, image_uuid)
 
 
+def s3_image_get_all_by_uuids(context, image_uuids):
+    """Find the local s3 images represented by the provided uuids."""
+    return IMPL.s3_image_get_all_by_uuids(context, image_uuids)
+
+
 def s3_image_create(context, image_uuid):
     """Create local s3 image represented by provided uuid."""
     return IMPL.s3_image_create(context, image_uuid)
@@ -1885,6 +1905,11 @@ def ec2_instance_get_by_uuid(context, instance_uuid):
     return IMPL.ec2_instance_get_by_uuid(context, instance_uuid)
 
 
+def ec2_instance_get_all_by_uuids(context, instance_uuids):
+    """Get the ec2 id mappings of the given instance uuids."""
+    return IMPL.ec2_instance_get_all_by_uuids(context, instance_uuids)
+
+
 def ec2_instance_get_by_id(context, instance_id):
     return IMPL.ec2_instance_get_by_id(context, instance_id)
 
@@ -1937,20 +1962,23 @@ def task_log_get(context, task_name, period_beginning,
 ####################
 
 
-def archive_deleted_rows(context, max_rows=None):
+def archive_deleted_rows(context, max_rows=None, batch_size=None):
     """Move up to max_rows rows from production tables to corresponding shadow
-    tables.
+    tables, in transactions of up to batch_size rows.
 
     :returns: number of rows archived.
     """
-    return IMPL.archive_deleted_rows(context, max_rows=max_rows)
+    return IMPL.archive_deleted_rows(context, max_rows=max_rows,
+                                     batch_size=batch_size)
 
 
-def archive_deleted_rows_for_table(context, tablename, max_rows=None):
+def archive_deleted_rows_for_table(context, tablename, max_rows=None,
+                                   batch_size=None):
     """Move up to max_rows rows from tablename to corresponding shadow
-    table.
+    table, in transactions of up to batch_size rows.
 
     :returns: number of rows archived.
     """
     return IMPL.archive_deleted_rows_for_table(context, tablename,
-                                               max_rows=max_rows)
+                                               max_rows=max_rows,
+                                               batch_size=batch_size)
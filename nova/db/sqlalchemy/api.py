@@ -58,6 +58,7 @@ import nova.context
 from nova.db.sqlalchemy import models
 from nova import exception
 from nova.i18n import _
+from nova.i18n import _LI
 from nova.openstack.common import excutils
 from nova.openstack.common import log as logging
 from nova.openstack.common import timeutils
@@ -454,6 +455,21 @@ def service_get_all_by_topic(context, topic):
                 all()
 
 
+@require_admin_context
+def service_get_all_up_by_topic(context, topic, down_time):
+    # Same window as the servicegroup DB driver's is_up(), which tolerates
+    # heartbeats up to down_time seconds in the future
+    now = timeutils.utcnow()
+    down_delta = datetime.timedelta(seconds=down_time)
+    last_heartbeat = func.coalesce(models.Service.updated_at,
+                                   models.Service.created_at)
+    return model_query(context, models.Service, read_deleted="no").\
+                filter_by(topic=topic).\
+                filter(last_heartbeat.between(now - down_delta,
+                                              now + down_delta)).\
+                all()
+
+
 @require_admin_context
 def service_get_by_host_and_topic(context, host, topic):
     return model_query(context, models.Service, read_deleted="no").\
@@ -558,7 +574,7 @@ def compute_node_get_by_service_id(context, service_id):
 
 
 @require_admin_context
-def compute_node_get_all(context, no_date_fields):
+def compute_node_get_all(context, no_date_fields, updated_since=None):
 
     # NOTE(msdubov): Using lower-level 'select' queries and joining the tables
     #                manually here allows to gain 3x speed-up and to have 5x
@@ -580,6 +596,10 @@ def compute_node_get_all(context, no_date_fields):
         compute_node_query = sql.select(filter_columns(compute_node)).\
                                 where(compute_node.c.deleted == 0).\
                                 order_by(compute_node.c.service_id)
+        if updated_since is not None:
+            compute_node_query = compute_node_query.where(
+                    or_(compute_node.c.updated_at >= updated_since,
+                        compute_node.c.created_at >= updated_since))
         compute_node_rows = conn.execute(compute_node_query).fetchall()
 
         service_query = sql.select(filter_columns(service)).\
@@ -2206,6 +2226,17 @@ def instance_get_all_by_host_and_not_type(context, host, type_id=None):
                    filter(models.Instance.instance_type_id != type_id).all())
 
 
+@require_admin_context
+def instance_get_hosts_by_not_type(context, type_id=None):
+    rows = model_query(context, models.Instance.host, read_deleted="no",
+                       base_model=models.Instance).\
+                filter(models.Instance.host != null()).\
+                filter(models.Instance.instance_type_id != type_id).\
+                distinct().\
+                all()
+    return [row[0] for row in rows]
+
+
 # NOTE(jkoelker) This is only being left here for compat with floating
 #                ips. Currently the network_api doesn't return floaters
 #                in network_info. Once it starts return the model. This
@@ -5089,6 +5120,15 @@ def s3_image_get_by_uuid(context, image_uuid):
     return result
 
 
+def s3_image_get_all_by_uuids(context, image_uuids):
+    """Find the local s3 images represented by the provided uuids."""
+    if not image_uuids:
+        return []
+    return model_query(context, models.S3Image, read_deleted="yes").\
+                filter(models.S3Image.uuid.in_(image_uuids)).\
+                all()
+
+
 def s3_image_create(context, image_uuid):
     """Create local s3 image represented by provided uuid."""
     try:
@@ -5595,6 +5635,15 @@ def ec2_instance_get_by_uuid(context, instance_uuid):
     return result
 
 
+@require_context
+def ec2_instance_get_all_by_uuids(context, instance_uuids):
+    if not instance_uuids:
+        return []
+    return _ec2_instance_get_query(context).\
+                    filter(models.InstanceIdMapping.uuid.in_(instance_uuids)).\
+                    all()
+
+
 @require_context
 def get_ec2_instance_id_by_uuid(context, instance_id):
     result = ec2_instance_get_by_uuid(context, instance_id)
@@ -5710,10 +5759,16 @@ def _get_default_deleted_value(table):
 
 
 @require_admin_context
-def archive_deleted_rows_for_table(context, tablename, max_rows):
+def archive_deleted_rows_for_table(context, tablename, max_rows,
+                                  batch_size=None):
     """Move up to max_rows rows from one tables to the corresponding
     shadow table. The context argument is only used for the decorator.
 
+    Rows are moved in transactions of up to batch_size rows, in key order,
+    so that each transaction only locks a small range of the table. A batch
+    which cannot be moved because of a foreign key constraint is left in
+    place and archiving resumes after it.
+
     :returns: number of rows archived
     """
     # NOTE(guochbo): There is a circular import, nova.db.sqlalchemy.utils
@@ -5740,55 +5795,88 @@ def archive_deleted_rows_for_table(context, tablename, max_rows):
         column = table.c.domain
     else:
         column = table.c.id
-    # NOTE(guochbo): Use InsertFromSelect and DeleteFromSelect to avoid
-    # database's limit of maximum parameter in one SQL statement.
-    query_insert = sql.select([table],
-                          table.c.deleted != default_deleted_value).\
-                          order_by(column).limit(max_rows)
-    query_delete = sql.select([column],
-                          table.c.deleted != default_deleted_value).\
-                          order_by(column).limit(max_rows)
-
-    insert_statement = sqlalchemyutils.InsertFromSelect(
-        shadow_table, query_insert)
-    delete_statement = db_utils.DeleteFromSelect(table, query_delete, column)
-    try:
-        # Group the insert and delete in a transaction.
-        with conn.begin():
-            conn.execute(insert_statement)
-            result_delete = conn.execute(delete_statement)
-    except db_exc.DBError:
-        # TODO(ekudryashova): replace by DBReferenceError when db layer
-        # raise it.
-        # A foreign key constraint keeps us from deleting some of
-        # these rows until we clean up a dependent table.  Just
-        # skip this table for now; we'll come back to it later.
-        msg = _("IntegrityError detected when archiving table %s") % tablename
-        LOG.warn(msg)
-        return rows_archived
 
-    rows_archived = result_delete.rowcount
+    # Rows with a key up to this one have been archived or skipped
+    checkpoint = None
+    while max_rows is None or rows_archived < max_rows:
+        limit = batch_size
+        if max_rows is not None:
+            limit = min(limit or max_rows, max_rows - rows_archived)
+
+        where = table.c.deleted != default_deleted_value
+        if checkpoint is not None:
+            where = and_(where, column > checkpoint)
+        # NOTE(guochbo): Use InsertFromSelect and DeleteFromSelect to avoid
+        # database's limit of maximum parameter in one SQL statement.
+        query_insert = sql.select([table], where).\
+                              order_by(column).limit(limit)
+        query_delete = sql.select([column], where).\
+                              order_by(column).limit(limit)
+
+        insert_statement = sqlalchemyutils.InsertFromSelect(
+            shadow_table, query_insert)
+        delete_statement = db_utils.DeleteFromSelect(table, query_delete,
+                                                     column)
+        try:
+            # Group the insert and delete in a transaction.
+            with conn.begin():
+                conn.execute(insert_statement)
+                result_delete = conn.execute(delete_statement)
+        except db_exc.DBError:
+            # TODO(ekudryashova): replace by DBReferenceError when db layer
+            # raise it.
+            # A foreign key constraint keeps us from deleting some of
+            # these rows until we clean up a dependent table.  Skip this
+            # batch for now; we'll come back to it later.
+            msg = _("IntegrityError detected when archiving table %s") % \
+                tablename
+            LOG.warn(msg)
+            if limit is None:
+                break
+            keys = [row[0] for row in conn.execute(query_delete)]
+            if not keys:
+                break
+            checkpoint = keys[-1]
+            continue
+
+        rows_archived += result_delete.rowcount
+        if limit is None or result_delete.rowcount < limit:
+            break
 
     return rows_archived
 
 
 @require_admin_context
-def archive_deleted_rows(context, max_rows=None):
+def archive_deleted_rows(context, max_rows=None, batch_size=None):
     """Move up to max_rows rows from production tables to the corresponding
     shadow tables.
 
+    Tables are archived in dependency order, the tables referencing others
+    first, and each of them in transactions of up to batch_size rows.
+
     :returns: Number of rows archived.
     """
     # The context argument is only used for the decorator.
-    tablenames = []
-    for model_class in models.__dict__.itervalues():
-        if hasattr(model_class, "__tablename__"):
-            tablenames.append(model_class.__tablename__)
+    tablenames = [table.name
+                  for table in reversed(models.BASE.metadata.sorted_tables)]
     rows_archived = 0
     for tablename in tablenames:
-        rows_archived += archive_deleted_rows_for_table(context, tablename,
-                                         max_rows=max_rows - rows_archived)
-        if rows_archived >= max_rows:
+        table_max_rows = None
+        if max_rows is not None:
+            table_max_rows = max_rows - rows_archived
+        start = time.time()
+        table_rows_archived = archive_deleted_rows_for_table(
+            context, tablename, max_rows=table_max_rows,
+            batch_size=batch_size)
+        if table_rows_archived:
+            elapsed = time.time() - start
+            LOG.info(_LI("Archived %(rows)d rows from %(table)s in "
+                         "%(elapsed).1f seconds (%(rate)d rows/s)"),
+                     {'rows': table_rows_archived, 'table': tablename,
+                      'elapsed': elapsed,
+                      'rate': table_rows_archived / max(elapsed, 0.001)})
+        rows_archived += table_rows_archived
+        if max_rows is not None and rows_archived >= max_rows:
             break
     return rows_archived
 
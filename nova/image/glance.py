@@ -18,6 +18,7 @@
 from __future__ import absolute_import
 
 import copy
+import hashlib
 import itertools
 import random
 import sys
@@ -32,6 +33,7 @@ import six.moves.urllib.parse as urlparse
 from nova import exception
 from nova.i18n import _
 import nova.image.download as image_xfers
+from nova.openstack.common import fileutils
 from nova.openstack.common import jsonutils
 from nova.openstack.common import log as logging
 from nova.openstack.common import timeutils
@@ -78,6 +80,11 @@ glance_opts = [
                      'via the direct_url.  Currently supported schemes: '
                      '[file].',
                deprecated_group='DEFAULT'),
+    cfg.BoolOpt('verify_checksum',
+                default=False,
+                help='Verify the MD5 checksum of images downloaded from '
+                     'glance against the image metadata, as the data is '
+                     'written.'),
     ]
 
 LOG = logging.getLogger(__name__)
@@ -336,6 +343,7 @@ class GlanceImageService(object):
 
     def download(self, context, image_id, data=None, dst_path=None):
         """Calls out to Glance for data and writes data."""
+        image = None
         if CONF.glance.allowed_direct_url_schemes and dst_path is not None:
             image = self.show(context, image_id, include_locations=True)
             for entry in image.get('locations', []):
@@ -365,13 +373,33 @@ class GlanceImageService(object):
 
         if data is None:
             return image_chunks
-        else:
-            try:
-                for chunk in image_chunks:
-                    data.write(chunk)
-            finally:
-                if close_file:
-                    data.close()
+
+        checksum = None
+        if CONF.glance.verify_checksum:
+            if image is None:
+                image = self.show(context, image_id)
+            if image.get('checksum'):
+                checksum = hashlib.md5()
+
+        try:
+            for chunk in image_chunks:
+                data.write(chunk)
+                if checksum is not None:
+                    checksum.update(chunk)
+        finally:
+            if close_file:
+                data.close()
+
+        if (checksum is not None and
+                checksum.hexdigest() != image['checksum']):
+            if close_file:
+                fileutils.delete_if_exists(dst_path)
+            reason = (_("checksum %(actual)s of the downloaded data does not "
+                        "match the expected checksum %(expected)s") %
+                      {'actual': checksum.hexdigest(),
+                       'expected': image['checksum']})
+            raise exception.ImageUnacceptable(image_id=image_id,
+                                              reason=reason)
 
     def create(self, context, image_meta, data=None):
         """Store the image data and return the new image object."""
@@ -18,6 +18,7 @@
 """Implements vlans, bridges, and iptables rules using linux utilities."""
 
 import calendar
+import collections
 import inspect
 import os
 import re
@@ -115,6 +116,12 @@ linux_net_opts = [
                default='',
                help='Regular expression to match iptables rule that should '
                     'always be on the bottom.'),
+    cfg.BoolOpt('iptables_incremental_apply',
+                default=False,
+                help='Only rewrite the wrapped iptables chains changed since '
+                     'the last apply, with iptables-restore --noflush, '
+                     'instead of rewriting whole tables. Changes to '
+                     'unwrapped chains still rewrite whole tables.'),
     cfg.StrOpt('iptables_drop_action',
                default='DROP',
                help=('The table that iptables to jump to when a packet is '
@@ -170,6 +177,9 @@ class IptablesRule(object):
     def __ne__(self, other):
         return not self == other
 
+    def __hash__(self):
+        return hash((self.chain, self.rule, self.top, self.wrap))
+
     def __str__(self):
         if self.wrap:
             chain = '%s-%s' % (binary_name, self.chain)
@@ -179,16 +189,37 @@ class IptablesRule(object):
         return '[0:0] -A %s %s' % (chain, self.rule)
 
 
+def _strip_counters(line):
+    """Return an iptables-save line without its [packet:byte] counts."""
+    if line.startswith('['):
+        line = line.split(']', 1)[1]
+    return line.strip()
+
+
 class IptablesTable(object):
     """An iptables table."""
 
     def __init__(self):
-        self.rules = []
+        # Ordered set of IptablesRules, so that rules are looked up and
+        # removed in constant time but applied in the order they were added
+        self.rules = collections.OrderedDict()
         self.remove_rules = []
         self.chains = set()
         self.unwrapped_chains = set()
         self.remove_chains = set()
         self.dirty = True
+        # Wrapped chains changed since the last apply, or None if whole
+        # tables must be rewritten
+        self.dirty_chains = None
+
+    def _mark_dirty(self, chain, wrap=True):
+        self.dirty = True
+        if self.dirty_chains is None:
+            return
+        if wrap:
+            self.dirty_chains.add(chain)
+        else:
+            self.dirty_chains = None
 
     def has_chain(self, name, wrap=True):
         if wrap:
@@ -212,7 +243,7 @@ class IptablesTable(object):
             self.chains.add(name)
         else:
             self.unwrapped_chains.add(name)
-        self.dirty = True
+        self._mark_dirty(name, wrap)
 
     def remove_chain(self, name, wrap=True):
         """Remove named chain.
@@ -232,26 +263,28 @@ class IptablesTable(object):
             LOG.warn(_('Attempted to remove chain %s which does not exist'),
                      name)
             return
-        self.dirty = True
+        self._mark_dirty(name, wrap)
 
         # non-wrapped chains and rules need to be dealt with specially,
         # so we keep a list of them to be iterated over in apply()
         if not wrap:
             self.remove_chains.add(name)
         chain_set.remove(name)
-        if not wrap:
-            self.remove_rules += filter(lambda r: r.chain == name, self.rules)
-        self.rules = filter(lambda r: r.chain != name, self.rules)
 
         if wrap:
             jump_snippet = '-j %s-%s' % (binary_name, name)
         else:
             jump_snippet = '-j %s' % (name,)
 
+        chain_rules = [r for r in self.rules if r.chain == name]
+        jump_rules = [r for r in self.rules
+                      if r.chain != name and jump_snippet in r.rule]
         if not wrap:
-            self.remove_rules += filter(lambda r: jump_snippet in r.rule,
-                                        self.rules)
-        self.rules = filter(lambda r: jump_snippet not in r.rule, self.rules)
+            self.remove_rules += chain_rules + jump_rules
+        for rule in chain_rules + jump_rules:
+            del self.rules[rule]
+        for rule in jump_rules:
+            self._mark_dirty(rule.chain, rule.wrap)
 
     def add_rule(self, chain, rule, wrap=True, top=False):
         """Add a rule to the table.
@@ -273,11 +306,11 @@ class IptablesTable(object):
         rule_obj = IptablesRule(chain, rule, wrap, top)
         if rule_obj in self.rules:
             LOG.debug("Skipping duplicate iptables rule addition. "
-                      "%(rule)r already in %(rules)r",
-                      {'rule': rule_obj, 'rules': self.rules})
+                      "%(rule)s already in the %(chain)r chain",
+                      {'rule': rule_obj, 'chain': chain})
         else:
-            self.rules.append(IptablesRule(chain, rule, wrap, top))
-            self.dirty = True
+            self.rules[rule_obj] = None
+            self._mark_dirty(chain, wrap)
 
     def _wrap_target_chain(self, s):
         if s.startswith('$'):
@@ -293,11 +326,11 @@ class IptablesTable(object):
 
         """
         try:
-            self.rules.remove(IptablesRule(chain, rule, wrap, top))
+            del self.rules[IptablesRule(chain, rule, wrap, top)]
             if not wrap:
                 self.remove_rules.append(IptablesRule(chain, rule, wrap, top))
-            self.dirty = True
-        except ValueError:
+            self._mark_dirty(chain, wrap)
+        except KeyError:
             LOG.warn(_('Tried to remove rule that was not there:'
                        ' %(chain)r %(rule)r %(wrap)r %(top)r'),
                      {'chain': chain, 'rule': rule,
@@ -307,21 +340,20 @@ class IptablesTable(object):
         """Remove all rules matching regex."""
         if isinstance(regex, six.string_types):
             regex = re.compile(regex)
-        num_rules = len(self.rules)
-        self.rules = filter(lambda r: not regex.match(str(r)), self.rules)
-        removed = num_rules - len(self.rules)
-        if removed > 0:
-            self.dirty = True
-        return removed
+        matched_rules = [r for r in self.rules if regex.match(str(r))]
+        for rule in matched_rules:
+            del self.rules[rule]
+            self._mark_dirty(rule.chain, rule.wrap)
+        return len(matched_rules)
 
     def empty_chain(self, chain, wrap=True):
         """Remove all rules from a chain."""
         chained_rules = [rule for rule in self.rules
                               if rule.chain == chain and rule.wrap == wrap]
         if chained_rules:
-            self.dirty = True
+            self._mark_dirty(chain, wrap)
         for rule in chained_rules:
-            self.rules.remove(rule)
+            del self.rules[rule]
 
 
 class IptablesManager(object):
@@ -443,26 +475,84 @@ class IptablesManager(object):
         same component of Nova, and replace them with our current set of
         rules. This happens atomically, thanks to iptables-restore.
 
+        With iptables_incremental_apply, only the wrapped chains changed
+        since the last apply are rewritten, unless unwrapped chains were
+        changed too.
+
         """
         s = [('iptables', self.ipv4)]
         if CONF.use_ipv6:
             s += [('ip6tables', self.ipv6)]
 
         for cmd, tables in s:
-            all_tables, _err = self.execute('%s-save' % (cmd,), '-c',
-                                                run_as_root=True,
-                                                attempts=5)
-            all_lines = all_tables.split('\n')
-            for table_name, table in tables.iteritems():
-                start, end = self._find_table(all_lines, table_name)
-                all_lines[start:end] = self._modify_rules(
-                        all_lines[start:end], table, table_name)
+            if (CONF.iptables_incremental_apply and
+                    self._can_apply_chains(tables)):
+                try:
+                    self._apply_chains(cmd, tables)
+                except processutils.ProcessExecutionError as e:
+                    LOG.warn(_('Failed to apply the changed iptables chains, '
+                               'rewriting whole tables: %s'), e)
+                    self._apply_tables(cmd, tables)
+            else:
+                self._apply_tables(cmd, tables)
+            for table in tables.itervalues():
                 table.dirty = False
-            self.execute('%s-restore' % (cmd,), '-c', run_as_root=True,
-                         process_input='\n'.join(all_lines),
-                         attempts=5)
+                table.dirty_chains = set()
         LOG.debug("IPTablesManager.apply completed with success")
 
+    def _apply_tables(self, cmd, tables):
+        all_tables, _err = self.execute('%s-save' % (cmd,), '-c',
+                                            run_as_root=True,
+                                            attempts=5)
+        all_lines = all_tables.split('\n')
+        for table_name, table in tables.iteritems():
+            start, end = self._find_table(all_lines, table_name)
+            all_lines[start:end] = self._modify_rules(
+                    all_lines[start:end], table, table_name)
+        self.execute('%s-restore' % (cmd,), '-c', run_as_root=True,
+                     process_input='\n'.join(all_lines),
+                     attempts=5)
+
+    @staticmethod
+    def _can_apply_chains(tables):
+        return all(table.dirty_chains or not table.dirty
+                   for table in tables.itervalues())
+
+    def _apply_chains(self, cmd, tables):
+        lines = []
+        for table_name, table in tables.iteritems():
+            if table.dirty_chains:
+                lines += self._modify_chains(table, table_name)
+        if lines:
+            self.execute('%s-restore' % (cmd,), '-c', '--noflush',
+                         run_as_root=True, process_input='\n'.join(lines),
+                         attempts=5)
+
+    def _modify_chains(self, table, table_name):
+        """Return the iptables-restore input rewriting the changed chains.
+
+        Declaring a chain in a --noflush restore creates or flushes it, so
+        the changed chains are declared and their rules added back, then
+        the chains removed from the table are deleted.
+        """
+        dirty_chains = sorted(table.dirty_chains)
+        lines = ['*%s' % table_name]
+        lines += [':%s-%s - [0:0]' % (binary_name, name)
+                  for name in dirty_chains]
+        top_rules = []
+        bottom_rules = []
+        for rule in table.rules:
+            if rule.wrap and rule.chain in table.dirty_chains:
+                if rule.top:
+                    top_rules.append(str(rule))
+                else:
+                    bottom_rules.append(str(rule))
+        lines += top_rules + bottom_rules
+        lines += ['-X %s-%s' % (binary_name, name)
+                  for name in dirty_chains if name not in table.chains]
+        lines.append('COMMIT')
+        return lines
+
     def _find_table(self, lines, table_name):
         if len(lines) < 3:
             # length only <2 when fake iptables
@@ -489,27 +579,26 @@ class IptablesManager(object):
             current_lines = fake_table
 
         # Remove any trace of our rules
-        new_filter = filter(lambda line: binary_name not in line,
-                            current_lines)
+        new_filter = [line for line in current_lines
+                      if binary_name not in line]
 
         top_rules = []
         bottom_rules = []
 
         if CONF.iptables_top_regex:
             regex = re.compile(CONF.iptables_top_regex)
-            temp_filter = filter(lambda line: regex.search(line), new_filter)
-            for rule_str in temp_filter:
-                new_filter = filter(lambda s: s.strip() != rule_str.strip(),
-                                    new_filter)
-            top_rules = temp_filter
+            top_rules = [line for line in new_filter if regex.search(line)]
+            top_lines = set(line.strip() for line in top_rules)
+            new_filter = [line for line in new_filter
+                          if line.strip() not in top_lines]
 
         if CONF.iptables_bottom_regex:
             regex = re.compile(CONF.iptables_bottom_regex)
-            temp_filter = filter(lambda line: regex.search(line), new_filter)
-            for rule_str in temp_filter:
-                new_filter = filter(lambda s: s.strip() != rule_str.strip(),
-                    new_filter)
-            bottom_rules = temp_filter
+            bottom_rules = [line for line in new_filter
+                            if regex.search(line)]
+            bottom_lines = set(line.strip() for line in bottom_rules)
+            new_filter = [line for line in new_filter
+                          if line.strip() not in bottom_lines]
 
         seen_chains = False
         rules_index = 0
@@ -524,8 +613,14 @@ class IptablesManager(object):
         if not seen_chains:
             rules_index = 2
 
+        # Positions of the current lines, ignoring [packet:byte] counts
+        line_positions = collections.defaultdict(list)
+        for i, line in enumerate(new_filter):
+            line_positions[_strip_counters(line)].append(i)
+
         our_rules = top_rules
         bot_rules = []
+        dup_positions = set()
         for rule in rules:
             rule_str = str(rule)
             if rule.top:
@@ -537,28 +632,19 @@ class IptablesManager(object):
                 # [packet:byte] counts and replace it with [0:0], so let's
                 # go look for a duplicate, and over-ride our table rule if
                 # found.
+                positions = line_positions.get(_strip_counters(rule_str))
+                if positions:
+                    dup_positions.update(positions)
+                    # grab the last entry
+                    rule_str = new_filter[positions[-1]]
 
-                # ignore [packet:byte] counts at beginning of line
-                if rule_str.startswith('['):
-                    rule_str = rule_str.split(']', 1)[1]
-                dup_filter = filter(lambda s: rule_str.strip() in s.strip(),
-                                    new_filter)
-
-                new_filter = filter(lambda s:
-                                    rule_str.strip() not in s.strip(),
-                                    new_filter)
-                # if no duplicates, use original rule
-                if dup_filter:
-                    # grab the last entry, if there is one
-                    dup = dup_filter[-1]
-                    rule_str = str(dup)
-                else:
-                    rule_str = str(rule)
-                rule_str.strip()
-
-                our_rules += [rule_str]
+                our_rules.append(rule_str)
             else:
-                bot_rules += [rule_str]
+                bot_rules.append(rule_str)
+
+        if dup_positions:
+            new_filter = [line for i, line in enumerate(new_filter)
+                          if i not in dup_positions]
 
         our_rules += bot_rules
 
@@ -576,15 +662,20 @@ class IptablesManager(object):
 
         def _weed_out_duplicates(line):
             # ignore [packet:byte] counts at beginning of lines
-            if line.startswith('['):
-                line = line.split(']', 1)[1]
-            line = line.strip()
+            line = _strip_counters(line)
             if line in seen_lines:
                 return False
             else:
                 seen_lines.add(line)
                 return True
 
+        # Each rule to remove matches a single line
+        remove_rule_counts = collections.defaultdict(int)
+        for rule in remove_rules:
+            # ignore [packet:byte] counts at beginning of rules
+            rule_str = str(rule).split(' ', 1)[1].strip()
+            remove_rule_counts[rule_str] += 1
+
         def _weed_out_removes(line):
             # We need to find exact matches here
             if line.startswith(':'):
@@ -593,23 +684,15 @@ class IptablesManager(object):
                 line = line.split(':')[1]
                 line = line.split('- [')[0]
                 line = line.strip()
-                for chain in remove_chains:
-                    if chain == line:
-                        remove_chains.remove(chain)
-                        return False
+                if line in remove_chains:
+                    remove_chains.remove(line)
+                    return False
             elif line.startswith('['):
                 # it's a rule
-                # ignore [packet:byte] counts at beginning of lines
-                line = line.split(']', 1)[1]
-                line = line.strip()
-                for rule in remove_rules:
-                    # ignore [packet:byte] counts at beginning of rules
-                    rule_str = str(rule)
-                    rule_str = rule_str.split(' ', 1)[1]
-                    rule_str = rule_str.strip()
-                    if rule_str == line:
-                        remove_rules.remove(rule)
-                        return False
+                line = _strip_counters(line)
+                if remove_rule_counts.get(line):
+                    remove_rule_counts[line] -= 1
+                    return False
 
             # Leave it alone
             return True
@@ -624,8 +707,7 @@ class IptablesManager(object):
 
         # flush lists, just in case we didn't find something
         remove_chains.clear()
-        for rule in remove_rules:
-            remove_rules.remove(rule)
+        del remove_rules[:]
 
         return new_filter
 
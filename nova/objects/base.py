@@ -15,9 +15,11 @@
 """Nova common internal object model"""
 
 import collections
+import contextlib
 import copy
 import datetime
 import functools
+import threading
 import traceback
 
 import netaddr
@@ -82,6 +84,7 @@ def make_class_properties(cls):
                     return
 
             self._changed_fields.add(name)
+            self._obj_generation += 1
             try:
                 return setattr(self, attrname, field_value)
             except Exception:
@@ -235,6 +238,10 @@ class NovaObject(object):
     fields = {}
     obj_extra_fields = []
 
+    # Bumped every time a field is set, so that cached primitives of this
+    # object can be recognized as stale (see obj_primitive_cache()).
+    _obj_generation = 0
+
     def __init__(self, context=None, **kwargs):
         self._changed_fields = set()
         self._context = context
@@ -394,6 +401,21 @@ class NovaObject(object):
         raise NotImplementedError(
             _("Cannot load '%s' in the base class") % attrname)
 
+    def _obj_hydrate(self, values):
+        """Bulk-load field values from a trusted source like the database.
+
+        This bypasses the per-field property setters: no read-only checks
+        are done, the fields are not marked as changed and values which
+        already have the right type are not coerced.
+
+        :param:values: An iterable of (field name, value) pairs
+        """
+        fields = self.fields
+        for name, value in values:
+            setattr(self, get_attrname(name),
+                    fields[name].coerce_trusted(self, name, value))
+        self._obj_generation += 1
+
     def save(self, context):
         """Save the changed fields back to the store.
 
@@ -591,6 +613,50 @@ class ObjectListBase(object):
         return changes
 
 
+_primitive_cache = threading.local()
+
+
+@contextlib.contextmanager
+def obj_primitive_cache():
+    """Reuse object primitives for the duration of a block.
+
+    While this is active, NovaObjectSerializer remembers the primitive it
+    built for each object and hands it out again as long as neither the
+    object nor any object nested in it had a field set in the meantime.
+    This avoids re-serializing the same objects when casting them to many
+    hosts.
+
+    Changes made in place to a mutable field value (like adding a key to
+    a dict field) are not noticed, so objects must not be modified that
+    way inside the block. Cached primitives are shared between messages
+    and must not be modified either.
+    """
+    if getattr(_primitive_cache, 'entries', None) is not None:
+        # Nested use shares the outer cache
+        yield
+        return
+    _primitive_cache.entries = {}
+    try:
+        yield
+    finally:
+        _primitive_cache.entries = None
+
+
+def _obj_stamp(obj):
+    """Return a value which changes whenever obj or its children change."""
+    stamp = [obj._obj_generation, frozenset(obj._changed_fields)]
+    for name in obj.fields:
+        if not obj.obj_attr_is_set(name):
+            continue
+        value = getattr(obj, name)
+        if isinstance(value, NovaObject):
+            stamp.append(_obj_stamp(value))
+        elif isinstance(value, (list, tuple)):
+            stamp.extend(_obj_stamp(item) for item in value
+                         if isinstance(item, NovaObject))
+    return tuple(stamp)
+
+
 class NovaObjectSerializer(messaging.NoOpSerializer):
     """A NovaObject-aware Serializer.
 
@@ -641,9 +707,24 @@ class NovaObjectSerializer(messaging.NoOpSerializer):
                                             entity)
         elif (hasattr(entity, 'obj_to_primitive') and
               callable(entity.obj_to_primitive)):
-            entity = entity.obj_to_primitive()
+            entity = self._obj_to_primitive(entity)
         return entity
 
+    @staticmethod
+    def _obj_to_primitive(entity):
+        entries = getattr(_primitive_cache, 'entries', None)
+        if entries is None or not isinstance(entity, NovaObject):
+            return entity.obj_to_primitive()
+        stamp = _obj_stamp(entity)
+        # NOTE: The object itself is kept in the entry so that its id()
+        # cannot be reused by another object while the cache is alive.
+        cached = entries.get(id(entity))
+        if cached is not None and cached[1] == stamp:
+            return cached[2]
+        primitive = entity.obj_to_primitive()
+        entries[id(entity)] = (entity, stamp, primitive)
+        return primitive
+
     def deserialize_entity(self, context, entity):
         if isinstance(entity, dict) and 'nova_object.name' in entity:
             entity = self._process_object(context, entity)
@@ -101,6 +101,11 @@ class AbstractFieldType(six.with_metaclass(abc.ABCMeta, object)):
 
 
 class FieldType(AbstractFieldType):
+    # NOTE: Value types that coerce() would return with the same value.
+    # Values of exactly these types may skip coercion when they come from
+    # a trusted source like the database (see Field.coerce_trusted()).
+    trusted_types = ()
+
     @staticmethod
     def coerce(obj, attr, value):
         return value
@@ -188,6 +193,19 @@ class Field(object):
         else:
             return self._type.coerce(obj, attr, value)
 
+    def coerce_trusted(self, obj, attr, value):
+        """Coerce a value loaded from a trusted source.
+
+        Values which are already of the exact type coerce() would produce
+        are returned as-is; everything else goes through coerce().
+        """
+        if value is None:
+            if self._nullable:
+                return None
+        elif type(value) in self._type.trusted_types:
+            return value
+        return self.coerce(obj, attr, value)
+
     def from_primitive(self, obj, attr, value):
         """Deserialize a value from primitive form.
 
@@ -236,6 +254,8 @@ class Field(object):
 
 
 class String(FieldType):
+    trusted_types = (unicode,)
+
     @staticmethod
     def coerce(obj, attr, value):
         # FIXME(danms): We should really try to avoid the need to do this
@@ -252,6 +272,8 @@ class String(FieldType):
 
 
 class UUID(FieldType):
+    trusted_types = (str,)
+
     @staticmethod
     def coerce(obj, attr, value):
         # FIXME(danms): We should actually verify the UUIDness here
@@ -259,17 +281,23 @@ class UUID(FieldType):
 
 
 class Integer(FieldType):
+    trusted_types = (int, long)
+
     @staticmethod
     def coerce(obj, attr, value):
         return int(value)
 
 
 class Float(FieldType):
+    trusted_types = (float,)
+
     def coerce(self, obj, attr, value):
         return float(value)
 
 
 class Boolean(FieldType):
+    trusted_types = (bool,)
+
     @staticmethod
     def coerce(obj, attr, value):
         return bool(value)
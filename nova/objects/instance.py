@@ -265,16 +265,19 @@ class Instance(base.NovaPersistentObject, base.NovaObject):
         instance._context = context
         if expected_attrs is None:
             expected_attrs = []
-        # Most of the field names match right now, so be quick
+        # Most of the field names match right now, so be quick. The values
+        # come straight from the database, so skip the property setters.
+        values = []
         for field in instance.fields:
             if field in INSTANCE_OPTIONAL_ATTRS:
                 continue
             elif field == 'deleted':
-                instance.deleted = db_inst['deleted'] == db_inst['id']
+                values.append((field, db_inst['deleted'] == db_inst['id']))
             elif field == 'cleaned':
-                instance.cleaned = db_inst['cleaned'] == 1
+                values.append((field, db_inst['cleaned'] == 1))
             else:
-                instance[field] = db_inst[field]
+                values.append((field, db_inst[field]))
+        instance._obj_hydrate(values)
 
         if 'metadata' in expected_attrs:
             instance['metadata'] = utils.instance_meta(db_inst)
@@ -34,6 +34,8 @@ S3 client with this module::
 
 import bisect
 import datetime
+import hashlib
+import itertools
 import os
 import os.path
 import urllib
@@ -64,6 +66,9 @@ s3_opts = [
 CONF = cfg.CONF
 CONF.register_opts(s3_opts)
 
+# Size of the reads and writes made when streaming objects
+_CHUNK_SIZE = 65536
+
 
 def get_wsgi_server():
     return wsgi.Server("S3 Objectstore",
@@ -94,9 +99,34 @@ class S3Application(wsgi.Router):
         self.directory = os.path.abspath(root_directory)
         fileutils.ensure_tree(self.directory)
         self.bucket_depth = bucket_depth
+        self.bucket_indexes = {}
         super(S3Application, self).__init__(mapper)
 
 
+class BucketIndex(object):
+    """Sorted list of the names of the objects in a bucket.
+
+    The index is built by walking the bucket directory the first time the
+    bucket is listed, and is then kept up to date by the object handlers,
+    so that listings only need to bisect it.
+    """
+
+    def __init__(self, object_names):
+        self.object_names = sorted(object_names)
+
+    def add(self, object_name):
+        pos = bisect.bisect_left(self.object_names, object_name)
+        if (pos == len(self.object_names) or
+                self.object_names[pos] != object_name):
+            self.object_names.insert(pos, object_name)
+
+    def remove(self, object_name):
+        pos = bisect.bisect_left(self.object_names, object_name)
+        if (pos < len(self.object_names) and
+                self.object_names[pos] == object_name):
+            del self.object_names[pos]
+
+
 class BaseRequestHandler(object):
     """Base class emulating Tornado's web framework pattern in WSGI.
 
@@ -210,6 +240,23 @@ class BaseRequestHandler(object):
             path = os.path.join(path, hash[:2 * (i + 1)])
         return os.path.join(path, object_name)
 
+    def _bucket_index(self, bucket_name, path):
+        """Return the BucketIndex of the bucket at path, building it if
+        needed.
+        """
+        index = self.application.bucket_indexes.get(bucket_name)
+        if index is None:
+            object_names = []
+            for root, dirs, files in os.walk(path):
+                for file_name in files:
+                    object_names.append(os.path.join(root, file_name))
+            skip = len(path) + 1
+            for i in range(self.application.bucket_depth):
+                skip += 2 * (i + 1) + 1
+            index = BucketIndex(n[skip:] for n in object_names)
+            self.application.bucket_indexes[bucket_name] = index
+        return index
+
 
 class RootHandler(BaseRequestHandler):
     def get(self):
@@ -240,15 +287,7 @@ class BucketHandler(BaseRequestHandler):
                 not os.path.isdir(path)):
             self.set_404()
             return
-        object_names = []
-        for root, dirs, files in os.walk(path):
-            for file_name in files:
-                object_names.append(os.path.join(root, file_name))
-        skip = len(path) + 1
-        for i in range(self.application.bucket_depth):
-            skip += 2 * (i + 1) + 1
-        object_names = [n[skip:] for n in object_names]
-        object_names.sort()
+        object_names = self._bucket_index(bucket_name, path).object_names
         contents = []
 
         start_pos = 0
@@ -258,7 +297,7 @@ class BucketHandler(BaseRequestHandler):
             start_pos = bisect.bisect_left(object_names, prefix, start_pos)
 
         truncated = False
-        for object_name in object_names[start_pos:]:
+        for object_name in itertools.islice(object_names, start_pos, None):
             if not object_name.startswith(prefix):
                 break
             if len(contents) >= max_keys:
@@ -305,6 +344,7 @@ class BucketHandler(BaseRequestHandler):
             self.set_status(403)
             return
         os.rmdir(path)
+        self.application.bucket_indexes.pop(bucket_name, None)
         self.set_status(204)
         self.finish()
 
@@ -319,6 +359,20 @@ class BucketHandler(BaseRequestHandler):
         self.finish()
 
 
+def _file_iter(object_file, start, length):
+    """Yield length bytes of object_file from start, one chunk at a time."""
+    try:
+        object_file.seek(start)
+        while length > 0:
+            chunk = object_file.read(min(length, _CHUNK_SIZE))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        object_file.close()
+
+
 class ObjectHandler(BaseRequestHandler):
     def get(self, bucket, object_name):
         object_name = urllib.unquote(object_name)
@@ -331,11 +385,20 @@ class ObjectHandler(BaseRequestHandler):
         self.set_header("Content-Type", "application/unknown")
         self.set_header("Last-Modified", datetime.datetime.utcfromtimestamp(
             info.st_mtime))
-        object_file = open(path, "r")
-        try:
-            self.finish(object_file.read())
-        finally:
-            object_file.close()
+        self.set_header("Accept-Ranges", "bytes")
+        start, stop = 0, info.st_size
+        if self.request.range is not None:
+            content_range = self.request.range.range_for_length(info.st_size)
+            if content_range is None:
+                self.set_status(416)
+                self.set_header("Content-Range", "bytes */%d" % info.st_size)
+                return
+            start, stop = content_range
+            self.set_status(206)
+            self.response.content_range = (start, stop, info.st_size)
+        object_file = open(path, "rb")
+        self.response.app_iter = _file_iter(object_file, start, stop - start)
+        self.response.content_length = stop - start
 
     def put(self, bucket, object_name):
         object_name = urllib.unquote(object_name)
@@ -351,11 +414,16 @@ class ObjectHandler(BaseRequestHandler):
             return
         directory = os.path.dirname(path)
         fileutils.ensure_tree(directory)
-        object_file = open(path, "w")
-        object_file.write(self.request.body)
-        object_file.close()
-        self.set_header('ETag',
-                        '"%s"' % utils.get_hash_str(self.request.body))
+        checksum = hashlib.md5()
+        body_file = self.request.body_file
+        with open(path, "wb") as object_file:
+            for chunk in iter(lambda: body_file.read(_CHUNK_SIZE), b''):
+                checksum.update(chunk)
+                object_file.write(chunk)
+        index = self.application.bucket_indexes.get(bucket)
+        if index is not None:
+            index.add(object_name)
+        self.set_header('ETag', '"%s"' % checksum.hexdigest())
         self.finish()
 
     def delete(self, bucket, object_name):
@@ -366,5 +434,8 @@ class ObjectHandler(BaseRequestHandler):
             self.set_404()
             return
         os.unlink(path)
+        index = self.application.bucket_indexes.get(bucket)
+        if index is not None:
+            index.remove(object_name)
         self.set_status(204)
         self.finish()
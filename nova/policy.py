@@ -15,12 +15,19 @@
 
 """Policy Engine For Nova."""
 
+import collections
+
 from nova import exception
+from nova.openstack.common import log as logging
 from nova.openstack.common import policy
 
+LOG = logging.getLogger(__name__)
 
 _ENFORCER = None
 
+# Number of requests for which rule results are memoized at a time
+_MEMO_REQUESTS = 64
+
 
 def reset():
     global _ENFORCER
@@ -43,10 +50,10 @@ def init(policy_file=None, rules=None, default_rule=None, use_conf=True):
 
     global _ENFORCER
     if not _ENFORCER:
-        _ENFORCER = policy.Enforcer(policy_file=policy_file,
-                                    rules=rules,
-                                    default_rule=default_rule,
-                                    use_conf=use_conf)
+        _ENFORCER = Enforcer(policy_file=policy_file,
+                             rules=rules,
+                             default_rule=default_rule,
+                             use_conf=use_conf)
 
 
 def set_rules(rules, overwrite=True, use_conf=False):
@@ -121,6 +128,156 @@ class IsAdminCheck(policy.Check):
         return creds['is_admin'] == self.expected
 
 
+class Enforcer(policy.Enforcer):
+    """Enforcer evaluating rules compiled into plain functions.
+
+    Each rule is compiled the first time it is used after the rules are
+    (re)loaded, flattening its check tree into closures. The results of the
+    rules which only depend on the credentials, such as context_is_admin,
+    are memoized for the duration of a request, so that rules shared by
+    several policies are evaluated once per request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Enforcer, self).__init__(*args, **kwargs)
+        self._reset_compiled()
+
+    def _reset_compiled(self):
+        # Maps rule names to (function, credentials only) tuples
+        self._compiled = {}
+        self._memo = collections.OrderedDict()
+
+    def set_rules(self, rules, overwrite=True, use_conf=False):
+        super(Enforcer, self).set_rules(rules, overwrite, use_conf)
+        self._reset_compiled()
+
+    def _request_memo(self, creds):
+        """Return the dict of rule results memoized for the request creds
+        belong to, or None if they have no request id.
+        """
+        request_id = creds.get('request_id')
+        if request_id is None:
+            return None
+        key = (request_id, creds.get('user_id'), creds.get('project_id'),
+               creds.get('is_admin'), tuple(creds.get('roles') or ()))
+        memo = self._memo.get(key)
+        if memo is None:
+            memo = self._memo[key] = {}
+            if len(self._memo) > _MEMO_REQUESTS:
+                self._memo.popitem(last=False)
+        return memo
+
+    def _memoize(self, name, func):
+        def memoized(target, creds):
+            memo = self._request_memo(creds)
+            if memo is None:
+                return func(target, creds)
+            if name not in memo:
+                memo[name] = func(target, creds)
+            return memo[name]
+        return memoized
+
+    def _compile_rule(self, name):
+        """Return the compiled function of the rule name and whether its
+        result only depends on the credentials.
+
+        :raises KeyError: if there is no such rule and no default rule.
+        """
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            # Rules referencing themselves are evaluated as they are written
+            self._compiled[name] = (
+                lambda target, creds: self.rules[name](target, creds, self),
+                False)
+            try:
+                func, creds_only = self._compile_check(self.rules[name])
+            except KeyError:
+                del self._compiled[name]
+                raise
+            if creds_only:
+                func = self._memoize(name, func)
+            compiled = self._compiled[name] = (func, creds_only)
+        return compiled
+
+    def _compile_check(self, check):
+        """Return a function of (target, creds) evaluating check and whether
+        its result only depends on the credentials.
+        """
+        if isinstance(check, policy.TrueCheck):
+            return lambda target, creds: True, True
+        if isinstance(check, policy.FalseCheck):
+            return lambda target, creds: False, True
+        if isinstance(check, policy.NotCheck):
+            func, creds_only = self._compile_check(check.rule)
+            return lambda target, creds: not func(target, creds), creds_only
+        if isinstance(check, (policy.AndCheck, policy.OrCheck)):
+            compiled = [self._compile_check(rule) for rule in check.rules]
+            funcs = [f for f, _ in compiled]
+            creds_only = all(c for _, c in compiled)
+            if isinstance(check, policy.AndCheck):
+                def and_check(target, creds):
+                    for func in funcs:
+                        if not func(target, creds):
+                            return False
+                    return True
+                return and_check, creds_only
+
+            def or_check(target, creds):
+                for func in funcs:
+                    if func(target, creds):
+                        return True
+                return False
+            return or_check, creds_only
+        if isinstance(check, policy.RuleCheck):
+            try:
+                return self._compile_rule(check.match)
+            except KeyError:
+                # We don't have any matching rule; fail closed
+                return lambda target, creds: False, True
+        if isinstance(check, policy.RoleCheck):
+            role = check.match.lower()
+            return (lambda target, creds:
+                    role in [x.lower() for x in creds['roles']]), True
+        if isinstance(check, IsAdminCheck):
+            expected = check.expected
+            return lambda target, creds: creds['is_admin'] == expected, True
+        # Generic checks only depend on the target through substitutions
+        creds_only = (isinstance(check, policy.GenericCheck) and
+                      '%' not in check.match)
+        return lambda target, creds: check(target, creds, self), creds_only
+
+    def enforce(self, rule, target, creds, do_raise=False,
+                exc=None, *args, **kwargs):
+        """Checks authorization of a rule against the target and credentials.
+
+        See nova.openstack.common.policy.Enforcer.enforce().
+        """
+        self.load_rules()
+
+        if isinstance(rule, policy.BaseCheck):
+            result = rule(target, creds, self)
+        elif not self.rules:
+            # No rules to reference means we're going to fail closed
+            result = False
+        else:
+            try:
+                func, creds_only = self._compile_rule(rule)
+            except KeyError:
+                LOG.debug("Rule [%s] doesn't exist", rule)
+                # If the rule doesn't exist, fail closed
+                result = False
+            else:
+                result = func(target, creds)
+
+        if do_raise and not result:
+            if exc:
+                raise exc(*args, **kwargs)
+
+            raise policy.PolicyNotAuthorized(rule)
+
+        return result
+
+
 def get_rules():
     if _ENFORCER:
         return _ENFORCER.rules
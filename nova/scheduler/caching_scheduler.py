@@ -13,7 +13,23 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo.config import cfg
+
 from nova.scheduler import filter_scheduler
+from nova.scheduler import host_state_journal
+
+caching_scheduler_opts = [
+    cfg.StrOpt('scheduler_cache_journal_path',
+               help='Path of a file through which all the caching scheduler '
+                    'workers of a node share the resources they consume on '
+                    'hosts, so that a host chosen by one worker is seen as '
+                    'used by the others before their next refresh. By '
+                    'default each worker only accounts for its own choices.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(caching_scheduler_opts)
+CONF.import_opt('scheduler_driver_task_period', 'nova.scheduler.manager')
 
 
 class CachingScheduler(filter_scheduler.FilterScheduler):
@@ -44,6 +60,8 @@ class CachingScheduler(filter_scheduler.FilterScheduler):
     copy of the cache. So if you run multiple schedulers, you will get
     more retries, because the data stored on any additional scheduler will
     be more out of date, than if it was fetched from the database.
+    Schedulers running on the same node can share the resources they
+    consume through a journal file, see scheduler_cache_journal_path.
 
     In a similar way, if you have a high number of server deletes, the
     extra capacity from those deletes will not show up until the cache is
@@ -53,6 +71,13 @@ class CachingScheduler(filter_scheduler.FilterScheduler):
     def __init__(self, *args, **kwargs):
         super(CachingScheduler, self).__init__(*args, **kwargs)
         self.all_host_states = None
+        self.journal = None
+        if CONF.scheduler_cache_journal_path:
+            # Entries older than a couple of refreshes are already accounted
+            # for in the database.
+            self.journal = host_state_journal.HostStateJournal(
+                    CONF.scheduler_cache_journal_path,
+                    max_age=2 * CONF.scheduler_driver_task_period)
 
     def run_periodic_tasks(self, context):
         """Called from a periodic tasks in the manager."""
@@ -69,9 +94,20 @@ class CachingScheduler(filter_scheduler.FilterScheduler):
             # comes in before the first run of the periodic task.
             # Rather than raise an error, we fetch the list of hosts.
             self.all_host_states = self._get_up_hosts(context)
+        elif self.journal:
+            self.journal.replay(self.all_host_states)
 
         return self.all_host_states
 
     def _get_up_hosts(self, context):
         all_hosts_iterator = self.host_manager.get_all_host_states(context)
-        return list(all_hosts_iterator)
+        all_hosts = list(all_hosts_iterator)
+        if self.journal:
+            self.journal.reset(all_hosts)
+        return all_hosts
+
+    def _consume_from_instance(self, host_state, instance_properties):
+        super(CachingScheduler, self)._consume_from_instance(
+                host_state, instance_properties)
+        if self.journal:
+            self.journal.record(host_state, instance_properties)
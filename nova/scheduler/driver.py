@@ -111,9 +111,10 @@ class Scheduler(object):
         """Return the list of hosts that have a running service for topic."""
 
         services = db.service_get_all_by_topic(context, topic)
+        up_hosts = self.servicegroup_api.get_all_up(topic)
         return [service['host']
                 for service in services
-                if self.servicegroup_api.service_is_up(service)]
+                if service['host'] in up_hosts]
 
     # NOTE(alaski): Remove this method when the scheduler rpc interface is
     # bumped to 4.x as it is no longer used.
@@ -19,6 +19,7 @@ You can customize this scheduler by specifying your own Host Filters and
 Weighing Functions.
 """
 
+import heapq
 import random
 
 from oslo.config import cfg
@@ -47,7 +48,16 @@ filter_scheduler_opts = [
                     'chosen from. A value of 1 chooses the '
                     'first host returned by the weighing functions. '
                     'This value must be at least 1. Any value less than 1 '
-                    'will be ignored, and 1 will be used instead')
+                    'will be ignored, and 1 will be used instead'),
+    cfg.BoolOpt('scheduler_batch_placement',
+                default=False,
+                help='Place all the instances of a multi-instance request '
+                     'from a single filtering and weighing pass. Only the '
+                     'host chosen for an instance is filtered and weighed '
+                     'again before placing the next one, so the weights of '
+                     'the other hosts keep the normalization of the first '
+                     'pass. Requests using server groups are always placed '
+                     'one instance at a time'),
 ]
 
 CONF.register_opts(filter_scheduler_opts)
@@ -270,6 +280,12 @@ class FilterScheduler(driver.Scheduler):
             num_instances = len(instance_uuids)
         else:
             num_instances = request_spec.get('num_instances', 1)
+
+        if (CONF.scheduler_batch_placement and num_instances > 1 and
+                not update_group_hosts):
+            return self._schedule_batch(hosts, filter_properties,
+                                        instance_properties, num_instances)
+
         for num in xrange(num_instances):
             # Filter local hosts based on requirements ...
             hosts = self.host_manager.get_filtered_hosts(hosts,
@@ -285,11 +301,8 @@ class FilterScheduler(driver.Scheduler):
 
             LOG.debug("Weighed %(hosts)s", {'hosts': weighed_hosts})
 
-            scheduler_host_subset_size = CONF.scheduler_host_subset_size
-            if scheduler_host_subset_size > len(weighed_hosts):
-                scheduler_host_subset_size = len(weighed_hosts)
-            if scheduler_host_subset_size < 1:
-                scheduler_host_subset_size = 1
+            scheduler_host_subset_size = self._get_host_subset_size(
+                    len(weighed_hosts))
 
             chosen_host = random.choice(
                 weighed_hosts[0:scheduler_host_subset_size])
@@ -297,21 +310,96 @@ class FilterScheduler(driver.Scheduler):
 
             # Now consume the resources so the filter/weights
             # will change for the next instance.
-            # NOTE (baoli) adding and deleting pci_requests is a temporary
-            # fix to avoid DB access in consume_from_instance() while getting
-            # pci_requests. The change can be removed once pci_requests is
-            # part of the instance object that is passed into the scheduler
-            # APIs
-            pci_requests = filter_properties.get('pci_requests')
-            if pci_requests:
-                instance_properties['pci_requests'] = pci_requests
-            chosen_host.obj.consume_from_instance(instance_properties)
-            if pci_requests:
-                del instance_properties['pci_requests']
-            if update_group_hosts is True:
-                filter_properties['group_hosts'].add(chosen_host.obj.host)
+            self._consume_chosen_host(chosen_host, filter_properties,
+                                      instance_properties, update_group_hosts)
+        return selected_hosts
+
+    def _schedule_batch(self, hosts, filter_properties, instance_properties,
+                        num_instances):
+        """Returns a list of hosts for num_instances instances, filtering
+        and weighing all hosts only once.
+
+        The weighed hosts are kept in a heap. Once a host has been chosen
+        and has consumed the resources of an instance, only that host is
+        filtered and weighed again before it goes back in the heap.
+        """
+        hosts = self.host_manager.get_filtered_hosts(hosts,
+                filter_properties, index=0)
+        if not hosts:
+            return []
+
+        LOG.debug("Filtered %(hosts)s", {'hosts': hosts})
+
+        weighers = self.host_manager.get_weighers()
+        weighed_hosts = self.host_manager.weigh_hosts(weighers, hosts,
+                filter_properties)
+
+        LOG.debug("Weighed %(hosts)s", {'hosts': weighed_hosts})
+
+        # The position breaks ties between equal weights, keeping the
+        # order of the weighed hosts and never comparing two hosts
+        heap = [(-weighed_host.weight, i, weighed_host)
+                for i, weighed_host in enumerate(weighed_hosts)]
+        heapq.heapify(heap)
+        position = len(heap)
+
+        selected_hosts = []
+        for num in xrange(num_instances):
+            if not heap:
+                break
+            subset = [heapq.heappop(heap) for i in
+                      xrange(self._get_host_subset_size(len(heap)))]
+            entry = random.choice(subset)
+            for other in subset:
+                if other is not entry:
+                    heapq.heappush(heap, other)
+
+            chosen_host = entry[2]
+            selected_hosts.append(chosen_host)
+            self._consume_chosen_host(chosen_host, filter_properties,
+                                      instance_properties, False)
+
+            if num + 1 == num_instances:
+                break
+            if self.host_manager.get_filtered_hosts([chosen_host.obj],
+                    filter_properties, index=num + 1):
+                self.host_manager.reweigh_host(weighers, chosen_host,
+                                               filter_properties)
+                position += 1
+                heapq.heappush(heap,
+                               (-chosen_host.weight, position, chosen_host))
         return selected_hosts
 
+    def _get_host_subset_size(self, num_hosts):
+        """Return the number of best hosts to choose a host from."""
+        scheduler_host_subset_size = CONF.scheduler_host_subset_size
+        if scheduler_host_subset_size > num_hosts:
+            scheduler_host_subset_size = num_hosts
+        if scheduler_host_subset_size < 1:
+            scheduler_host_subset_size = 1
+        return scheduler_host_subset_size
+
+    def _consume_chosen_host(self, chosen_host, filter_properties,
+                             instance_properties, update_group_hosts):
+        """Consume the resources of an instance on the chosen host."""
+        # NOTE (baoli) adding and deleting pci_requests is a temporary
+        # fix to avoid DB access in consume_from_instance() while getting
+        # pci_requests. The change can be removed once pci_requests is
+        # part of the instance object that is passed into the scheduler
+        # APIs
+        pci_requests = filter_properties.get('pci_requests')
+        if pci_requests:
+            instance_properties['pci_requests'] = pci_requests
+        self._consume_from_instance(chosen_host.obj, instance_properties)
+        if pci_requests:
+            del instance_properties['pci_requests']
+        if update_group_hosts is True:
+            filter_properties['group_hosts'].add(chosen_host.obj.host)
+
     def _get_all_host_states(self, context):
         """Template method, so a subclass can implement caching."""
         return self.host_manager.get_all_host_states(context)
+
+    def _consume_from_instance(self, host_state, instance_properties):
+        """Template method, so a subclass can share consumed resources."""
+        host_state.consume_from_instance(instance_properties)
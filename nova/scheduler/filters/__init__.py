@@ -32,6 +32,14 @@ class BaseHostFilter(filters.BaseFilter):
         """
         raise NotImplementedError()
 
+    def filter_from_index(self, host_index, filter_properties):
+        """Return the set of HostStates passing the filter, as computed from
+        the HostIndex, or None if the filter can not be answered from the
+        index and host_passes() needs to run instead.
+        Override this in a subclass.
+        """
+        return None
+
 
 class HostFilterHandler(filters.BaseFilterHandler):
     def __init__(self):
@@ -31,6 +31,39 @@ class AggregateInstanceExtraSpecsFilter(filters.BaseHostFilter):
     # Aggregate data and instance type does not change within a request
     run_filter_once_per_request = True
 
+    @staticmethod
+    def _extra_specs(instance_type):
+        """Yield the (key, requirement) pairs to match against aggregates."""
+        for key, req in instance_type['extra_specs'].iteritems():
+            # Either not scope format, or aggregate_instance_extra_specs scope
+            scope = key.split(':', 1)
+            if len(scope) > 1:
+                if scope[0] != _SCOPE:
+                    continue
+                else:
+                    del scope[0]
+            yield scope[0], req
+
+    def filter_from_index(self, host_index, filter_properties):
+        instance_type = filter_properties.get('instance_type')
+        if 'extra_specs' not in instance_type:
+            return set(host_index.host_states)
+
+        host_names = None
+        for key, req in self._extra_specs(instance_type):
+            matching = set()
+            values = host_index.aggregate_metadata_values(key)
+            for aggregate_val, hosts in values.iteritems():
+                if extra_specs_ops.match(aggregate_val, req):
+                    matching |= hosts
+            if host_names is None:
+                host_names = matching
+            else:
+                host_names &= matching
+        if host_names is None:
+            return set(host_index.host_states)
+        return host_index.select(host_names)
+
     def host_passes(self, host_state, filter_properties):
         """Return a list of hosts that can create instance_type
 
@@ -44,15 +77,7 @@ class AggregateInstanceExtraSpecsFilter(filters.BaseHostFilter):
         context = filter_properties['context']
         metadata = db.aggregate_metadata_get_by_host(context, host_state.host)
 
-        for key, req in instance_type['extra_specs'].iteritems():
-            # Either not scope format, or aggregate_instance_extra_specs scope
-            scope = key.split(':', 1)
-            if len(scope) > 1:
-                if scope[0] != _SCOPE:
-                    continue
-                else:
-                    del scope[0]
-            key = scope[0]
+        for key, req in self._extra_specs(instance_type):
             aggregate_vals = metadata.get(key, None)
             if not aggregate_vals:
                 LOG.debug("%(host_state)s fails instance_type extra_specs "
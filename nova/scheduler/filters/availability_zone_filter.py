@@ -36,10 +36,33 @@ class AvailabilityZoneFilter(filters.BaseHostFilter):
     # Availability zones do not change within a request
     run_filter_once_per_request = True
 
-    def host_passes(self, host_state, filter_properties):
+    def _requested_availability_zone(self, filter_properties):
         spec = filter_properties.get('request_spec', {})
         props = spec.get('instance_properties', {})
-        availability_zone = props.get('availability_zone')
+        return props.get('availability_zone')
+
+    def filter_from_index(self, host_index, filter_properties):
+        availability_zone = self._requested_availability_zone(
+                filter_properties)
+        if not availability_zone:
+            return set(host_index.host_states)
+
+        az_hosts = host_index.hosts_with_aggregate_metadata(
+                'availability_zone', availability_zone)
+        if availability_zone != CONF.default_availability_zone:
+            return host_index.select(az_hosts)
+
+        # Hosts outside of any availability zone aggregate are in the
+        # default availability zone.
+        zoned_hosts = host_index.hosts_with_aggregate_metadata(
+                'availability_zone')
+        return set(host_state for host_state in host_index.host_states
+                   if (host_state.host in az_hosts or
+                       host_state.host not in zoned_hosts))
+
+    def host_passes(self, host_state, filter_properties):
+        availability_zone = self._requested_availability_zone(
+                filter_properties)
 
         if not availability_zone:
             return True
@@ -30,13 +30,9 @@ class ComputeCapabilitiesFilter(filters.BaseHostFilter):
     # Instance type and host capabilities do not change within a request
     run_filter_once_per_request = True
 
-    def _satisfies_extra_specs(self, host_state, instance_type):
-        """Check that the host_state provided by the compute service
-        satisfy the extra specs associated with the instance type.
-        """
-        if 'extra_specs' not in instance_type:
-            return True
-
+    @staticmethod
+    def _capability_scopes(instance_type):
+        """Yield the (scope, requirement) pairs to match against hosts."""
         for key, req in instance_type['extra_specs'].iteritems():
             # Either not scope format, or in capabilities scope
             scope = key.split(':')
@@ -45,32 +41,69 @@ class ComputeCapabilitiesFilter(filters.BaseHostFilter):
                     continue
                 else:
                     del scope[0]
-            cap = host_state
-            for index in range(0, len(scope)):
-                try:
-                    if isinstance(cap, six.string_types):
-                        try:
-                            cap = jsonutils.loads(cap)
-                        except ValueError:
-                            return False
-                    if not isinstance(cap, dict):
-                        if getattr(cap, scope[index], None) is None:
-                            # If can't find, check stats dict
-                            cap = cap.stats.get(scope[index], None)
-                        else:
-                            cap = getattr(cap, scope[index], None)
+            yield scope, req
+
+    def _get_capability(self, host_state, scope):
+        """Return the capability of host_state at scope, or None."""
+        cap = host_state
+        for index in range(0, len(scope)):
+            try:
+                if isinstance(cap, six.string_types):
+                    try:
+                        cap = jsonutils.loads(cap)
+                    except ValueError:
+                        return None
+                if not isinstance(cap, dict):
+                    if getattr(cap, scope[index], None) is None:
+                        # If can't find, check stats dict
+                        cap = cap.stats.get(scope[index], None)
                     else:
-                        cap = cap.get(scope[index], None)
-                except AttributeError:
-                    return False
-                if cap is None:
-                    return False
+                        cap = getattr(cap, scope[index], None)
+                else:
+                    cap = cap.get(scope[index], None)
+            except AttributeError:
+                return None
+            if cap is None:
+                return None
+        return cap
+
+    def _satisfies_extra_specs(self, host_state, instance_type):
+        """Check that the host_state provided by the compute service
+        satisfy the extra specs associated with the instance type.
+        """
+        if 'extra_specs' not in instance_type:
+            return True
+
+        for scope, req in self._capability_scopes(instance_type):
+            cap = self._get_capability(host_state, scope)
+            if cap is None:
+                return False
             if not extra_specs_ops.match(str(cap), req):
                 LOG.debug("extra_spec requirement '%(req)s' does not match "
                     "'%(cap)s'", {'req': req, 'cap': cap})
                 return False
         return True
 
+    def filter_from_index(self, host_index, filter_properties):
+        instance_type = filter_properties.get('instance_type')
+        passing = set(host_index.host_states)
+        if 'extra_specs' not in instance_type:
+            return passing
+
+        for scope, req in self._capability_scopes(instance_type):
+            def _capability(host_state):
+                cap = self._get_capability(host_state, scope)
+                return None if cap is None else str(cap)
+
+            caps = host_index.hosts_by_value(
+                    'capabilities:%s' % ':'.join(scope), _capability)
+            matching = set()
+            for cap, host_states in caps.iteritems():
+                if cap is not None and extra_specs_ops.match(cap, req):
+                    matching.update(host_states)
+            passing &= matching
+        return passing
+
     def host_passes(self, host_state, filter_properties):
         """Return a list of hosts that can create instance_type."""
         instance_type = filter_properties.get('instance_type')
@@ -21,6 +21,7 @@ from nova.scheduler import filters
 from nova import servicegroup
 
 CONF = cfg.CONF
+CONF.import_opt('compute_topic', 'nova.compute.rpcapi')
 
 LOG = logging.getLogger(__name__)
 
@@ -34,8 +35,7 @@ class ComputeFilter(filters.BaseHostFilter):
     # Host state does not change within a request
     run_filter_once_per_request = True
 
-    def host_passes(self, host_state, filter_properties):
-        """Returns True for only active compute nodes."""
+    def _service_passes(self, host_state, service_is_up):
         service = host_state.service
         if service['disabled']:
             LOG.debug("%(host_state)s is disabled, reason: %(reason)s",
@@ -43,8 +43,23 @@ class ComputeFilter(filters.BaseHostFilter):
                        'reason': service.get('disabled_reason')})
             return False
         else:
-            if not self.servicegroup_api.service_is_up(service):
+            if not service_is_up(service):
                 LOG.warn(_LW("%(host_state)s has not been heard from in a "
                              "while"), {'host_state': host_state})
                 return False
         return True
+
+    def host_passes(self, host_state, filter_properties):
+        """Returns True for only active compute nodes."""
+        return self._service_passes(host_state,
+                                    self.servicegroup_api.service_is_up)
+
+    def filter_from_index(self, host_index, filter_properties):
+        """Returns the active compute nodes, asking the servicegroup for
+        the services up of all of them at once.
+        """
+        up_hosts = self.servicegroup_api.get_all_up(CONF.compute_topic)
+        return set(host_state for host_state in host_index.host_states
+                   if self._service_passes(
+                           host_state,
+                           lambda service: service['host'] in up_hosts))
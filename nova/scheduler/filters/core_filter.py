@@ -73,6 +73,42 @@ class BaseCoreFilter(filters.BaseHostFilter):
 
         return True
 
+    def _get_cpu_allocation_ratios(self, host_index, filter_properties):
+        return host_index.column_from(
+                lambda host_state: self._get_cpu_allocation_ratio(
+                        host_state, filter_properties))
+
+    def filter_from_index(self, host_index, filter_properties):
+        """Evaluate host_passes() over all hosts at once."""
+        instance_type = filter_properties.get('instance_type')
+        if not instance_type:
+            return set(host_index.host_states)
+
+        vcpus_total = host_index.column('vcpus_total')
+        if vcpus_total is None:
+            return None
+
+        vcpus_unset = vcpus_total == 0
+        if vcpus_unset.any():
+            # Fail safe
+            LOG.warning(_LW("VCPUs not set; assuming CPU collection broken"))
+
+        instance_vcpus = instance_type['vcpus']
+        cpu_allocation_ratio = self._get_cpu_allocation_ratios(
+                host_index, filter_properties)
+        vcpus_limit = vcpus_total * cpu_allocation_ratio
+
+        # Only provide a VCPU limit to compute if the virt driver is reporting
+        # an accurate count of installed VCPUs. (XenServer driver does not)
+        has_limit = vcpus_limit > 0
+        for host_state, limit in zip(host_index.select_from_mask(has_limit),
+                                     vcpus_limit[has_limit]):
+            host_state.limits['vcpu'] = float(limit)
+
+        free_vcpus = vcpus_limit - host_index.column('vcpus_used')
+        passes = vcpus_unset | (free_vcpus >= instance_vcpus)
+        return set(host_index.select_from_mask(passes))
+
 
 class CoreFilter(BaseCoreFilter):
     """CoreFilter filters based on CPU core utilization."""
@@ -80,6 +116,9 @@ class CoreFilter(BaseCoreFilter):
     def _get_cpu_allocation_ratio(self, host_state, filter_properties):
         return CONF.cpu_allocation_ratio
 
+    def _get_cpu_allocation_ratios(self, host_index, filter_properties):
+        return CONF.cpu_allocation_ratio
+
 
 class AggregateCoreFilter(BaseCoreFilter):
     """AggregateCoreFilter with per-aggregate CPU subscription flag.
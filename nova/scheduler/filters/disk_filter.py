@@ -35,6 +35,9 @@ class DiskFilter(filters.BaseHostFilter):
     def _get_disk_allocation_ratio(self, host_state, filter_properties):
         return CONF.disk_allocation_ratio
 
+    def _get_disk_allocation_ratios(self, host_index, filter_properties):
+        return CONF.disk_allocation_ratio
+
     def host_passes(self, host_state, filter_properties):
         """Filter based on disk usage."""
         instance_type = filter_properties.get('instance_type')
@@ -64,6 +67,31 @@ class DiskFilter(filters.BaseHostFilter):
         host_state.limits['disk_gb'] = disk_gb_limit
         return True
 
+    def filter_from_index(self, host_index, filter_properties):
+        """Evaluate host_passes() over all hosts at once."""
+        free_disk_mb = host_index.column('free_disk_mb')
+        if free_disk_mb is None:
+            return None
+        instance_type = filter_properties.get('instance_type')
+        requested_disk = (1024 * (instance_type['root_gb'] +
+                                 instance_type['ephemeral_gb']) +
+                         instance_type['swap'])
+
+        total_usable_disk_mb = host_index.column('total_usable_disk_gb') * 1024
+
+        disk_allocation_ratio = self._get_disk_allocation_ratios(
+            host_index, filter_properties)
+
+        disk_mb_limit = total_usable_disk_mb * disk_allocation_ratio
+        used_disk_mb = total_usable_disk_mb - free_disk_mb
+        usable_disk_mb = disk_mb_limit - used_disk_mb
+        passes = usable_disk_mb >= requested_disk
+
+        passing = host_index.select_from_mask(passes)
+        for host_state, limit in zip(passing, disk_mb_limit[passes] / 1024):
+            host_state.limits['disk_gb'] = float(limit)
+        return set(passing)
+
 
 class AggregateDiskFilter(DiskFilter):
     """AggregateDiskFilter with per-aggregate disk allocation ratio flag.
@@ -88,3 +116,8 @@ class AggregateDiskFilter(DiskFilter):
             ratio = CONF.disk_allocation_ratio
 
         return ratio
+
+    def _get_disk_allocation_ratios(self, host_index, filter_properties):
+        return host_index.column_from(
+                lambda host_state: self._get_disk_allocation_ratio(
+                        host_state, filter_properties))
@@ -39,6 +39,9 @@ class IoOpsFilter(filters.BaseHostFilter):
     def _get_max_io_ops_per_host(self, host_state, filter_properties):
         return CONF.max_io_ops_per_host
 
+    def _get_max_io_ops_per_hosts(self, host_index, filter_properties):
+        return CONF.max_io_ops_per_host
+
     def host_passes(self, host_state, filter_properties):
         """Use information about current vm and task states collected from
         compute node statistics to decide whether to filter.
@@ -54,6 +57,16 @@ class IoOpsFilter(filters.BaseHostFilter):
                          'max_io_ops': max_io_ops})
         return passes
 
+    def filter_from_index(self, host_index, filter_properties):
+        """Evaluate host_passes() over all hosts at once."""
+        num_io_ops = host_index.column('num_io_ops')
+        if num_io_ops is None:
+            return None
+        max_io_ops = self._get_max_io_ops_per_hosts(
+            host_index, filter_properties)
+        passes = num_io_ops < max_io_ops
+        return set(host_index.select_from_mask(passes))
+
 
 class AggregateIoOpsFilter(IoOpsFilter):
     """AggregateIoOpsFilter with per-aggregate the max io operations.
@@ -77,3 +90,8 @@ class AggregateIoOpsFilter(IoOpsFilter):
             value = CONF.max_io_ops_per_host
 
         return value
+
+    def _get_max_io_ops_per_hosts(self, host_index, filter_properties):
+        return host_index.column_from(
+                lambda host_state: self._get_max_io_ops_per_host(
+                        host_state, filter_properties))
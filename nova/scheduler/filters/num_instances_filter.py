@@ -36,6 +36,9 @@ class NumInstancesFilter(filters.BaseHostFilter):
     def _get_max_instances_per_host(self, host_state, filter_properties):
         return CONF.max_instances_per_host
 
+    def _get_max_instances_per_hosts(self, host_index, filter_properties):
+        return CONF.max_instances_per_host
+
     def host_passes(self, host_state, filter_properties):
         num_instances = host_state.num_instances
         max_instances = self._get_max_instances_per_host(
@@ -48,6 +51,16 @@ class NumInstancesFilter(filters.BaseHostFilter):
                          'max_instances': max_instances})
         return passes
 
+    def filter_from_index(self, host_index, filter_properties):
+        """Evaluate host_passes() over all hosts at once."""
+        num_instances = host_index.column('num_instances')
+        if num_instances is None:
+            return None
+        max_instances = self._get_max_instances_per_hosts(
+            host_index, filter_properties)
+        passes = num_instances < max_instances
+        return set(host_index.select_from_mask(passes))
+
 
 class AggregateNumInstancesFilter(NumInstancesFilter):
     """AggregateNumInstancesFilter with per-aggregate the max num instances.
@@ -72,3 +85,8 @@ class AggregateNumInstancesFilter(NumInstancesFilter):
             value = CONF.max_instances_per_host
 
         return value
+
+    def _get_max_instances_per_hosts(self, host_index, filter_properties):
+        return host_index.column_from(
+                lambda host_state: self._get_max_instances_per_host(
+                        host_state, filter_properties))
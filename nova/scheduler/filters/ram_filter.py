@@ -64,6 +64,33 @@ class BaseRamFilter(filters.BaseHostFilter):
         host_state.limits['memory_mb'] = memory_mb_limit
         return True
 
+    def _get_ram_allocation_ratios(self, host_index, filter_properties):
+        return host_index.column_from(
+                lambda host_state: self._get_ram_allocation_ratio(
+                        host_state, filter_properties))
+
+    def filter_from_index(self, host_index, filter_properties):
+        """Evaluate host_passes() over all hosts at once."""
+        free_ram_mb = host_index.column('free_ram_mb')
+        if free_ram_mb is None:
+            return None
+        instance_type = filter_properties.get('instance_type')
+        requested_ram = instance_type['memory_mb']
+        total_usable_ram_mb = host_index.column('total_usable_ram_mb')
+
+        ram_allocation_ratio = self._get_ram_allocation_ratios(
+                host_index, filter_properties)
+
+        memory_mb_limit = total_usable_ram_mb * ram_allocation_ratio
+        used_ram_mb = total_usable_ram_mb - free_ram_mb
+        usable_ram = memory_mb_limit - used_ram_mb
+        passes = usable_ram >= requested_ram
+
+        passing = host_index.select_from_mask(passes)
+        for host_state, limit in zip(passing, memory_mb_limit[passes]):
+            host_state.limits['memory_mb'] = float(limit)
+        return set(passing)
+
 
 class RamFilter(BaseRamFilter):
     """Ram Filter with over subscription flag."""
@@ -72,6 +99,9 @@ class RamFilter(BaseRamFilter):
     def _get_ram_allocation_ratio(self, host_state, filter_properties):
         return self.ram_allocation_ratio
 
+    def _get_ram_allocation_ratios(self, host_index, filter_properties):
+        return self.ram_allocation_ratio
+
 
 class AggregateRamFilter(BaseRamFilter):
     """AggregateRamFilter with per-aggregate ram subscription flag.
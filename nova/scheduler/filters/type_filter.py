@@ -39,6 +39,14 @@ class TypeAffinityFilter(filters.BaseHostFilter):
                      context, host_state.host, instance_type['id'])
         return len(instances_other_type) == 0
 
+    def filter_from_index(self, host_index, filter_properties):
+        instance_type = filter_properties.get('instance_type')
+        context = filter_properties['context'].elevated()
+        other_type_hosts = set(db.instance_get_hosts_by_not_type(
+                context, instance_type['id']))
+        return set(host_state for host_state in host_index.host_states
+                   if host_state.host not in other_type_hosts)
+
 
 class AggregateTypeAffinityFilter(filters.BaseHostFilter):
     """AggregateTypeAffinityFilter limits instance_type by aggregate
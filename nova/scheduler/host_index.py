@@ -0,0 +1,116 @@
+# Copyright (c) 2015 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Inverted indexes over host states, used to pre-filter hosts.
+"""
+
+import collections
+
+from nova import db
+from nova.openstack.common import importutils
+
+numpy = importutils.try_import('numpy')
+
+
+class HostIndex(object):
+    """Inverted indexes over a list of HostStates.
+
+    Each index is built on first use with a single DB query or a single
+    pass over the host states, so that filters implementing
+    filter_from_index() can answer a request without a per-host lookup.
+
+    When numpy is available, numeric host state fields are also exposed as
+    columns, in host_states order, so that resource filters can evaluate
+    all hosts with a single array expression.
+    """
+
+    def __init__(self, context, host_states):
+        self.context = context
+        self.host_states = list(host_states)
+        self._aggregate_metadata = None
+        self._values = {}
+        self._columns = {}
+
+    def _build_aggregate_metadata(self):
+        metadata = collections.defaultdict(
+                lambda: collections.defaultdict(set))
+        for aggregate in db.aggregate_get_all(self.context):
+            for key, value in aggregate.metadetails.iteritems():
+                metadata[key][value].update(aggregate.hosts)
+        self._aggregate_metadata = metadata
+
+    def aggregate_metadata_values(self, key):
+        """Return a dict mapping each aggregate metadata value of key to the
+        set of host names in aggregates having that value.
+        """
+        if self._aggregate_metadata is None:
+            self._build_aggregate_metadata()
+        return self._aggregate_metadata.get(key, {})
+
+    def hosts_with_aggregate_metadata(self, key, value=None):
+        """Return the set of host names in aggregates having the metadata
+        key, optionally restricted to the given value.
+        """
+        values = self.aggregate_metadata_values(key)
+        if value is not None:
+            return values.get(value, set())
+        hosts = set()
+        for value_hosts in values.itervalues():
+            hosts |= value_hosts
+        return hosts
+
+    def hosts_by_value(self, name, value_func):
+        """Return a dict mapping each value returned by value_func to the
+        list of host states it was returned for.
+
+        Results are cached under name for the life of the index.
+        """
+        if name not in self._values:
+            values = collections.defaultdict(list)
+            for host_state in self.host_states:
+                values[value_func(host_state)].append(host_state)
+            self._values[name] = dict(values)
+        return self._values[name]
+
+    def column(self, name):
+        """Return an array of the name field of each host state, in
+        host_states order, or None if numpy is not available.
+        """
+        if numpy is None:
+            return None
+        if name not in self._columns:
+            self._columns[name] = self.column_from(
+                    lambda host_state: getattr(host_state, name))
+        return self._columns[name]
+
+    def column_from(self, value_func):
+        """Return an array of value_func(host_state) for each host state, in
+        host_states order, or None if numpy is not available.
+        """
+        if numpy is None:
+            return None
+        return numpy.fromiter((value_func(host_state)
+                               for host_state in self.host_states),
+                              dtype=float, count=len(self.host_states))
+
+    def select_from_mask(self, mask):
+        """Return the list of host states for which mask is True."""
+        return [self.host_states[i] for i in mask.nonzero()[0]]
+
+    def select(self, host_names):
+        """Return the set of host states whose host is in host_names."""
+        return set(host_state for host_state in self.host_states
+                   if host_state.host in host_names)
@@ -32,6 +32,7 @@ from nova.openstack.common import log as logging
 from nova.openstack.common import timeutils
 from nova.pci import pci_stats
 from nova.scheduler import filters
+from nova.scheduler import host_index
 from nova.scheduler import weights
 from nova.virt import hardware
 
@@ -58,6 +59,20 @@ host_manager_opts = [
     cfg.ListOpt('scheduler_weight_classes',
                 default=['nova.scheduler.weights.all_weighers'],
                 help='Which weight class names to use for weighing hosts'),
+    cfg.IntOpt('scheduler_host_state_full_refresh_interval',
+               default=0,
+               help='Number of seconds between full reloads of the compute '
+                    'node table by the scheduler host manager. In between, '
+                    'only compute nodes updated since the previous load are '
+                    'fetched, and compute nodes that were deleted are only '
+                    'noticed at the next full reload. 0 reloads every '
+                    'compute node for each scheduling request.'),
+    cfg.BoolOpt('scheduler_use_host_index',
+                default=False,
+                help='Whether filters able to do so are answered from '
+                     'inverted indexes over all hosts, built with a single '
+                     'query, before the remaining filters are run host by '
+                     'host.'),
     ]
 
 CONF = cfg.CONF
@@ -274,6 +289,10 @@ class HostManager(object):
 
     def __init__(self):
         self.host_state_map = {}
+        # Newest compute node timestamp seen so far and time of the last
+        # full reload, used for incremental refreshes of host_state_map.
+        self._nodes_updated_since = None
+        self._last_full_refresh = None
         self.filter_handler = filters.HostFilterHandler()
         self.filter_classes = self.filter_handler.get_matching_classes(
                 CONF.scheduler_available_filters)
@@ -375,23 +394,113 @@ class HostManager(object):
                     return name_to_cls_map.values()
             hosts = name_to_cls_map.itervalues()
 
+        if CONF.scheduler_use_host_index:
+            hosts, filter_classes = self._filter_hosts_from_index(
+                    hosts, filter_properties, filter_classes, index)
+
         return self.filter_handler.get_filtered_objects(filter_classes,
                 hosts, filter_properties, index)
 
+    def _filter_hosts_from_index(self, hosts, filter_properties,
+                                 filter_classes, index):
+        """Run the filters which can be answered from a HostIndex.
+
+        Returns the hosts passing those filters and the filter classes
+        which still have to be run host by host.
+        """
+        hosts = list(hosts)
+        index_obj = None
+        remaining_classes = []
+        for filter_cls in filter_classes:
+            filter_obj = filter_cls()
+            if not hosts or not filter_obj.run_filter_for_index(index):
+                remaining_classes.append(filter_cls)
+                continue
+            if index_obj is None:
+                index_obj = host_index.HostIndex(filter_properties['context'],
+                                                 hosts)
+            passing = filter_obj.filter_from_index(index_obj,
+                                                   filter_properties)
+            if passing is None:
+                remaining_classes.append(filter_cls)
+                continue
+            hosts = [host for host in hosts if host in passing]
+            LOG.debug("Filter %(cls_name)s returned %(obj_len)d host(s) "
+                      "from index",
+                      {'cls_name': filter_cls.__name__,
+                       'obj_len': len(hosts)})
+        return hosts, remaining_classes
+
     def get_weighed_hosts(self, hosts, weight_properties):
         """Weigh the hosts."""
         return self.weight_handler.get_weighed_objects(self.weight_classes,
                 hosts, weight_properties)
 
+    def get_weighers(self):
+        """Return new instances of the weighers used to weigh hosts."""
+        return [weigher_cls() for weigher_cls in self.weight_classes]
+
+    def weigh_hosts(self, weighers, hosts, weight_properties):
+        """Weigh the hosts with the given weighers, which keep the
+        normalization bounds for reweigh_host().
+        """
+        return self.weight_handler.weigh_objects(weighers, hosts,
+                                                 weight_properties)
+
+    def reweigh_host(self, weighers, weighed_host, weight_properties):
+        """Update the weight of a single host weighed by weigh_hosts()."""
+        self.weight_handler.reweigh_object(weighers, weighed_host,
+                                           weight_properties)
+
+    def _needs_full_refresh(self):
+        interval = CONF.scheduler_host_state_full_refresh_interval
+        if interval <= 0:
+            return True
+        if (self._last_full_refresh is None or
+                self._nodes_updated_since is None):
+            return True
+        return timeutils.is_older_than(self._last_full_refresh, interval)
+
+    def _update_services(self, context):
+        """Refresh the service of every known host state.
+
+        Used by incremental refreshes, which do not return the compute nodes
+        whose service record has changed (e.g. disabled or heartbeat).
+        """
+        services = dict((service['host'], service)
+                        for service in db.service_get_all(context)
+                        if service['binary'] == 'nova-compute')
+        for state_key, host_state in self.host_state_map.items():
+            service = services.get(host_state.host)
+            if not service:
+                host, node = state_key
+                LOG.info(_("Removing compute node %(host)s:%(node)s without "
+                           "a service from scheduler") %
+                         {'host': host, 'node': node})
+                del self.host_state_map[state_key]
+                continue
+            host_state.update_service(dict(service.iteritems()))
+
     def get_all_host_states(self, context):
         """Returns a list of HostStates that represents all the hosts
         the HostManager knows about. Also, each of the consumable resources
         in HostState are pre-populated and adjusted based on data in the db.
+
+        If scheduler_host_state_full_refresh_interval is set, only the
+        compute nodes updated since the previous call are fetched in between
+        full reloads.
         """
 
+        full_refresh = self._needs_full_refresh()
+
         # Get resource usage across the available compute nodes:
-        compute_nodes = db.compute_node_get_all(context)
+        if full_refresh:
+            compute_nodes = db.compute_node_get_all(context)
+        else:
+            compute_nodes = db.compute_node_get_all(
+                    context, updated_since=self._nodes_updated_since)
         seen_nodes = set()
+        updated_since = None
         for compute in compute_nodes:
             service = compute['service']
             if not service:
@@ -409,12 +518,27 @@ class HostManager(object):
             host_state.update_service(dict(service.iteritems()))
             seen_nodes.add(state_key)
 
-        # remove compute nodes from host_state_map if they are not active
-        dead_nodes = set(self.host_state_map.keys()) - seen_nodes
-        for state_key in dead_nodes:
-            host, node = state_key
-            LOG.info(_("Removing dead compute node %(host)s:%(node)s "
-                       "from scheduler") % {'host': host, 'node': node})
-            del self.host_state_map[state_key]
+            changed_at = compute.get('updated_at') or compute.get('created_at')
+            if changed_at and (updated_since is None or
+                               changed_at > updated_since):
+                updated_since = changed_at
+
+        if full_refresh:
+            # remove compute nodes from host_state_map if they are not active
+            dead_nodes = set(self.host_state_map.keys()) - seen_nodes
+            for state_key in dead_nodes:
+                host, node = state_key
+                LOG.info(_("Removing dead compute node %(host)s:%(node)s "
+                           "from scheduler") % {'host': host, 'node': node})
+                del self.host_state_map[state_key]
+            self._last_full_refresh = timeutils.utcnow()
+            self._nodes_updated_since = updated_since
+        else:
+            self._update_services(context)
+            # The watermark comes from the database rather than our own
+            # clock. Rows written concurrently with this query may still be
+            # missed; the next full refresh picks them up.
+            if updated_since is not None:
+                self._nodes_updated_since = updated_since
 
         return self.host_state_map.itervalues()
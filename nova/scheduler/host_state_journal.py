@@ -0,0 +1,203 @@
+# Copyright (c) 2015 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Journal of host resource consumption shared by the scheduler workers of a node.
+"""
+
+import errno
+import os
+import uuid
+
+from nova.i18n import _LW
+from nova.openstack.common import jsonutils
+from nova.openstack.common import lockutils
+from nova.openstack.common import log as logging
+from nova.openstack.common import timeutils
+
+LOG = logging.getLogger(__name__)
+
+# Instance fields needed to replay HostState.consume_from_instance()
+_INSTANCE_FIELDS = ('root_gb', 'ephemeral_gb', 'memory_mb', 'vcpus',
+                    'vm_state', 'task_state', 'numa_topology')
+
+
+class HostStateJournal(object):
+    """Append-only file of the instances placed on hosts by each worker.
+
+    Every worker appends an entry when it consumes resources from one of its
+    cached HostStates, and replays the entries appended by the other workers
+    onto its own HostStates, so that a host chosen by one worker is seen as
+    used by all of them before their next refresh from the database.
+
+    Entries are ordered per worker by a sequence number, so that each one is
+    applied once, and are skipped for hosts whose database record is more
+    recent than the entry.
+
+    HostState.update_from_compute_node() ignores a database record older
+    than the last consumption of the host, so a refresh does not always
+    reset a HostState. The journal remembers the HostState.updated value
+    left by its last consumption of each host to tell whether the host was
+    actually reloaded from the database.
+    """
+
+    def __init__(self, path, max_age):
+        self.path = path
+        self.max_age = max_age
+        self.worker_id = uuid.uuid4().hex
+        self._seq = 0
+        self._applied = {}
+        self._db_updated = {}
+        self._consumed_updated = {}
+        self._inode = None
+        self._offset = 0
+
+    def _lock(self):
+        return lockutils.lock('scheduler-host-state-journal',
+                              lock_file_prefix='nova-', external=True,
+                              lock_path=os.path.dirname(self.path))
+
+    def record(self, host_state, instance):
+        """Append an entry for host_state consuming instance."""
+        self._seq += 1
+        entry = {'worker': self.worker_id,
+                 'seq': self._seq,
+                 'time': timeutils.strtime(),
+                 'host': host_state.host,
+                 'node': host_state.nodename,
+                 'instance': dict((key, instance[key])
+                                  for key in _INSTANCE_FIELDS
+                                  if key in instance)}
+        line = jsonutils.dumps(entry) + '\n'
+        with self._lock():
+            with open(self.path, 'a') as journal:
+                journal.write(line)
+        self._applied[self.worker_id] = self._seq
+        self._consumed_updated[(host_state.host, host_state.nodename)] = (
+                host_state.updated)
+
+    def _read_new_entries(self):
+        """Return the entries appended since the previous read, or all of
+        them if the journal has been compacted in the meantime.
+        """
+        try:
+            with open(self.path) as journal:
+                inode = os.fstat(journal.fileno()).st_ino
+                if inode != self._inode:
+                    self._inode = inode
+                    self._offset = 0
+                journal.seek(self._offset)
+                data = journal.read()
+        except IOError as e:
+            if e.errno == errno.ENOENT:
+                return []
+            raise
+
+        # Leave any partially written last line for the next read
+        end = data.rfind('\n') + 1
+        self._offset += end
+        entries = []
+        for line in data[:end].splitlines():
+            try:
+                entries.append(jsonutils.loads(line))
+            except ValueError:
+                LOG.warn(_LW("Ignoring invalid scheduler journal entry: %s"),
+                         line)
+        return entries
+
+    def _apply(self, entries, host_states, reloaded=()):
+        """Apply entries to the matching host states.
+
+        Entries already applied are skipped, except for the hosts in
+        reloaded, which have just been reloaded from the database and get
+        every entry more recent than their database record.
+        """
+        applied = dict(self._applied)
+        host_state_map = dict(((host_state.host, host_state.nodename),
+                               host_state) for host_state in host_states)
+        for entry in entries:
+            worker = entry['worker']
+            self._applied[worker] = max(entry['seq'],
+                                        self._applied.get(worker, 0))
+
+            state_key = (entry['host'], entry['node'])
+            host_state = host_state_map.get(state_key)
+            if host_state is None:
+                continue
+            if (state_key not in reloaded and
+                    entry['seq'] <= applied.get(worker, 0)):
+                continue
+            db_updated = self._db_updated.get(state_key)
+            if (db_updated is not None and
+                    timeutils.parse_strtime(entry['time']) <= db_updated):
+                continue
+            host_state.consume_from_instance(entry['instance'])
+            self._consumed_updated[state_key] = host_state.updated
+
+    def replay(self, host_states):
+        """Apply the entries not applied yet to the matching host states."""
+        self._apply(self._read_new_entries(), host_states)
+
+    def reset(self, host_states):
+        """Catch up after host_states have been refreshed from the database.
+
+        Old entries are dropped from the journal. The hosts which were
+        reloaded from the database get the remaining entries more recent
+        than their compute node record replayed, including those of this
+        worker. The other hosts still hold everything applied so far and
+        only get the entries not applied yet.
+        """
+        reloaded = set()
+        for host_state in host_states:
+            state_key = (host_state.host, host_state.nodename)
+            if (state_key in self._consumed_updated and
+                    host_state.updated == self._consumed_updated[state_key]):
+                continue
+            # NOTE: HostState.updated was set from the compute node record
+            reloaded.add(state_key)
+            self._db_updated[state_key] = host_state.updated
+            self._consumed_updated.pop(state_key, None)
+        self._inode = None
+        self._offset = 0
+        self._compact()
+        self._apply(self._read_new_entries(), host_states, reloaded)
+
+    def _compact(self):
+        """Rewrite the journal without the entries older than max_age."""
+        with self._lock():
+            try:
+                with open(self.path) as journal:
+                    lines = journal.readlines()
+            except IOError as e:
+                if e.errno == errno.ENOENT:
+                    return
+                raise
+
+            kept = []
+            for line in lines:
+                try:
+                    entry = jsonutils.loads(line)
+                except ValueError:
+                    continue
+                if not timeutils.is_older_than(entry['time'], self.max_age):
+                    kept.append(line)
+            if len(kept) == len(lines):
+                return
+
+            # Replace the file, so workers reading it notice the new inode
+            tmp_path = '%s.%s' % (self.path, self.worker_id)
+            with open(tmp_path, 'w') as journal:
+                journal.writelines(kept)
+            os.rename(tmp_path, self.path)
@@ -29,9 +29,12 @@ in the configuration file as the followings:
 from oslo.config import cfg
 
 from nova import exception
+from nova.openstack.common import importutils
 from nova.scheduler import utils
 from nova.scheduler import weights
 
+numpy = importutils.try_import('numpy')
+
 metrics_weight_opts = [
         cfg.FloatOpt('weight_multiplier',
                      default=1.0,
@@ -102,3 +105,43 @@ class MetricsWeigher(weights.BaseHostWeigher):
                         return CONF.metrics.weight_of_unavailable
 
         return value
+
+    def weigh_objects(self, weighed_obj_list, weight_properties):
+        """Weigh all hosts with a single matrix product, when numpy is
+        available.
+        """
+        if numpy is None or not weighed_obj_list or not self.setting:
+            return super(MetricsWeigher, self).weigh_objects(
+                    weighed_obj_list, weight_properties)
+
+        names = [name for (name, ratio) in self.setting]
+        ratios = numpy.array([ratio for (name, ratio) in self.setting])
+        values = numpy.empty((len(weighed_obj_list), len(names)))
+        missing = numpy.zeros(values.shape, dtype=bool)
+        for i, obj in enumerate(weighed_obj_list):
+            metrics = obj.obj.metrics
+            for j, name in enumerate(names):
+                metric = metrics.get(name)
+                if metric is None:
+                    missing[i, j] = True
+                    values[i, j] = 0.0
+                else:
+                    values[i, j] = metric.value
+
+        weights = values.dot(ratios)
+        if missing.any():
+            if CONF.metrics.required:
+                i, j = numpy.argwhere(missing)[0]
+                host_state = weighed_obj_list[i].obj
+                raise exception.ComputeHostMetricNotFound(
+                        host=host_state.host,
+                        node=host_state.nodename,
+                        name=names[j])
+            # We treat the unavailable metric as the most negative
+            # factor, unless its ratio or weight_multiplier is 0.
+            significant = ratios * self.weight_multiplier() != 0
+            unavailable = (missing & significant).any(axis=1)
+            weights[unavailable] = CONF.metrics.weight_of_unavailable
+
+        self._record_bounds(weights.min(), weights.max())
+        return weights.tolist()
@@ -22,8 +22,11 @@ number and the weighing has the opposite effect of the default.
 
 from oslo.config import cfg
 
+from nova.openstack.common import importutils
 from nova.scheduler import weights
 
+numpy = importutils.try_import('numpy')
+
 ram_weight_opts = [
         cfg.FloatOpt('ram_weight_multiplier',
                      default=1.0,
@@ -45,3 +48,14 @@ class RAMWeigher(weights.BaseHostWeigher):
     def _weigh_object(self, host_state, weight_properties):
         """Higher weights win.  We want spreading to be the default."""
         return host_state.free_ram_mb
+
+    def weigh_objects(self, weighed_obj_list, weight_properties):
+        """Weigh all hosts with a single array, when numpy is available."""
+        if numpy is None or not weighed_obj_list:
+            return super(RAMWeigher, self).weigh_objects(weighed_obj_list,
+                                                         weight_properties)
+        free_ram_mb = numpy.fromiter(
+                (obj.obj.free_ram_mb for obj in weighed_obj_list),
+                dtype=float, count=len(weighed_obj_list))
+        self._record_bounds(free_ram_mb.min(), free_ram_mb.max())
+        return free_ram_mb.tolist()
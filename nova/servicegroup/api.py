@@ -32,9 +32,16 @@ servicegroup_driver_opt = cfg.StrOpt('servicegroup_driver',
                                      help='The driver for servicegroup '
                                           'service (valid options are: '
                                           'db, zk, mc)')
+servicegroup_cache_opt = cfg.IntOpt('servicegroup_get_all_cache_time',
+                                    default=0,
+                                    help='Number of seconds for which the '
+                                         'members of a group found up are '
+                                         'cached by the db driver. 0 '
+                                         'disables the cache')
 
 CONF = cfg.CONF
 CONF.register_opt(servicegroup_driver_opt)
+CONF.register_opt(servicegroup_cache_opt)
 
 # NOTE(geekinutah): By default drivers wait 5 seconds before reporting
 INITIAL_REPORTING_DELAY = 5
@@ -130,6 +137,12 @@ class API(object):
                   'ServiceGroup', group_id)
         return self._driver.get_all(group_id)
 
+    def get_all_up(self, group_id):
+        """Returns the set of hosts whose member of the given group is up,
+        whether or not it is disabled.
+        """
+        return self._driver.get_all_up(group_id)
+
     def get_one(self, group_id):
         """Returns one member of the given group. The strategy to select
         the member is decided by the driver (e.g. random or round-robin).
@@ -157,6 +170,12 @@ class ServiceGroupDriver(object):
         """Returns ALL members of the given group."""
         raise NotImplementedError()
 
+    def get_all_up(self, group_id):
+        """Returns the set of hosts whose member of the given group is up,
+        whether or not it is disabled.
+        """
+        raise NotImplementedError()
+
     def get_one(self, group_id):
         """The default behavior of get_one is to randomly pick one from
         the result of get_all(). This is likely to be overridden in the
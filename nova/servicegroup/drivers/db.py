@@ -18,6 +18,7 @@ import six
 
 from nova import conductor
 from nova import context
+from nova import db
 from nova.i18n import _, _LE
 from nova.openstack.common import log as logging
 from nova.openstack.common import timeutils
@@ -26,6 +27,7 @@ from nova.servicegroup import api
 
 CONF = cfg.CONF
 CONF.import_opt('service_down_time', 'nova.service')
+CONF.import_opt('servicegroup_get_all_cache_time', 'nova.servicegroup.api')
 
 LOG = logging.getLogger(__name__)
 
@@ -36,6 +38,8 @@ class DbDriver(api.ServiceGroupDriver):
         self.db_allowed = kwargs.get('db_allowed', True)
         self.conductor_api = conductor.API(use_local=self.db_allowed)
         self.service_down_time = CONF.service_down_time
+        # Maps group ids to (expiry time, members) tuples
+        self._get_all_cache = {}
 
     def join(self, member_id, group_id, service=None):
         """Join the given service with its group."""
@@ -75,17 +79,46 @@ class DbDriver(api.ServiceGroupDriver):
             LOG.debug(msg, {'lhb': str(last_heartbeat), 'el': str(elapsed)})
         return is_up
 
+    def _get_up_members(self, group_id):
+        """Returns (host, disabled) pairs for the members of the given group
+        which are up.
+        """
+        cache_time = CONF.servicegroup_get_all_cache_time
+        if cache_time:
+            expiry, rs = self._get_all_cache.get(group_id, (0, None))
+            if expiry > timeutils.utcnow_ts():
+                return rs
+
+        ctxt = context.get_admin_context()
+        if self.db_allowed:
+            # Let the database find the members up in one query
+            services = db.service_get_all_up_by_topic(
+                ctxt, group_id, self.service_down_time)
+        else:
+            services = [service for service in
+                        self.conductor_api.service_get_all(ctxt)
+                        if service['topic'] == group_id and
+                        self.is_up(service)]
+        rs = [(service['host'], service['disabled']) for service in services]
+
+        if cache_time:
+            self._get_all_cache[group_id] = (timeutils.utcnow_ts() +
+                                             cache_time, rs)
+        return rs
+
     def get_all(self, group_id):
         """Returns ALL members of the given group
         """
         LOG.debug('DB_Driver: get_all members of the %s group', group_id)
-        rs = []
-        ctxt = context.get_admin_context()
-        services = self.conductor_api.service_get_all_by_topic(ctxt, group_id)
-        for service in services:
-            if self.is_up(service):
-                rs.append(service['host'])
-        return rs
+        return [host for host, disabled in self._get_up_members(group_id)
+                if not disabled]
+
+    def get_all_up(self, group_id):
+        """Returns the set of hosts whose member of the given group is up,
+        whether or not it is disabled.
+        """
+        return set(host for host, _disabled in
+                   self._get_up_members(group_id))
 
     def _report_state(self, service):
         """Update the state of this service in the datastore."""
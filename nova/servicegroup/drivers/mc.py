@@ -19,11 +19,11 @@
 
 from oslo.config import cfg
 
+from nova import cache_utils
 from nova import conductor
 from nova import context
 from nova.i18n import _, _LE
 from nova.openstack.common import log as logging
-from nova.openstack.common import memorycache
 from nova.openstack.common import timeutils
 from nova.servicegroup import api
 
@@ -42,7 +42,7 @@ class MemcachedDriver(api.ServiceGroupDriver):
         test = kwargs.get('test')
         if not CONF.memcached_servers and not test:
             raise RuntimeError(_('memcached_servers not defined'))
-        self.mc = memorycache.get_client()
+        self.mc = cache_utils.get_client()
         self.db_allowed = kwargs.get('db_allowed', True)
         self.conductor_api = conductor.API(use_local=self.db_allowed)
 
@@ -82,6 +82,15 @@ class MemcachedDriver(api.ServiceGroupDriver):
                 rs.append(service['host'])
         return rs
 
+    def get_all_up(self, group_id):
+        """Returns the set of hosts whose member of the given group is up,
+        whether or not it is disabled.
+        """
+        ctxt = context.get_admin_context()
+        services = self.conductor_api.service_get_all(ctxt)
+        return set(service['host'] for service in services
+                   if service['topic'] == group_id and self.is_up(service))
+
     def _report_state(self, service):
         """Update the state of this service in the datastore."""
         try:
@@ -145,6 +145,12 @@ class ZooKeeperDriver(api.ServiceGroupDriver):
             raise exception.ServiceGroupUnavailable(driver="ZooKeeperDriver")
         return all_members
 
+    def get_all_up(self, group_id):
+        """Returns the set of hosts whose member of the given group is up,
+        whether or not it is disabled.
+        """
+        return set(self.get_all(group_id))
+
 
 class FakeLoopingCall(loopingcall.LoopingCallBase):
     """The fake Looping Call implementation, created for backward
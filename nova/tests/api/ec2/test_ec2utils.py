@@ -12,8 +12,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
+
 from nova.api.ec2 import ec2utils
 from nova import context
+from nova import db
 from nova import objects
 from nova import test
 
@@ -59,3 +62,42 @@ class EC2UtilsTestCase(test.TestCase):
         s3imap_id = ec2utils.glance_id_to_id(self.ctxt, 'fake-uuid')
         s3imap = objects.S3ImageMapping.get_by_id(self.ctxt, s3imap_id)
         self.assertEqual('fake-uuid', s3imap.uuid)
+
+    def test_glance_ids_to_ids(self):
+        s3imap = objects.S3ImageMapping(self.ctxt, uuid='fake-uuid')
+        s3imap.create()
+        ids = ec2utils.glance_ids_to_ids(self.ctxt,
+                                         ['fake-uuid', 'new-uuid', None])
+        self.assertEqual(set(['fake-uuid', 'new-uuid']), set(ids))
+        self.assertEqual(s3imap.id, ids['fake-uuid'])
+        s3imap = objects.S3ImageMapping.get_by_id(self.ctxt, ids['new-uuid'])
+        self.assertEqual('new-uuid', s3imap.uuid)
+
+    def test_glance_ids_to_ids_fills_cache(self):
+        s3imap = objects.S3ImageMapping(self.ctxt, uuid='fake-uuid')
+        s3imap.create()
+        ec2utils.glance_ids_to_ids(self.ctxt, ['fake-uuid'])
+        with mock.patch.object(objects.S3ImageMapping,
+                               'get_by_uuid') as get_by_uuid:
+            self.assertEqual(s3imap.id,
+                             ec2utils.glance_id_to_id(self.ctxt, 'fake-uuid'))
+            self.assertFalse(get_by_uuid.called)
+
+    def test_id_to_ec2_inst_ids(self):
+        imap = objects.EC2InstanceMapping(self.ctxt, uuid='fake-uuid')
+        imap.create()
+        ec2_ids = ec2utils.id_to_ec2_inst_ids(['fake-uuid', 'new-uuid'])
+        self.assertEqual(ec2utils.id_to_ec2_id(imap.id), ec2_ids['fake-uuid'])
+        imap = objects.EC2InstanceMapping.get_by_uuid(self.ctxt, 'new-uuid')
+        self.assertEqual(ec2utils.id_to_ec2_id(imap.id), ec2_ids['new-uuid'])
+
+    def test_id_to_ec2_inst_ids_single_query(self):
+        for uuid in ('uuid-1', 'uuid-2', 'uuid-3'):
+            objects.EC2InstanceMapping(self.ctxt, uuid=uuid).create()
+        with mock.patch.object(db, 'ec2_instance_get_all_by_uuids',
+                               wraps=db.ec2_instance_get_all_by_uuids) as get:
+            ec2utils.id_to_ec2_inst_ids(['uuid-1', 'uuid-2', 'uuid-3'])
+            self.assertEqual(1, get.call_count)
+            # Everything is cached now
+            ec2utils.id_to_ec2_inst_ids(['uuid-1', 'uuid-2', 'uuid-3'])
+            self.assertEqual(1, get.call_count)
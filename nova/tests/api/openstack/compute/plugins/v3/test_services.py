@@ -149,6 +149,14 @@ def fake_utcnow_ts():
     return calendar.timegm(d.utctimetuple())
 
 
+def fake_db_service_get_all_up_by_topic(context, topic, down_time):
+    now = fake_utcnow()
+    down_delta = datetime.timedelta(seconds=down_time)
+    return [service for service in fake_services_list
+            if service['topic'] == topic and
+            now - down_delta <= service['updated_at'] <= now + down_delta]
+
+
 class ServicesTest(test.TestCase):
 
     def setUp(self):
@@ -166,6 +174,8 @@ class ServicesTest(test.TestCase):
                        fake_db_service_get_by_host_binary(fake_services_list))
         self.stubs.Set(db, "service_update",
                        fake_db_service_update(fake_services_list))
+        self.stubs.Set(db, "service_get_all_up_by_topic",
+                       fake_db_service_get_all_up_by_topic)
 
     def test_services_list(self):
         req = FakeRequest()
@@ -205,6 +215,18 @@ class ServicesTest(test.TestCase):
                      'disabled_reason': 'test4'}]}
         self.assertEqual(res_dict, response)
 
+    def test_service_list_gets_services_up_once_per_topic(self):
+        with mock.patch.object(self.controller.servicegroup_api,
+                               'get_all_up',
+                               return_value=set(['host2'])) as get_all_up:
+            res_dict = self.controller.index(FakeRequest())
+
+        self.assertEqual(['down', 'down', 'up', 'up'],
+                         [svc['state'] for svc in res_dict['services']])
+        self.assertEqual(2, get_all_up.call_count)
+        get_all_up.assert_has_calls([mock.call('scheduler'),
+                                     mock.call('compute')], any_order=True)
+
     def test_service_list_with_host(self):
         req = FakeRequestWithHost()
         res_dict = self.controller.index(req)
@@ -301,10 +323,10 @@ class ServicesTest(test.TestCase):
     # This test is just to verify that the servicegroup API gets used when
     # calling this API.
     def test_services_with_exception(self):
-        def dummy_is_up(self, dummy):
+        def dummy_get_all_up(self, dummy):
             raise KeyError()
 
-        self.stubs.Set(db_driver.DbDriver, 'is_up', dummy_is_up)
+        self.stubs.Set(db_driver.DbDriver, 'get_all_up', dummy_get_all_up)
         req = FakeRequestWithHostService()
         self.assertRaises(webob.exc.HTTPInternalServerError,
                           self.controller.index, req)
@@ -388,6 +410,7 @@ class ServicesTest(test.TestCase):
 class ServicesCellsTest(test.TestCase):
     def setUp(self):
         super(ServicesCellsTest, self).setUp()
+        self.flags(enable=True, cell_type='api', group='cells')
 
         host_api = cells_api.HostAPI()
 
@@ -2264,6 +2264,61 @@ class _ComputeAPIUnitTestMixIn(object):
         self._test_create_db_entry_for_new_instance_with_cinder_error(
             expected_exception=exception.InvalidVolume)
 
+    @mock.patch('nova.notifications.send_update_with_states')
+    @mock.patch.object(objects.InstanceGroup, 'add_members')
+    @mock.patch.object(objects.InstancePCIRequests, 'save')
+    @mock.patch.object(quota.QUOTAS, 'limit_check')
+    @mock.patch.object(quota.QUOTAS, 'count', return_value=1)
+    @mock.patch.object(compute_api.API, 'create_db_entry_for_new_instance')
+    @mock.patch.object(compute_api.API, '_check_num_instances_quota')
+    def test_provision_instances_batches_per_request_work(
+            self, mock_check, mock_create, mock_count, mock_limit,
+            mock_pci_save, mock_add_members, mock_notify):
+        quotas = mock.Mock()
+        mock_check.return_value = (3, quotas)
+        created = [self._create_instance_obj() for i in range(3)]
+        mock_create.side_effect = created
+        group = objects.InstanceGroup(uuid='fake-group-uuid')
+        base_options = {'pci_request_info': objects.InstancePCIRequests(
+            requests=[])}
+        with mock.patch.object(self.compute_api.security_group_api,
+                               'ensure_default') as mock_ensure:
+            instances = self.compute_api._provision_instances(
+                self.context, 'fake-flavor', 3, 3, base_options, {}, None,
+                None, False, group, True)
+            mock_ensure.assert_called_once_with(self.context)
+        self.assertEqual(created, instances)
+        mock_count.assert_called_once_with(self.context,
+                                           'server_group_members', group,
+                                           self.context.user_id)
+        mock_limit.assert_called_once_with(self.context,
+                                           server_group_members=4)
+        mock_add_members.assert_called_once_with(
+            self.context, 'fake-group-uuid', [i.uuid for i in created])
+        self.assertFalse(mock_pci_save.called)
+        self.assertEqual(3, mock_notify.call_count)
+        quotas.commit.assert_called_once_with()
+
+    @mock.patch.object(quota.QUOTAS, 'limit_check',
+                       side_effect=exception.OverQuota(overs={}))
+    @mock.patch.object(quota.QUOTAS, 'count', return_value=1)
+    @mock.patch.object(compute_api.API, 'create_db_entry_for_new_instance')
+    @mock.patch.object(compute_api.API, '_check_num_instances_quota')
+    def test_provision_instances_group_over_quota(self, mock_check,
+                                                  mock_create, mock_count,
+                                                  mock_limit):
+        quotas = mock.Mock()
+        mock_check.return_value = (2, quotas)
+        group = objects.InstanceGroup(uuid='fake-group-uuid')
+        base_options = {'pci_request_info': objects.InstancePCIRequests(
+            requests=[])}
+        self.assertRaises(exception.QuotaError,
+                          self.compute_api._provision_instances,
+                          self.context, 'fake-flavor', 2, 2, base_options,
+                          {}, None, None, False, group, True)
+        self.assertFalse(mock_create.called)
+        quotas.rollback.assert_called_once_with()
+
     def _test_rescue(self, vm_state):
         instance = self._create_instance_obj(params={'vm_state': vm_state})
         bdms = []
@@ -582,6 +582,41 @@ class ConductorTestCase(_BaseTestCase, test.TestCase):
         self.assertIn('dict', updates)
         self.assertEqual({'foo': 'bar'}, updates['dict'])
 
+    def _test_object_action_nested(self, change_child):
+        class ChildObject(obj_base.NovaObject):
+            fields = {'foo': fields.IntegerField()}
+
+        class ParentObject(obj_base.NovaObject):
+            fields = {'child': fields.ObjectField('ChildObject'),
+                      'bar': fields.IntegerField()}
+
+            def touch(self, context):
+                self.bar = 2
+                if change_child:
+                    self.child.foo = 2
+                self.obj_reset_changes()
+                self.child.obj_reset_changes()
+
+        obj = ParentObject()
+        obj.bar = 1
+        obj.child = ChildObject()
+        obj.child.foo = 1
+        obj.obj_reset_changes()
+        obj.child.obj_reset_changes()
+        updates, result = self.conductor.object_action(
+            self.context, obj, 'touch', tuple(), {})
+        self.assertEqual(2, updates['bar'])
+        return updates
+
+    def test_object_action_skips_unchanged_nested_object(self):
+        updates = self._test_object_action_nested(False)
+        self.assertNotIn('child', updates)
+
+    def test_object_action_returns_changed_nested_object(self):
+        updates = self._test_object_action_nested(True)
+        self.assertIn('child', updates)
+        self.assertEqual(2, updates['child']['nova_object.data']['foo'])
+
     def _test_expected_exceptions(self, db_method, conductor_method, errors,
                                   *args, **kwargs):
         # Tests that expected exceptions are handled properly.
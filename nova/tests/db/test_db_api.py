@@ -711,6 +711,18 @@ class SqlAlchemyDbApiTestCase(DbTestCase):
         result = sqlalchemy_api._instance_get_all_uuids_by_host(ctxt, 'host1')
         self.assertEqual(2, len(result))
 
+    def test_instance_get_hosts_by_not_type(self):
+        ctxt = context.get_admin_context()
+        self.create_instance_with_args(instance_type_id=1)
+        self.create_instance_with_args(host='host2', instance_type_id=2)
+        self.create_instance_with_args(host='host2', instance_type_id=2)
+        self.create_instance_with_args(host='host3', instance_type_id=1)
+        self.create_instance_with_args(host=None, instance_type_id=2)
+        result = db.instance_get_hosts_by_not_type(ctxt, 1)
+        self.assertEqual(['host2'], result)
+        result = db.instance_get_hosts_by_not_type(ctxt, 2)
+        self.assertEqual(['host1', 'host3'], sorted(result))
+
     def test_instance_get_all_uuids_by_host(self):
         ctxt = context.get_admin_context()
         self.create_instance_with_args()
@@ -2332,6 +2344,22 @@ class ServiceTestCase(test.TestCase, ModelsObjectComparatorMixin):
         real = db.service_get_all_by_topic(self.ctxt, 't1')
         self._assertEqualListsOfObjects(expected, real)
 
+    def test_service_get_all_up_by_topic(self):
+        now = timeutils.utcnow()
+        values = [
+            {'host': 'host1', 'topic': 't1', 'updated_at': now},
+            {'host': 'host2', 'topic': 't1', 'updated_at': None,
+             'created_at': now - datetime.timedelta(seconds=10)},
+            {'host': 'host3', 'topic': 't1',
+             'updated_at': now - datetime.timedelta(seconds=120)},
+            {'disabled': True, 'topic': 't1', 'updated_at': now},
+            {'host': 'host4', 'topic': 't2', 'updated_at': now}
+        ]
+        services = [self._create_service(vals) for vals in values]
+        expected = [services[0], services[1], services[3]]
+        real = db.service_get_all_up_by_topic(self.ctxt, 't1', 60)
+        self._assertEqualListsOfObjects(expected, real)
+
     def test_service_get_all_by_host(self):
         values = [
             {'host': 'host1', 'topic': 't11', 'binary': 'b11'},
@@ -5673,6 +5701,15 @@ class S3ImageTestCase(test.TestCase):
         self.assertRaises(exception.ImageNotFound, db.s3_image_get_by_uuid,
                           self.ctxt, uuidutils.generate_uuid())
 
+    def test_s3_image_get_all_by_uuids(self):
+        uuids = self.values[:2] + [uuidutils.generate_uuid()]
+        refs = db.s3_image_get_all_by_uuids(self.ctxt, uuids)
+        self.assertEqual(sorted(self.values[:2]),
+                         sorted([ref.uuid for ref in refs]))
+
+    def test_s3_image_get_all_by_uuids_empty(self):
+        self.assertEqual([], db.s3_image_get_all_by_uuids(self.ctxt, []))
+
 
 class ComputeNodeTestCase(test.TestCase, ModelsObjectComparatorMixin):
 
@@ -5732,6 +5769,34 @@ class ComputeNodeTestCase(test.TestCase, ModelsObjectComparatorMixin):
             new_stats = jsonutils.loads(node['stats'])
             self.assertEqual(self.stats, new_stats)
 
+    def test_compute_node_get_all_updated_since(self):
+        since = timeutils.utcnow() + datetime.timedelta(seconds=10)
+        timeutils.set_time_override(since)
+        self.addCleanup(timeutils.clear_time_override)
+
+        service_data = self.service_dict.copy()
+        service_data['host'] = 'host2'
+        service = db.service_create(self.ctxt, service_data)
+        compute_node_data = self.compute_node_dict.copy()
+        compute_node_data['service_id'] = service['id']
+        compute_node_data['hypervisor_hostname'] = 'hypervisor-2'
+        node = db.compute_node_create(self.ctxt, compute_node_data)
+
+        nodes = db.compute_node_get_all(self.ctxt, updated_since=since)
+        self.assertEqual([node['id']], [n['id'] for n in nodes])
+        self.assertEqual('host2', nodes[0]['service']['host'])
+
+        timeutils.advance_time_seconds(10)
+        db.compute_node_update(self.ctxt, self.item['id'], {'vcpus': 4})
+        nodes = db.compute_node_get_all(self.ctxt, updated_since=since)
+        self.assertEqual(sorted([node['id'], self.item['id']]),
+                         sorted(n['id'] for n in nodes))
+
+        timeutils.advance_time_seconds(10)
+        nodes = db.compute_node_get_all(self.ctxt,
+                                        updated_since=timeutils.utcnow())
+        self.assertEqual([], nodes)
+
     def test_compute_node_get_all_deleted_compute_node(self):
         # Create a service and compute node and ensure we can find its stats;
         # delete the service and compute node when done and loop again
@@ -6475,6 +6540,18 @@ class Ec2TestCase(test.TestCase):
         inst2 = db.ec2_instance_get_by_id(self.ctxt, inst['id'])
         self.assertEqual(inst['id'], inst2['id'])
 
+    def test_ec2_instance_get_all_by_uuids(self):
+        inst1 = db.ec2_instance_create(self.ctxt, 'fake-uuid1')
+        inst2 = db.ec2_instance_create(self.ctxt, 'fake-uuid2')
+        db.ec2_instance_create(self.ctxt, 'fake-uuid3')
+        result = db.ec2_instance_get_all_by_uuids(
+            self.ctxt, ['fake-uuid1', 'fake-uuid2', 'uuid-not-present'])
+        self.assertEqual(sorted([inst1['id'], inst2['id']]),
+                         sorted([inst['id'] for inst in result]))
+
+    def test_ec2_instance_get_all_by_uuids_empty(self):
+        self.assertEqual([], db.ec2_instance_get_all_by_uuids(self.ctxt, []))
+
     def test_ec2_instance_get_by_uuid_not_found(self):
         self.assertRaises(exception.InstanceNotFound,
                           db.ec2_instance_get_by_uuid,
@@ -6711,8 +6788,7 @@ class ArchiveTestCase(test.TestCase):
         rows = self.conn.execute(qsdd).fetchall()
         self.assertEqual(len(rows), 1)
 
-    def test_archive_deleted_rows_fk_constraint(self):
-        # consoles.pool_id depends on console_pools.id
+    def _enable_foreign_keys(self):
         # SQLite doesn't enforce foreign key constraints without a pragma.
         dialect = self.engine.url.get_dialect()
         if dialect == sqlite.dialect:
@@ -6726,6 +6802,10 @@ class ArchiveTestCase(test.TestCase):
                 self.skipTest(
                     'sqlite version too old for reliable SQLA foreign_keys')
             self.conn.execute("PRAGMA foreign_keys = ON")
+
+    def test_archive_deleted_rows_fk_constraint(self):
+        # consoles.pool_id depends on console_pools.id
+        self._enable_foreign_keys()
         ins_stmt = self.console_pools.insert().values(deleted=1)
         result = self.conn.execute(ins_stmt)
         id1 = result.inserted_primary_key[0]
@@ -6745,6 +6825,50 @@ class ArchiveTestCase(test.TestCase):
         num = db.archive_deleted_rows_for_table(self.context, "console_pools")
         self.assertEqual(num, 1)
 
+    def test_archive_deleted_rows_fk_constraint_skips_batch(self):
+        self._enable_foreign_keys()
+        pool_ids = []
+        for unused in range(2):
+            ins_stmt = self.console_pools.insert().values(deleted=1)
+            result = self.conn.execute(ins_stmt)
+            pool_ids.append(result.inserted_primary_key[0])
+        self.ids.extend(pool_ids)
+        # Only the first pool is referenced by a console
+        ins_stmt = self.consoles.insert().values(deleted=1,
+                                                 pool_id=pool_ids[0])
+        result = self.conn.execute(ins_stmt)
+        self.ids.append(result.inserted_primary_key[0])
+
+        num = db.archive_deleted_rows_for_table(self.context, "console_pools",
+                                                batch_size=1)
+
+        self.assertEqual(1, num)
+        qcp = sql.select([self.console_pools.c.id]).where(
+            self.console_pools.c.id.in_(pool_ids))
+        self.assertEqual([(pool_ids[0],)],
+                         self.conn.execute(qcp).fetchall())
+
+    def test_archive_deleted_rows_batches(self):
+        for uuidstr in self.uuidstrs:
+            ins_stmt = self.instance_id_mappings.insert().values(uuid=uuidstr)
+            self.conn.execute(ins_stmt)
+        update_statement = self.instance_id_mappings.update().\
+                where(self.instance_id_mappings.c.uuid.in_(self.uuidstrs[:5]))\
+                .values(deleted=1)
+        self.conn.execute(update_statement)
+
+        num = db.archive_deleted_rows_for_table(
+            self.context, "instance_id_mappings", max_rows=3, batch_size=2)
+        self.assertEqual(3, num)
+        num = db.archive_deleted_rows_for_table(
+            self.context, "instance_id_mappings", batch_size=1)
+        self.assertEqual(2, num)
+
+        qsiim = sql.select([self.shadow_instance_id_mappings]).\
+                where(self.shadow_instance_id_mappings.c.uuid.in_(
+                                                            self.uuidstrs))
+        self.assertEqual(5, len(self.conn.execute(qsiim).fetchall()))
+
     def test_archive_deleted_rows_2_tables(self):
         # Add 6 rows to each table
         for uuidstr in self.uuidstrs:
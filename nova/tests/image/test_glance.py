@@ -15,6 +15,7 @@
 
 
 import datetime
+import hashlib
 import sys
 
 import glanceclient.exc
@@ -646,6 +647,57 @@ class TestDownloadNoDirectUri(test.NoDBTestCase):
         writer.close.assert_called_once_with()
 
 
+class TestDownloadChecksum(test.NoDBTestCase):
+
+    """Tests the download method of the GlanceImageService when the
+    checksum of the downloaded data is verified.
+    """
+
+    def setUp(self):
+        super(TestDownloadChecksum, self).setUp()
+        self.flags(verify_checksum=True, group='glance')
+        self.client = mock.MagicMock()
+        self.client.call.return_value = ['ab', 'cd']
+        self.service = glance.GlanceImageService(self.client)
+
+    @mock.patch('nova.image.glance.GlanceImageService.show')
+    def test_download_checksum_match(self, show_mock):
+        show_mock.return_value = {'checksum': hashlib.md5('abcd').hexdigest()}
+        data = mock.MagicMock()
+
+        self.service.download(mock.sentinel.ctx, mock.sentinel.image_id,
+                              data=data)
+
+        show_mock.assert_called_once_with(mock.sentinel.ctx,
+                                          mock.sentinel.image_id)
+        data.write.assert_has_calls([mock.call('ab'), mock.call('cd')])
+
+    @mock.patch('nova.image.glance.GlanceImageService.show')
+    def test_download_without_checksum(self, show_mock):
+        show_mock.return_value = {'checksum': None}
+        data = mock.MagicMock()
+
+        self.service.download(mock.sentinel.ctx, mock.sentinel.image_id,
+                              data=data)
+
+        data.write.assert_has_calls([mock.call('ab'), mock.call('cd')])
+
+    @mock.patch('nova.openstack.common.fileutils.delete_if_exists')
+    @mock.patch('__builtin__.open')
+    @mock.patch('nova.image.glance.GlanceImageService.show')
+    def test_download_checksum_mismatch(self, show_mock, open_mock,
+                                        delete_mock):
+        show_mock.return_value = {'checksum': hashlib.md5('abc').hexdigest()}
+
+        self.assertRaises(exception.ImageUnacceptable,
+                          self.service.download, mock.sentinel.ctx,
+                          mock.sentinel.image_id,
+                          dst_path=mock.sentinel.dst_path)
+
+        open_mock.return_value.close.assert_called_once_with()
+        delete_mock.assert_called_once_with(mock.sentinel.dst_path)
+
+
 class TestIsImageAvailable(test.NoDBTestCase):
     """Tests the internal _is_image_available function."""
 
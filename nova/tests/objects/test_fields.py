@@ -53,6 +53,16 @@ class TestField(test.NoDBTestCase):
             self.assertRaises((TypeError, ValueError),
                               self.field.coerce, 'obj', 'attr', in_val)
 
+    def test_coerce_trusted_good_values(self):
+        for in_val, out_val in self.coerce_good_values:
+            self.assertEqual(out_val,
+                             self.field.coerce_trusted('obj', 'attr', in_val))
+
+    def test_coerce_trusted_bad_values(self):
+        for in_val in self.coerce_bad_values:
+            self.assertRaises((TypeError, ValueError),
+                              self.field.coerce_trusted, 'obj', 'attr', in_val)
+
     def test_to_primitive(self):
         for in_val, prim_val in self.to_primitive_values:
             self.assertEqual(prim_val, self.field.to_primitive('obj', 'attr',
@@ -83,6 +93,12 @@ class TestString(TestField):
     def test_stringify(self):
         self.assertEqual("'123'", self.field.stringify(123))
 
+    def test_coerce_trusted_skips_coercion(self):
+        value = u'foo'
+        self.mox.StubOutWithMock(fields.String, 'coerce')
+        self.mox.ReplayAll()
+        self.assertIs(value, self.field.coerce_trusted('obj', 'attr', value))
+
 
 class TestInteger(TestField):
     def setUp(self):
@@ -520,6 +520,21 @@ class _TestObject(object):
         obj2.obj_reset_changes()
         self.assertEqual(obj2.obj_what_changed(), set())
 
+    def test_obj_hydrate(self):
+        obj = MyObj()
+        obj._obj_hydrate([('foo', 123), ('bar', 'bar'), ('readonly', 1)])
+        self.assertEqual(123, obj.foo)
+        self.assertEqual('bar', obj.bar)
+        self.assertIsInstance(obj.bar, unicode)
+        self.assertEqual(set(), obj.obj_what_changed())
+        # NOTE: Read-only fields can be refreshed from the database
+        obj._obj_hydrate([('readonly', 2)])
+        self.assertEqual(2, obj.readonly)
+
+    def test_obj_hydrate_coerces(self):
+        obj = MyObj()
+        self.assertRaises(ValueError, obj._obj_hydrate, [('foo', 'a')])
+
     def test_obj_class_from_name(self):
         obj = base.NovaObject.obj_class_from_name('MyObj', '1.5')
         self.assertEqual('1.5', obj.VERSION)
@@ -924,6 +939,31 @@ class TestObjectSerializer(_BaseTestCase):
         thing2 = ser.deserialize_entity(self.context, thing)
         self.assertIsInstance(thing2['foo'], base.NovaObject)
 
+    def test_object_serialization_cached(self):
+        ser = base.NovaObjectSerializer()
+        obj = MyObj(foo=1)
+        with base.obj_primitive_cache():
+            primitive = ser.serialize_entity(self.context, obj)
+            self.assertIs(primitive, ser.serialize_entity(self.context, obj))
+            obj.foo = 2
+            primitive2 = ser.serialize_entity(self.context, obj)
+        self.assertIsNot(primitive, primitive2)
+        self.assertEqual(2, primitive2['nova_object.data']['foo'])
+        self.assertIsNot(primitive2, ser.serialize_entity(self.context, obj))
+
+    def test_object_serialization_cached_nested_change(self):
+        ser = base.NovaObjectSerializer()
+        obj = MyObj(foo=1)
+        obj.rel_object = MyOwnedObject(baz=1)
+        with base.obj_primitive_cache():
+            primitive = ser.serialize_entity(self.context, obj)
+            obj.rel_object.baz = 2
+            primitive2 = ser.serialize_entity(self.context, obj)
+        self.assertIsNot(primitive, primitive2)
+        self.assertEqual(
+            2, primitive2['nova_object.data']['rel_object'][
+                'nova_object.data']['baz'])
+
 
 # NOTE(danms): The hashes in this list should only be changed if
 # they come with a corresponding version bump in the affected
@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+
+import fixtures
 import mock
 
 from nova import exception
@@ -93,6 +96,71 @@ class CachingSchedulerTestCase(test_scheduler.SchedulerTestCase):
         self.assertEqual(1, len(result))
         self.assertEqual(result[0]["host"], fake_host.host)
 
+    @mock.patch('nova.db.instance_extra_get_by_instance_uuid',
+                return_value={'numa_topology': None,
+                              'pci_requests': None})
+    def test_select_destination_shared_through_journal(self,
+                                                       mock_get_extra):
+        tempdir = self.useFixture(fixtures.TempDir()).path
+        self.flags(scheduler_cache_journal_path=os.path.join(tempdir,
+                                                             'journal'))
+        driver1 = self.driver_cls()
+        driver2 = self.driver_cls()
+        driver1.all_host_states = [self._get_fake_host_state()]
+        driver2.all_host_states = [self._get_fake_host_state()]
+
+        driver1.select_destinations(self.context,
+                                    self._get_fake_request_spec(), {})
+        hosts = driver2._get_all_host_states(self.context)
+
+        self.assertEqual(50000 - 512, hosts[0].free_ram_mb)
+        self.assertEqual(50000 - 512,
+                         driver1.all_host_states[0].free_ram_mb)
+
+    @mock.patch('nova.db.instance_extra_get_by_instance_uuid',
+                return_value={'numa_topology': None,
+                              'pci_requests': None})
+    def test_journal_refresh_does_not_double_count(self, mock_get_extra):
+        tempdir = self.useFixture(fixtures.TempDir()).path
+        self.flags(scheduler_cache_journal_path=os.path.join(tempdir,
+                                                             'journal'))
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        db_updated = timeutils.utcnow()
+        timeutils.advance_time_seconds(1)
+        host_state = self._get_fake_host_state()
+        host_state.updated = db_updated
+        self.driver = self.driver_cls()
+        self.driver.all_host_states = [host_state]
+        self.driver.select_destinations(self.context,
+                                        self._get_fake_request_spec(), {})
+        self.assertEqual(50000 - 512, host_state.free_ram_mb)
+
+        def get_all_host_states(context):
+            # The compute node record predates the consumption, so the
+            # host state keeps the resources consumed in memory.
+            host_state.update_from_compute_node({'updated_at': db_updated})
+            return iter([host_state])
+
+        with mock.patch.object(self.driver.host_manager,
+                               'get_all_host_states',
+                               side_effect=get_all_host_states):
+            self.driver.run_periodic_tasks(self.context)
+        self.assertEqual(50000 - 512, host_state.free_ram_mb)
+
+        def reload_host_states(context):
+            # The host state is reloaded from the same compute node record,
+            # which does not include the consumption yet.
+            host_state.free_ram_mb = 50000
+            host_state.updated = db_updated
+            return iter([host_state])
+
+        with mock.patch.object(self.driver.host_manager,
+                               'get_all_host_states',
+                               side_effect=reload_host_states):
+            self.driver.run_periodic_tasks(self.context)
+        self.assertEqual(50000 - 512, host_state.free_ram_mb)
+
     def _test_select_destinations(self, request_spec):
         return self.driver.select_destinations(
                 self.context, request_spec, {})
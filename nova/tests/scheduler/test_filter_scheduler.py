@@ -33,6 +33,7 @@ from nova.scheduler import filter_scheduler
 from nova.scheduler import host_manager
 from nova.scheduler import utils as scheduler_utils
 from nova.scheduler import weights
+from nova.scheduler.weights import ram
 from nova.tests import fake_instance
 from nova.tests.scheduler import fakes
 from nova.tests.scheduler import test_scheduler
@@ -576,6 +577,66 @@ class FilterSchedulerTestCase(test_scheduler.SchedulerTestCase):
 
         self.assertEqual(50, hosts[0].weight)
 
+    def _get_batch_host_states(self):
+        host_states = []
+        for i, free_ram_mb in enumerate([4096, 2048, 1024]):
+            host_state = host_manager.HostState('host%d' % (i + 1),
+                                                'node%d' % (i + 1))
+            host_state.free_ram_mb = free_ram_mb
+            host_states.append(host_state)
+        return host_states
+
+    def _fake_get_filtered_hosts_by_ram(self, hosts, filter_properties,
+                                        index):
+        self.filtered.append([host.host for host in hosts])
+        return [host for host in hosts if host.free_ram_mb >= 1536]
+
+    def test_schedule_batch(self):
+        self.flags(scheduler_host_subset_size=1, ram_weight_multiplier=1.0)
+        sched = fakes.FakeFilterScheduler()
+        sched.host_manager.weight_classes = [ram.RAMWeigher]
+        self.filtered = []
+        self.stubs.Set(sched.host_manager, 'get_filtered_hosts',
+                       self._fake_get_filtered_hosts_by_ram)
+        instance_properties = {'root_gb': 0, 'ephemeral_gb': 0,
+                               'memory_mb': 1536, 'vcpus': 1}
+
+        hosts = sched._schedule_batch(self._get_batch_host_states(), {},
+                                      instance_properties, 4)
+
+        # host1 is chosen until it is full, then host2 until it is full
+        self.assertEqual(['host1', 'host1', 'host2'],
+                         [host.obj.host for host in hosts])
+        # Only the chosen host is filtered again after the first pass
+        self.assertEqual([['host1', 'host2', 'host3'], ['host1'],
+                          ['host1'], ['host2']], self.filtered)
+
+    def test_schedule_batch_no_hosts(self):
+        sched = fakes.FakeFilterScheduler()
+        self.stubs.Set(sched.host_manager, 'get_filtered_hosts',
+                       lambda hosts, filter_properties, index: [])
+
+        self.assertEqual([], sched._schedule_batch(
+                self._get_batch_host_states(), {}, {}, 2))
+
+    @mock.patch.object(filter_scheduler.FilterScheduler, '_schedule_batch',
+                       return_value=[])
+    def test_schedule_uses_batch_placement(self, mock_batch):
+        self.flags(scheduler_batch_placement=True)
+        sched = fakes.FakeFilterScheduler()
+        instance_properties = {'project_id': 1, 'os_type': 'Linux'}
+        request_spec = {'instance_properties': instance_properties,
+                        'instance_type': {},
+                        'num_instances': 2}
+        host_states = self._get_batch_host_states()
+
+        with mock.patch.object(sched, '_get_all_host_states',
+                               return_value=host_states):
+            sched._schedule(self.context, request_spec, {})
+
+        mock_batch.assert_called_once_with(host_states, mock.ANY,
+                                           instance_properties, 2)
+
     @mock.patch('nova.db.instance_extra_get_by_instance_uuid',
                 return_value={'numa_topology': None,
                               'pci_requests': None})
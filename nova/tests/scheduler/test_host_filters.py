@@ -35,6 +35,7 @@ from nova.scheduler import filters
 from nova.scheduler.filters import extra_specs_ops
 from nova.scheduler.filters import ram_filter
 from nova.scheduler.filters import trusted_filter
+from nova.scheduler import host_index
 from nova import servicegroup
 from nova import test
 from nova.tests import fake_instance
@@ -486,6 +487,21 @@ class HostFiltersTestCase(test.NoDBTestCase):
                            params={'host': 'fake_host', 'instance_type_id': 2})
         self.assertFalse(filt_cls.host_passes(host, filter_properties))
 
+    def test_type_filter_from_index(self):
+        filt_cls = self.class_map['TypeAffinityFilter']()
+        filter_properties = {'context': self.context,
+                             'instance_type': {'id': 1}}
+        host1 = fakes.FakeHostState('host1', 'node1', {})
+        host2 = fakes.FakeHostState('host2', 'node2', {})
+        host3 = fakes.FakeHostState('host3', 'node3', {})
+        fakes.FakeInstance(context=self.context,
+                           params={'host': 'host1', 'instance_type_id': 1})
+        fakes.FakeInstance(context=self.context,
+                           params={'host': 'host2', 'instance_type_id': 2})
+        index = host_index.HostIndex(self.context, [host1, host2, host3])
+        self.assertEqual(set([host1, host3]),
+                         filt_cls.filter_from_index(index, filter_properties))
+
     def test_aggregate_type_filter(self):
         self._stub_service_is_up(True)
         filt_cls = self.class_map['AggregateTypeAffinityFilter']()
@@ -517,6 +533,74 @@ class HostFiltersTestCase(test.NoDBTestCase):
                  'service': service})
         self.assertFalse(filt_cls.host_passes(host, filter_properties))
 
+    def _assert_filter_from_index(self, filt_cls, hosts, filter_properties):
+        """Check filter_from_index() agrees with host_passes()."""
+        if host_index.numpy is None:
+            self.skipTest('numpy is not available')
+        expected = set(host for host in hosts
+                       if filt_cls.host_passes(host, filter_properties))
+        expected_limits = []
+        for host in hosts:
+            expected_limits.append(host.limits)
+            host.limits = {}
+        index = host_index.HostIndex(self.context, hosts)
+        self.assertEqual(expected,
+                         filt_cls.filter_from_index(index, filter_properties))
+        self.assertEqual(expected_limits, [host.limits for host in hosts])
+
+    def test_resource_filters_from_index_without_numpy(self):
+        index = host_index.HostIndex(self.context, [])
+        filter_properties = {'instance_type': {'memory_mb': 1024,
+                                               'vcpus': 1}}
+        with mock.patch.object(host_index, 'numpy', None):
+            for name in ('RamFilter', 'CoreFilter', 'DiskFilter',
+                         'NumInstancesFilter', 'IoOpsFilter'):
+                filt_cls = self.class_map[name]()
+                self.assertIsNone(
+                    filt_cls.filter_from_index(index, filter_properties))
+
+    def test_ram_filter_from_index(self):
+        filt_cls = self.class_map['RamFilter']()
+        ram_filter.RamFilter.ram_allocation_ratio = 2.0
+        filter_properties = {'instance_type': {'memory_mb': 1024}}
+        hosts = [fakes.FakeHostState('host%d' % i, 'node%d' % i,
+                                     {'free_ram_mb': free,
+                                      'total_usable_ram_mb': 2048})
+                 for i, free in enumerate([-1024, -1025, 1024, 0])]
+        self._assert_filter_from_index(filt_cls, hosts, filter_properties)
+
+    def test_core_filter_from_index(self):
+        filt_cls = self.class_map['CoreFilter']()
+        self.flags(cpu_allocation_ratio=2)
+        filter_properties = {'instance_type': {'vcpus': 1}}
+        hosts = [fakes.FakeHostState('host%d' % i, 'node%d' % i,
+                                     {'vcpus_total': total,
+                                      'vcpus_used': used})
+                 for i, (total, used) in enumerate([(4, 7), (4, 8), (0, 0)])]
+        self._assert_filter_from_index(filt_cls, hosts, filter_properties)
+
+    def test_disk_filter_from_index(self):
+        filt_cls = self.class_map['DiskFilter']()
+        self.flags(disk_allocation_ratio=1.0)
+        filter_properties = {'instance_type': {'root_gb': 1,
+            'ephemeral_gb': 1, 'swap': 512}}
+        hosts = [fakes.FakeHostState('host%d' % i, 'node%d' % i,
+                                     {'free_disk_mb': free * 1024,
+                                      'total_usable_disk_gb': 13})
+                 for i, free in enumerate([11, 2, 1])]
+        self._assert_filter_from_index(filt_cls, hosts, filter_properties)
+
+    def test_num_instances_and_io_ops_filters_from_index(self):
+        self.flags(max_instances_per_host=5, max_io_ops_per_host=8)
+        hosts = [fakes.FakeHostState('host%d' % i, 'node%d' % i,
+                                     {'num_instances': num_instances,
+                                      'num_io_ops': num_io_ops})
+                 for i, (num_instances, num_io_ops) in enumerate(
+                         [(4, 8), (5, 7), (0, 0)])]
+        for name in ('NumInstancesFilter', 'IoOpsFilter'):
+            filt_cls = self.class_map[name]()
+            self._assert_filter_from_index(filt_cls, hosts, {})
+
     def test_ram_filter_passes(self):
         self._stub_service_is_up(True)
         filt_cls = self.class_map['RamFilter']()
@@ -673,6 +757,20 @@ class HostFiltersTestCase(test.NoDBTestCase):
                 {'free_ram_mb': 1024, 'service': service})
         self.assertFalse(filt_cls.host_passes(host, filter_properties))
 
+    def test_compute_filter_from_index(self):
+        filt_cls = self.class_map['ComputeFilter']()
+        hosts = [fakes.FakeHostState('host%d' % i, 'node%d' % i,
+                                     {'service': {'host': 'host%d' % i,
+                                                  'disabled': disabled}})
+                 for i, disabled in enumerate([False, True, False])]
+        index = host_index.HostIndex(self.context, hosts)
+        self.mox.StubOutWithMock(servicegroup.API, 'get_all_up')
+        servicegroup.API.get_all_up('compute').AndReturn(
+                set(['host0', 'host1']))
+        self.mox.ReplayAll()
+        self.assertEqual(set([hosts[0]]),
+                         filt_cls.filter_from_index(index, {}))
+
     def test_image_properties_filter_passes_same_inst_props_and_version(self):
         self._stub_service_is_up(True)
         filt_cls = self.class_map['ImagePropertiesFilter']()
@@ -880,6 +978,9 @@ class HostFiltersTestCase(test.NoDBTestCase):
         host = fakes.FakeHostState('host1', 'node1', host_state)
         assertion = self.assertTrue if passes else self.assertFalse
         assertion(filt_cls.host_passes(host, filter_properties))
+        index = host_index.HostIndex(self.context, [host])
+        assertion(host in filt_cls.filter_from_index(index,
+                                                     filter_properties))
 
     def test_compute_filter_pass_cpu_info_as_text_type(self):
         cpu_info = """ { "vendor": "Intel", "model": "core2duo",
@@ -976,6 +1077,9 @@ class HostFiltersTestCase(test.NoDBTestCase):
                                    {'free_ram_mb': 1024})
         assertion = self.assertTrue if passes else self.assertFalse
         assertion(filt_cls.host_passes(host, filter_properties))
+        index = host_index.HostIndex(self.context, [host])
+        assertion(host in filt_cls.filter_from_index(index,
+                                                     filter_properties))
 
     def test_aggregate_filter_fails_extra_specs_deleted_host(self):
         self._stub_service_is_up(True)
@@ -1624,6 +1728,30 @@ class HostFiltersTestCase(test.NoDBTestCase):
                                    {'service': service})
         self.assertFalse(filt_cls.host_passes(host, request))
 
+    def test_availability_zone_filter_from_index(self):
+        filt_cls = self.class_map['AvailabilityZoneFilter']()
+        self._create_aggregate_with_host(hosts=['host1'])
+        self._create_aggregate_with_host(name='fake2',
+                                         metadata={'opt1': '1'},
+                                         hosts=['host2'])
+        host1 = fakes.FakeHostState('host1', 'node1', {})
+        host2 = fakes.FakeHostState('host2', 'node2', {})
+        host3 = fakes.FakeHostState('host3', 'node3', {})
+        hosts = [host1, host2, host3]
+
+        request = self._make_zone_request('fake_avail_zone')
+        index = host_index.HostIndex(request['context'], hosts)
+        self.assertEqual(set([host1, host2]),
+                         filt_cls.filter_from_index(index, request))
+
+        request = self._make_zone_request('nova')
+        self.assertEqual(set([host3]),
+                         filt_cls.filter_from_index(index, request))
+
+        request = self._make_zone_request(None)
+        self.assertEqual(set(hosts),
+                         filt_cls.filter_from_index(index, request))
+
     def test_retry_filter_disabled(self):
         # Test case where retry/re-scheduling is disabled.
         filt_cls = self.class_map['RetryFilter']()
@@ -16,6 +16,8 @@
 Tests For HostManager
 """
 
+import datetime
+
 import mock
 import six
 
@@ -45,6 +47,15 @@ class FakeFilterClass2(filters.BaseHostFilter):
         pass
 
 
+class FakeIndexedFilterClass(filters.BaseHostFilter):
+    def host_passes(self, host_state, filter_properties):
+        raise AssertionError('host_passes called for an indexed filter')
+
+    def filter_from_index(self, host_index, filter_properties):
+        return set(host_state for host_state in host_index.host_states
+                   if host_state.host != 'fake_multihost')
+
+
 class HostManagerTestCase(test.NoDBTestCase):
     """Test case for HostManager class."""
 
@@ -123,6 +134,30 @@ class HostManagerTestCase(test.NoDBTestCase):
                 fake_properties, filter_class_names=specified_filters)
         self._verify_result(info, result)
 
+    def test_get_filtered_hosts_from_index(self):
+        self.flags(scheduler_use_host_index=True)
+        fake_properties = {'context': 'fake_context'}
+
+        info = {'expected_objs': self.fake_hosts[:4],
+                'expected_fprops': fake_properties}
+        self.mox.StubOutWithMock(self.host_manager, '_choose_host_filters')
+        info['got_objs'] = []
+        info['got_fprops'] = []
+
+        def fake_filter_one(_self, obj, filter_props):
+            info['got_objs'].append(obj)
+            info['got_fprops'].append(filter_props)
+            return True
+
+        self.stubs.Set(FakeFilterClass1, '_filter_one', fake_filter_one)
+        self.host_manager._choose_host_filters(None).AndReturn(
+                [FakeIndexedFilterClass, FakeFilterClass1])
+
+        self.mox.ReplayAll()
+        result = self.host_manager.get_filtered_hosts(self.fake_hosts,
+                fake_properties)
+        self._verify_result(info, result)
+
     def test_get_filtered_hosts_with_ignore(self):
         fake_properties = {'ignore_hosts': ['fake_host1', 'fake_host3',
             'fake_host5', 'fake_multihost']}
@@ -386,6 +421,81 @@ class HostManagerChangedNodesTestCase(test.NoDBTestCase):
         host_states_map = self.host_manager.host_state_map
         self.assertEqual(len(host_states_map), 0)
 
+    def _compute_nodes_with_timestamps(self):
+        updated_at = timeutils.utcnow()
+        nodes = []
+        for node in fakes.COMPUTE_NODES:
+            node = dict(node)
+            node['updated_at'] = updated_at
+            nodes.append(node)
+        return updated_at, nodes
+
+    @mock.patch.object(db, 'service_get_all')
+    @mock.patch.object(db, 'compute_node_get_all')
+    def test_get_all_host_states_incremental(self, mock_get_all,
+                                             mock_services):
+        self.flags(scheduler_host_state_full_refresh_interval=60)
+        context = 'fake_context'
+        updated_at, nodes = self._compute_nodes_with_timestamps()
+        changed = dict(nodes[0], free_ram_mb=128,
+                       updated_at=updated_at + datetime.timedelta(seconds=5))
+        mock_get_all.side_effect = [nodes, [changed]]
+        mock_services.return_value = [
+            dict(n['service'], binary='nova-compute')
+            for n in nodes if n['service']]
+
+        self.host_manager.get_all_host_states(context)
+        self.host_manager.get_all_host_states(context)
+
+        self.assertEqual([mock.call(context),
+                          mock.call(context, updated_since=updated_at)],
+                         mock_get_all.call_args_list)
+        mock_services.assert_called_once_with(context)
+        host_states_map = self.host_manager.host_state_map
+        self.assertEqual(4, len(host_states_map))
+        self.assertEqual(128, host_states_map[('host1', 'node1')].free_ram_mb)
+        self.assertEqual(changed['updated_at'],
+                         self.host_manager._nodes_updated_since)
+
+    @mock.patch.object(db, 'service_get_all')
+    @mock.patch.object(db, 'compute_node_get_all')
+    def test_get_all_host_states_incremental_service_removed(
+            self, mock_get_all, mock_services):
+        self.flags(scheduler_host_state_full_refresh_interval=60)
+        context = 'fake_context'
+        updated_at, nodes = self._compute_nodes_with_timestamps()
+        mock_get_all.side_effect = [nodes, []]
+        mock_services.return_value = [
+            dict(n['service'], binary='nova-compute')
+            for n in nodes
+            if n['service'] and n['service']['host'] != 'host4']
+
+        self.host_manager.get_all_host_states(context)
+        self.host_manager.get_all_host_states(context)
+
+        host_states_map = self.host_manager.host_state_map
+        self.assertEqual(3, len(host_states_map))
+        self.assertNotIn(('host4', 'node4'), host_states_map)
+
+    @mock.patch.object(db, 'compute_node_get_all')
+    def test_get_all_host_states_full_refresh_after_interval(self,
+                                                             mock_get_all):
+        self.flags(scheduler_host_state_full_refresh_interval=60)
+        context = 'fake_context'
+        updated_at, nodes = self._compute_nodes_with_timestamps()
+        running_nodes = [n for n in nodes
+                         if n.get('hypervisor_hostname') != 'node4']
+        mock_get_all.side_effect = [nodes, running_nodes]
+
+        timeutils.set_time_override(updated_at)
+        self.host_manager.get_all_host_states(context)
+        timeutils.advance_time_seconds(61)
+        self.host_manager.get_all_host_states(context)
+
+        self.assertEqual([mock.call(context), mock.call(context)],
+                         mock_get_all.call_args_list)
+        self.assertEqual(3, len(self.host_manager.host_state_map))
+
 
 class HostStateTestCase(test.NoDBTestCase):
     """Test case for HostState class."""
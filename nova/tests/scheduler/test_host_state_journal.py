@@ -0,0 +1,143 @@
+# Copyright (c) 2015 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests For HostStateJournal
+"""
+
+import datetime
+import os
+
+import fixtures
+
+from nova.openstack.common import timeutils
+from nova.scheduler import host_manager
+from nova.scheduler import host_state_journal
+from nova import test
+
+
+class HostStateJournalTestCase(test.NoDBTestCase):
+    """Test case for HostStateJournal class."""
+
+    def setUp(self):
+        super(HostStateJournalTestCase, self).setUp()
+        tempdir = self.useFixture(fixtures.TempDir()).path
+        self.path = os.path.join(tempdir, 'journal')
+        self.instance = {'root_gb': 1, 'ephemeral_gb': 1, 'memory_mb': 512,
+                         'vcpus': 1}
+        self.addCleanup(timeutils.clear_time_override)
+
+    def _journal(self):
+        return host_state_journal.HostStateJournal(self.path, max_age=120)
+
+    def _host_state(self, updated=None):
+        host_state = host_manager.HostState('host1', 'node1')
+        host_state.free_ram_mb = 4096
+        host_state.updated = updated
+        return host_state
+
+    def test_replay_other_worker(self):
+        journal1 = self._journal()
+        journal2 = self._journal()
+        host_state1 = self._host_state()
+        host_state2 = self._host_state()
+
+        host_state1.consume_from_instance(self.instance)
+        journal1.record(host_state1, self.instance)
+        journal1.replay([host_state1])
+        journal2.replay([host_state2])
+        # Entries are only applied once
+        journal2.replay([host_state2])
+
+        self.assertEqual(4096 - 512, host_state1.free_ram_mb)
+        self.assertEqual(4096 - 512, host_state2.free_ram_mb)
+        self.assertEqual(1, host_state2.num_instances)
+
+    def test_replay_unknown_host(self):
+        journal1 = self._journal()
+        journal2 = self._journal()
+        host_state = self._host_state()
+        other_host_state = host_manager.HostState('host2', 'node2')
+
+        journal1.record(other_host_state, self.instance)
+        journal2.replay([host_state])
+
+        self.assertEqual(4096, host_state.free_ram_mb)
+
+    def test_reset_skips_entries_older_than_database(self):
+        now = timeutils.utcnow()
+        timeutils.set_time_override(now)
+        journal1 = self._journal()
+        journal2 = self._journal()
+        journal1.record(self._host_state(), self.instance)
+        timeutils.advance_time_seconds(10)
+        journal1.record(self._host_state(), self.instance)
+
+        host_state = self._host_state(updated=now)
+        journal2.reset([host_state])
+        self.assertEqual(4096 - 512, host_state.free_ram_mb)
+
+        # Own entries are replayed too after a reset
+        host_state = self._host_state(updated=now)
+        journal1.reset([host_state])
+        self.assertEqual(4096 - 512, host_state.free_ram_mb)
+
+    def test_reset_skips_entries_applied_to_host_not_reloaded(self):
+        journal1 = self._journal()
+        journal2 = self._journal()
+        host_state1 = self._host_state()
+        host_state2 = self._host_state()
+        host_state1.consume_from_instance(self.instance)
+        journal1.record(host_state1, self.instance)
+        journal2.replay([host_state2])
+
+        # Neither host state was reloaded from the database
+        journal1.reset([host_state1])
+        journal2.reset([host_state2])
+
+        self.assertEqual(4096 - 512, host_state1.free_ram_mb)
+        self.assertEqual(4096 - 512, host_state2.free_ram_mb)
+
+    def test_reset_compacts_journal(self):
+        timeutils.set_time_override(timeutils.utcnow())
+        journal = self._journal()
+        journal.record(self._host_state(), self.instance)
+        timeutils.advance_time_seconds(121)
+        journal.record(self._host_state(), self.instance)
+
+        journal.reset([])
+
+        with open(self.path) as f:
+            self.assertEqual(1, len(f.readlines()))
+
+    def test_reread_after_compaction(self):
+        timeutils.set_time_override(timeutils.utcnow())
+        journal1 = self._journal()
+        journal2 = self._journal()
+        host_state = self._host_state()
+        journal1.record(self._host_state(), self.instance)
+        journal2.replay([host_state])
+        timeutils.advance_time_seconds(121)
+        journal1.record(self._host_state(), self.instance)
+        journal1.reset([])
+
+        journal2.replay([host_state])
+
+        self.assertEqual(4096 - 2 * 512, host_state.free_ram_mb)
+
+    def test_replay_without_journal(self):
+        host_state = self._host_state(
+                updated=datetime.datetime(2015, 1, 1))
+        self._journal().reset([host_state])
+        self.assertEqual(4096, host_state.free_ram_mb)
@@ -16,10 +16,14 @@
 Tests For Scheduler weights.
 """
 
+import mock
+
 from nova import context
 from nova import exception
 from nova.openstack.common.fixture import mockpatch
 from nova.scheduler import weights
+from nova.scheduler.weights import metrics
+from nova.scheduler.weights import ram
 from nova import test
 from nova.tests import matchers
 from nova.tests.scheduler import fakes
@@ -128,6 +132,38 @@ class RamWeigherTestCase(test.NoDBTestCase):
         self.assertEqual(weighed_host.weight, 0)
         self.assertEqual(weighed_host.obj.host, "negative")
 
+    def test_ram_weigher_same_without_numpy(self):
+        if ram.numpy is None:
+            self.skipTest('numpy is not available')
+        hostinfo_list = list(self._get_all_hosts())
+        host_attr = {'id': 100, 'memory_mb': 8192, 'free_ram_mb': -512}
+        hostinfo_list.append(
+                fakes.FakeHostState('negative', 'negative', host_attr))
+
+        def _weigh():
+            return [(w.obj.host, w.weight) for w in
+                    self.weight_handler.get_weighed_objects(
+                        self.weight_classes, hostinfo_list, {})]
+
+        expected = _weigh()
+        with mock.patch.object(ram, 'numpy', None):
+            self.assertEqual(expected, _weigh())
+
+    def test_reweigh_object(self):
+        hostinfo_list = self._get_all_hosts()
+        weighers = [cls() for cls in self.weight_classes]
+        weighed_hosts = self.weight_handler.weigh_objects(weighers,
+                hostinfo_list, {})
+
+        # host4: free_ram_mb=8192, which was the maximum
+        weighed_host = weighed_hosts[0]
+        self.assertEqual('host4', weighed_host.obj.host)
+        weighed_host.obj.free_ram_mb = 4096
+
+        # Normalized against the bounds of the first weighing
+        self.weight_handler.reweigh_object(weighers, weighed_host, {})
+        self.assertEqual(0.5, weighed_host.weight)
+
 
 class MetricsWeigherTestCase(test.NoDBTestCase):
     def setUp(self):
@@ -246,3 +282,24 @@ class MetricsWeigherTestCase(test.NoDBTestCase):
         self.flags(required=False, group='metrics')
         setting = ['foo=0.0001', 'zot=-1']
         self._do_test(setting, 1.0, 'host5')
+
+    def test_metrics_weigher_same_without_numpy(self):
+        if metrics.numpy is None:
+            self.skipTest('numpy is not available')
+        self.flags(required=False, group='metrics')
+        self.flags(weight_setting=['foo=0.0001', 'zot=-1'], group='metrics')
+        hostinfo_list = list(self._get_all_hosts())
+
+        def _weigh():
+            return [(w.obj.host, w.weight) for w in
+                    self.weight_handler.get_weighed_objects(
+                        self.weight_classes, hostinfo_list, {})]
+
+        expected = _weigh()
+        with mock.patch.object(metrics, 'numpy', None):
+            result = _weigh()
+        self.assertEqual([host for host, weight in expected],
+                         [host for host, weight in result])
+        for (_host, expected_weight), (_host, weight) in zip(expected,
+                                                             result):
+            self.assertAlmostEqual(expected_weight, weight)
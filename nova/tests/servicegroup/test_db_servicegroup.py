@@ -15,6 +15,7 @@
 import datetime
 
 import fixtures
+import mox
 
 from nova import context
 from nova import db
@@ -109,6 +110,47 @@ class DBServiceGroupTestCase(test.TestCase):
         service_id = self.servicegroup_api.get_one(self._topic)
         self.assertIn(service_id, services)
 
+    def test_get_all_skips_down_services(self):
+        self.useFixture(test.TimeOverride())
+        serv = self.useFixture(
+            ServiceFixture(self._host, self._binary, self._topic)).serv
+        serv.start()
+        self.assertEqual([self._host],
+                         self.servicegroup_api.get_all(self._topic))
+
+        serv.stop()
+        timeutils.advance_time_seconds(self.down_time + 1)
+        self.assertEqual([], self.servicegroup_api.get_all(self._topic))
+
+    def test_get_all_cached(self):
+        self.flags(servicegroup_get_all_cache_time=10)
+        self.useFixture(test.TimeOverride())
+        self.mox.StubOutWithMock(db, 'service_get_all_up_by_topic')
+        db.service_get_all_up_by_topic(
+            mox.IgnoreArg(), self._topic, self.down_time).AndReturn(
+                [{'host': 'host1', 'disabled': False}])
+        db.service_get_all_up_by_topic(
+            mox.IgnoreArg(), self._topic, self.down_time).AndReturn([])
+        self.mox.ReplayAll()
+
+        self.assertEqual(['host1'], self.servicegroup_api.get_all(self._topic))
+        self.assertEqual(['host1'], self.servicegroup_api.get_all(self._topic))
+        timeutils.advance_time_seconds(11)
+        self.assertEqual([], self.servicegroup_api.get_all(self._topic))
+
+    def test_get_all_up(self):
+        host1 = self._host + '_1'
+        host2 = self._host + '_2'
+        for host in (host1, host2):
+            self.useFixture(
+                ServiceFixture(host, self._binary, self._topic)).serv.start()
+        service_ref = db.service_get_by_args(self._ctx, host2, self._binary)
+        db.service_update(self._ctx, service_ref['id'], {'disabled': True})
+
+        self.assertEqual([host1], self.servicegroup_api.get_all(self._topic))
+        self.assertEqual(set([host1, host2]),
+                         self.servicegroup_api.get_all_up(self._topic))
+
     def test_service_is_up(self):
         fts_func = datetime.datetime.fromtimestamp
         fake_now = 1000
@@ -130,6 +130,26 @@ class MemcachedServiceGroupTestCase(test.TestCase):
         service_id = self.servicegroup_api.get_one(self._topic)
         self.assertIn(service_id, services)
 
+    def test_get_all_up(self):
+        host1 = self._host + '_1'
+        host2 = self._host + '_2'
+        host3 = self._host + '_3'
+        for host in (host1, host2, host3):
+            self.useFixture(
+                ServiceFixture(host, self._binary, self._topic)).serv.start()
+        service_ref = db.service_get_by_args(self._ctx, host2, self._binary)
+        db.service_update(self._ctx, service_ref['id'], {'disabled': True})
+
+        for host, time in ((host1, self.down_time), (host2, self.down_time),
+                           (host3, -1)):
+            self.servicegroup_api._driver.mc.set(
+                str("%s:%s" % (self._topic, host)), timeutils.utcnow(),
+                time=time)
+
+        self.assertEqual([host1], self.servicegroup_api.get_all(self._topic))
+        self.assertEqual(set([host1, host2]),
+                         self.servicegroup_api.get_all_up(self._topic))
+
     def test_service_is_up(self):
         serv = self.useFixture(
             ServiceFixture(self._host, self._binary, self._topic)).serv
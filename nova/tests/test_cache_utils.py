@@ -0,0 +1,115 @@
+# Copyright 2015 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from nova import cache_utils
+from nova.openstack.common import timeutils
+from nova import test
+
+
+class CacheUtilsTestCase(test.NoDBTestCase):
+    def setUp(self):
+        super(CacheUtilsTestCase, self).setUp()
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+
+    def test_get_client_in_process(self):
+        self.flags(memorycache_max_entries=10)
+        client = cache_utils.get_client()
+        self.assertIsInstance(client, cache_utils.Client)
+        self.assertEqual(10, client.max_entries)
+
+    @mock.patch('nova.openstack.common.memorycache.get_client')
+    def test_get_client_memcached(self, mock_get_client):
+        client = cache_utils.get_client(['localhost:11211'])
+        self.assertEqual(mock_get_client.return_value, client)
+        mock_get_client.assert_called_once_with(['localhost:11211'])
+
+    def test_lru_eviction(self):
+        client = cache_utils.Client(max_entries=2)
+        client.set('a', 1)
+        client.set('b', 2)
+        # Reading 'a' makes 'b' the least recently used key
+        self.assertEqual(1, client.get('a'))
+        client.set('c', 3)
+
+        self.assertIsNone(client.get('b'))
+        self.assertEqual(1, client.get('a'))
+        self.assertEqual(3, client.get('c'))
+        self.assertEqual(1, client.stats['evictions'])
+
+    def test_unlimited(self):
+        client = cache_utils.Client()
+        for i in range(100):
+            client.set(str(i), i)
+        self.assertEqual(100, len(client.cache))
+        self.assertEqual(0, client.stats['evictions'])
+
+    def test_expiry(self):
+        client = cache_utils.Client()
+        client.set('short', 1, time=10)
+        client.set('long', 2, time=20)
+        client.set('forever', 3)
+
+        timeutils.advance_time_seconds(10)
+        self.assertIsNone(client.get('short'))
+        self.assertEqual(2, client.get('long'))
+
+        timeutils.advance_time_seconds(10)
+        self.assertIsNone(client.get('long'))
+        self.assertEqual(3, client.get('forever'))
+        self.assertEqual(2, client.stats['expirations'])
+        self.assertEqual([], client._timeouts)
+
+    def test_expiry_uses_latest_timeout(self):
+        client = cache_utils.Client()
+        client.set('key', 1, time=10)
+        timeutils.advance_time_seconds(5)
+        client.set('key', 2, time=10)
+
+        timeutils.advance_time_seconds(5)
+        self.assertEqual(2, client.get('key'))
+        timeutils.advance_time_seconds(5)
+        self.assertIsNone(client.get('key'))
+
+    def test_expiry_of_keys_not_read(self):
+        client = cache_utils.Client()
+        client.set('key', 1, time=10)
+        timeutils.advance_time_seconds(10)
+        client.set('other', 2)
+        self.assertNotIn('key', client.cache)
+
+    def test_get_stats(self):
+        client = cache_utils.Client(max_entries=1)
+        client.set('a', 1, time=10)
+        client.get('a')
+        client.get('missing')
+        client.set('b', 2)
+
+        self.assertEqual([('local', {'get_hits': 1,
+                                     'get_misses': 1,
+                                     'evictions': 1,
+                                     'expirations': 0,
+                                     'curr_items': 1,
+                                     'limit_maxitems': 1})],
+                         client.get_stats())
+
+    def test_add_and_incr(self):
+        client = cache_utils.Client()
+        self.assertTrue(client.add('key', '1'))
+        self.assertFalse(client.add('key', '2'))
+        self.assertEqual(2, client.incr('key'))
+        self.assertEqual('2', client.get('key'))
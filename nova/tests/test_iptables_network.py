@@ -16,6 +16,7 @@
 """Unit Tests for network code."""
 
 from nova.network import linux_net
+from nova.openstack.common import processutils
 from nova import test
 
 
@@ -99,6 +100,47 @@ class IptablesManagerTestCase(test.NoDBTestCase):
         self.assertEqual(len(table.rules), num_rules)
         self.assertFalse(table.dirty)
 
+    def test_rules_keep_insertion_order(self):
+        table = self.manager.ipv4['filter']
+        table.add_rule('FORWARD', '-s 1.2.3.4/5 -j DROP')
+        table.add_rule('FORWARD', '-s 1.2.3.5/5 -j DROP')
+        table.add_rule('FORWARD', '-s 1.2.3.6/5 -j DROP')
+        table.remove_rule('FORWARD', '-s 1.2.3.5/5 -j DROP')
+        table.add_rule('FORWARD', '-s 1.2.3.5/5 -j DROP')
+
+        self.assertEqual(['-s 1.2.3.4/5 -j DROP', '-s 1.2.3.6/5 -j DROP',
+                          '-s 1.2.3.5/5 -j DROP'],
+                         [rule.rule for rule in table.rules
+                          if rule.chain == 'FORWARD' and rule.wrap])
+
+    def test_top_rule_keeps_counters(self):
+        current_lines = list(self.sample_filter)
+        current_lines[12] = '[10:20] -A FORWARD -j nova-filter-top'
+        new_lines = self.manager._modify_rules(current_lines,
+                                               self.manager.ipv4['filter'],
+                                               'filter')
+        self.assertIn('[10:20] -A FORWARD -j nova-filter-top', new_lines)
+        self.assertNotIn('[0:0] -A FORWARD -j nova-filter-top', new_lines)
+
+    def test_remove_chain_removes_rules(self):
+        current_lines = self.sample_filter
+        table = self.manager.ipv4['filter']
+        table.add_chain('test-chain', wrap=False)
+        table.add_rule('test-chain', '-j DROP', wrap=False)
+        table.add_rule('FORWARD', '-j test-chain', wrap=False)
+        new_lines = self.manager._modify_rules(current_lines, table, 'filter')
+        self.assertIn(':test-chain - [0:0]', new_lines)
+        self.assertIn('[0:0] -A FORWARD -j test-chain', new_lines)
+
+        table.remove_chain('test-chain', wrap=False)
+        self.assertEqual(2, len(table.remove_rules))
+        new_lines = self.manager._modify_rules(new_lines, table, 'filter')
+        self.assertNotIn(':test-chain - [0:0]', new_lines)
+        self.assertNotIn('[0:0] -A test-chain -j DROP', new_lines)
+        self.assertNotIn('[0:0] -A FORWARD -j test-chain', new_lines)
+        self.assertEqual([], table.remove_rules)
+        self.assertEqual(set(), table.remove_chains)
+
     def test_clean_tables_no_apply(self):
         for table in self.manager.ipv4.itervalues():
             table.dirty = False
@@ -275,3 +317,69 @@ class IptablesManagerTestCase(test.NoDBTestCase):
                                                self.manager.ipv4['filter'],
                                                'filter')
         self.assertEqual(current_lines, new_lines)
+
+    def _apply_incrementally(self, fail_noflush=False):
+        self.flags(iptables_incremental_apply=True, use_ipv6=False)
+        calls = []
+
+        def fake_execute(*cmd, **kwargs):
+            calls.append((cmd, kwargs.get('process_input')))
+            if fail_noflush and '--noflush' in cmd:
+                raise processutils.ProcessExecutionError()
+            return '', ''
+
+        self.manager.execute = fake_execute
+        self.manager.apply()
+        del calls[:]
+        return calls
+
+    def test_incremental_apply_changed_chains(self):
+        calls = self._apply_incrementally()
+        table = self.manager.ipv4['filter']
+        table.add_chain('inst-1')
+        table.add_rule('inst-1', '-j DROP')
+        table.add_rule('local', '-j $inst-1')
+        self.manager.apply()
+
+        self.assertEqual(1, len(calls))
+        cmd, process_input = calls[0]
+        self.assertEqual(('iptables-restore', '-c', '--noflush'), cmd)
+        self.assertEqual(['*filter',
+                          ':%s-inst-1 - [0:0]' % self.binary_name,
+                          ':%s-local - [0:0]' % self.binary_name,
+                          '[0:0] -A %s-inst-1 -j DROP' % self.binary_name,
+                          '[0:0] -A %s-local -j %s-inst-1' %
+                          (self.binary_name, self.binary_name),
+                          'COMMIT'],
+                         process_input.split('\n'))
+
+        table.remove_chain('inst-1')
+        self.manager.apply()
+
+        cmd, process_input = calls[1]
+        self.assertEqual(['*filter',
+                          ':%s-inst-1 - [0:0]' % self.binary_name,
+                          ':%s-local - [0:0]' % self.binary_name,
+                          '-X %s-inst-1' % self.binary_name,
+                          'COMMIT'],
+                         process_input.split('\n'))
+
+    def test_incremental_apply_unwrapped_change(self):
+        calls = self._apply_incrementally()
+        table = self.manager.ipv4['filter']
+        table.add_rule('FORWARD', '-s 1.2.3.4/5 -j DROP', wrap=False)
+        self.manager.apply()
+
+        self.assertEqual([('iptables-save', '-c'), ('iptables-restore', '-c')],
+                         [cmd for cmd, process_input in calls])
+
+    def test_incremental_apply_failure_rewrites_tables(self):
+        calls = self._apply_incrementally(fail_noflush=True)
+        self.manager.ipv4['filter'].add_rule('local', '-j DROP')
+        self.manager.apply()
+
+        self.assertEqual([('iptables-restore', '-c', '--noflush'),
+                          ('iptables-save', '-c'),
+                          ('iptables-restore', '-c')],
+                         [cmd for cmd, process_input in calls])
+        self.assertFalse(self.manager.dirty())
@@ -494,6 +494,30 @@ class OpenStackMetadataTestCase(test.TestCase):
         mdjson = mdinst.lookup("/openstack/2012-08-10/meta_data.json")
         self.assertNotIn("random_seed", jsonutils.loads(mdjson))
 
+    def test_render_cached(self):
+        mdinst = fake_InstanceMetadata(self.stubs, self.instance.obj_clone())
+        path = "/openstack/2012-08-10/meta_data.json"
+
+        with mock.patch.object(mdinst, 'lookup',
+                               wraps=mdinst.lookup) as mock_lookup:
+            rendered = mdinst.render(path)
+            self.assertEqual(rendered, mdinst.render(path))
+            self.assertEqual(1, mock_lookup.call_count)
+
+        self.assertEqual(base.MIME_TYPE_APPLICATION_JSON, rendered[1])
+        self.assertEqual(jsonutils.loads(mdinst.lookup(path)),
+                         jsonutils.loads(rendered[0]))
+
+    def test_render_random_seed_not_cached(self):
+        mdinst = fake_InstanceMetadata(self.stubs, self.instance.obj_clone())
+        path = "/openstack/2013-04-04/meta_data.json"
+
+        body1, _mimetype = mdinst.render(path)
+        body2, _mimetype = mdinst.render(path)
+
+        self.assertNotEqual(jsonutils.loads(body1)['random_seed'],
+                            jsonutils.loads(body2)['random_seed'])
+
     def test_no_dashes_in_metadata(self):
         # top level entries in meta_data should not contain '-' in their name
         inst = self.instance.obj_clone()
@@ -567,7 +591,7 @@ class MetadataHandlerTestCase(test.TestCase):
             return "foo"
 
         class CallableMD(object):
-            def lookup(self, path_info):
+            def render(self, path_info):
                 return verify
 
         response = fake_request(self.stubs, CallableMD(), "/bar")
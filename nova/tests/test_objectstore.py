@@ -18,6 +18,7 @@
 Unittets for S3 objectstore clone.
 """
 
+import hashlib
 import os
 import shutil
 import tempfile
@@ -25,7 +26,10 @@ import tempfile
 import boto
 from boto import exception as boto_exception
 from boto.s3 import connection as s3
+import fixtures
+import mock
 from oslo.config import cfg
+import webob
 
 from nova.objectstore import s3server
 from nova import test
@@ -153,3 +157,102 @@ class S3APITestCase(test.NoDBTestCase):
         """Tear down test server."""
         self.server.stop()
         super(S3APITestCase, self).tearDown()
+
+
+class ObjectHandlerTestCase(test.NoDBTestCase):
+    """Test object streaming without going through a server."""
+
+    def setUp(self):
+        super(ObjectHandlerTestCase, self).setUp()
+        buckets_path = self.useFixture(fixtures.TempDir()).path
+        self.app = s3server.S3Application(buckets_path)
+        os.mkdir(os.path.join(buckets_path, 'bucket'))
+        self.contents = ''.join(chr(i % 256) for i in range(200000))
+
+    def _request(self, method, body=None, headers=None):
+        request = webob.Request.blank('/bucket/object', method=method,
+                                      headers=headers)
+        if body is not None:
+            request.body = body
+        return request.get_response(self.app)
+
+    def test_put_and_get(self):
+        response = self._request('PUT', body=self.contents)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual('"%s"' % hashlib.md5(self.contents).hexdigest(),
+                         response.headers['ETag'])
+
+        response = self._request('GET')
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(len(self.contents), response.content_length)
+        self.assertEqual(self.contents, response.body)
+
+    def test_get_range(self):
+        self._request('PUT', body=self.contents)
+
+        response = self._request('GET', headers={'Range': 'bytes=70000-'})
+
+        self.assertEqual(206, response.status_int)
+        self.assertEqual('bytes 70000-199999/200000',
+                         response.headers['Content-Range'])
+        self.assertEqual(self.contents[70000:], response.body)
+
+    def test_get_unsatisfiable_range(self):
+        self._request('PUT', body=self.contents)
+
+        response = self._request('GET', headers={'Range': 'bytes=300000-'})
+
+        self.assertEqual(416, response.status_int)
+        self.assertEqual('bytes */200000', response.headers['Content-Range'])
+
+
+class BucketHandlerTestCase(test.NoDBTestCase):
+    """Test bucket listings without going through a server."""
+
+    def setUp(self):
+        super(BucketHandlerTestCase, self).setUp()
+        buckets_path = self.useFixture(fixtures.TempDir()).path
+        self.app = s3server.S3Application(buckets_path, bucket_depth=1)
+        os.mkdir(os.path.join(buckets_path, 'bucket'))
+
+    def _request(self, path, method='GET', body=None):
+        request = webob.Request.blank(path, method=method)
+        if body is not None:
+            request.body = body
+        return request.get_response(self.app)
+
+    def _list(self, query=''):
+        response = self._request('/bucket/?terse=1' + query)
+        self.assertEqual(200, response.status_int)
+        return response.body
+
+    def _keys(self, *names):
+        return ''.join('<Contents><Key>%s</Key></Contents>' % name
+                       for name in names)
+
+    def test_list_maintained_by_put_and_delete(self):
+        for name in ('b', 'a', 'c'):
+            self._request('/bucket/' + name, method='PUT', body=name)
+        self.assertIn(self._keys('a', 'b', 'c'), self._list())
+
+        with mock.patch.object(os, 'walk') as mock_walk:
+            self._request('/bucket/b', method='DELETE')
+            self._request('/bucket/aa', method='PUT', body='aa')
+            body = self._list()
+            self.assertFalse(mock_walk.called)
+        self.assertIn(self._keys('a', 'aa', 'c'), body)
+
+    def test_list_prefix_and_marker(self):
+        for name in ('a1', 'a2', 'a3', 'b1'):
+            self._request('/bucket/' + name, method='PUT', body=name)
+
+        body = self._list('&prefix=a&marker=a1&max-keys=1')
+
+        self.assertIn(self._keys('a2'), body)
+        self.assertNotIn('a3', body)
+        self.assertIn('<IsTruncated>True</IsTruncated>', body)
+
+    def test_delete_bucket_drops_index(self):
+        self._list()
+        self._request('/bucket/', method='DELETE')
+        self.assertNotIn('bucket', self.app.bucket_indexes)
@@ -145,6 +145,59 @@ class PolicyTestCase(test.NoDBTestCase):
         policy.enforce(admin_context, uppercase_action, self.target)
 
 
+class CompiledPolicyTestCase(test.NoDBTestCase):
+    def setUp(self):
+        super(CompiledPolicyTestCase, self).setUp()
+        self._set_rules({
+            "shared": "user_id:fake",
+            "example:first": "rule:shared",
+            "example:second": "rule:shared and project_id:%(project_id)s",
+            "example:recursive": "@ or rule:example:recursive",
+        })
+        self.context = context.RequestContext('fake', 'fake')
+        self.target = {'project_id': 'fake'}
+
+    def _set_rules(self, rules):
+        policy.reset()
+        policy.init()
+        policy.set_rules(dict((k, common_policy.parse_rule(v))
+                               for k, v in rules.items()))
+
+    @mock.patch.object(common_policy.GenericCheck, '__call__',
+                       autospec=True, return_value=True)
+    def test_shared_rule_memoized_per_request(self, mock_call):
+        policy.enforce(self.context, 'example:first', self.target)
+        policy.enforce(self.context, 'example:second', self.target)
+        # user_id is checked once, project_id for the second rule
+        self.assertEqual(2, mock_call.call_count)
+
+        other_context = context.RequestContext('fake', 'fake')
+        policy.enforce(other_context, 'example:first', self.target)
+        self.assertEqual(3, mock_call.call_count)
+
+    def test_target_dependent_rule_not_memoized(self):
+        policy.enforce(self.context, 'example:second', self.target)
+        self.assertRaises(exception.PolicyNotAuthorized, policy.enforce,
+                          self.context, 'example:second',
+                          {'project_id': 'other'})
+
+    def test_memoized_rule_uses_roles(self):
+        self._set_rules({"example:admin": "role:admin"})
+        self.assertRaises(exception.PolicyNotAuthorized, policy.enforce,
+                          self.context, 'example:admin', self.target)
+        self.context.roles = ['admin']
+        policy.enforce(self.context, 'example:admin', self.target)
+
+    def test_set_rules_drops_compiled_rules(self):
+        policy.enforce(self.context, 'example:first', self.target)
+        policy.set_rules({'example:first': common_policy.parse_rule('!')})
+        self.assertRaises(exception.PolicyNotAuthorized, policy.enforce,
+                          self.context, 'example:first', self.target)
+
+    def test_recursive_rule(self):
+        policy.enforce(self.context, 'example:recursive', self.target)
+
+
 class DefaultPolicyTestCase(test.NoDBTestCase):
 
     def setUp(self):
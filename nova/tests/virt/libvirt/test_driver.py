@@ -7819,6 +7819,54 @@ class LibvirtConnTestCase(test.TestCase):
         drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), False)
         self.assertEqual(0, drvr._get_disk_over_committed_size_total())
 
+    @mock.patch.object(libvirt_driver.LibvirtDriver,
+                       "_get_disk_over_committed_size_total",
+                       return_value=1024)
+    @mock.patch.object(libvirt_driver.LibvirtDriver, "_get_memory_mb_used",
+                       return_value=512)
+    @mock.patch.object(libvirt_driver.LibvirtDriver, "_get_vcpu_used",
+                       return_value=2)
+    @mock.patch.object(libvirt_driver.LibvirtDriver,
+                       "_list_instance_domains")
+    def test_get_domains_resource_usage(self, mock_list, mock_vcpu,
+                                        mock_memory, mock_disk):
+        host_dom = mock.Mock()
+        host_dom.ID.return_value = 0
+        guest_dom = mock.Mock()
+        guest_dom.ID.return_value = 1
+        mock_list.return_value = [host_dom, guest_dom]
+        drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), False)
+
+        usage = drvr._get_domains_resource_usage()
+
+        self.assertEqual({'vcpus_used': 2,
+                          'memory_mb_used': 512,
+                          'disk_over_committed_size': 1024}, usage)
+        mock_list.assert_called_once_with(only_guests=False)
+        mock_vcpu.assert_called_once_with([guest_dom])
+        mock_memory.assert_called_once_with([host_dom, guest_dom])
+        mock_disk.assert_called_once_with([guest_dom])
+
+    def test_disk_over_committed_size_total_concurrency(self):
+        self.flags(disk_info_concurrency=2, group='libvirt')
+        drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), False)
+        doms = [mock.Mock() for i in range(5)]
+        running = []
+        max_running = []
+
+        def fake_over_committed_size(dom):
+            running.append(dom)
+            max_running.append(len(running))
+            greenthread.sleep(0)
+            running.remove(dom)
+            return 10
+
+        with mock.patch.object(drvr, '_get_domain_over_committed_size',
+                               side_effect=fake_over_committed_size):
+            self.assertEqual(50,
+                             drvr._get_disk_over_committed_size_total(doms))
+        self.assertEqual(2, max(max_running))
+
     def test_cpu_info(self):
         conn = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), True)
 
@@ -10042,24 +10090,20 @@ class HostStateTestCase(test.NoDBTestCase):
         def _get_vcpu_total(self):
             return 1
 
-        def _get_vcpu_used(self):
-            return 0
+        def _get_domains_resource_usage(self):
+            return {'vcpus_used': 0,
+                    'memory_mb_used': 88,
+                    'disk_over_committed_size': 0}
 
         def _get_cpu_info(self):
             return HostStateTestCase.cpu_info
 
-        def _get_disk_over_committed_size_total(self):
-            return 0
-
         def _get_local_gb_info(self):
             return {'total': 100, 'used': 20, 'free': 80}
 
         def _get_memory_mb_total(self):
             return 497
 
-        def _get_memory_mb_used(self):
-            return 88
-
         def _get_hypervisor_type(self):
             return 'QEMU'
 
@@ -28,6 +28,7 @@ from nova.openstack.common import importutils
 from nova.openstack.common import jsonutils
 from nova.openstack.common import log as logging
 from nova.openstack.common import processutils
+from nova.openstack.common import units
 from nova import test
 from nova.tests import fake_instance
 from nova import utils
@@ -783,6 +784,86 @@ class ImageCacheManagerTestCase(test.NoDBTestCase):
             self.assertTrue(was['called'])
 
 
+class BackingFileIndexTestCase(test.NoDBTestCase):
+
+    def setUp(self):
+        super(BackingFileIndexTestCase, self).setUp()
+        self.lookups = []
+
+        def fake_get_disk_backing_file(disk_path):
+            self.lookups.append(disk_path)
+            return 'backing-of-%s' % os.path.basename(disk_path)
+
+        self.stubs.Set(libvirt_utils, 'get_disk_backing_file',
+                       fake_get_disk_backing_file)
+
+    def _make_disk(self, tmpdir, name):
+        disk_path = os.path.join(tmpdir, name)
+        with open(disk_path, 'w') as f:
+            f.write('disk')
+        return disk_path
+
+    def _index(self, tmpdir):
+        index = imagecache.BackingFileIndex(
+            os.path.join(tmpdir, 'backing_files.json'), tmpdir)
+        index.load()
+        return index
+
+    def test_unchanged_disk_not_inspected(self):
+        with utils.tempdir() as tmpdir:
+            disk_path = self._make_disk(tmpdir, 'disk1')
+            index = self._index(tmpdir)
+            self.assertEqual('backing-of-disk1',
+                             index.get_backing_file(disk_path))
+            index.save()
+
+            index = self._index(tmpdir)
+            self.assertEqual('backing-of-disk1',
+                             index.get_backing_file(disk_path))
+            self.assertEqual([disk_path], self.lookups)
+
+    def test_replaced_disk_inspected(self):
+        with utils.tempdir() as tmpdir:
+            disk_path = self._make_disk(tmpdir, 'disk1')
+            index = self._index(tmpdir)
+            index.get_backing_file(disk_path)
+            index.save()
+
+            new_disk_path = self._make_disk(tmpdir, 'disk2')
+            os.rename(new_disk_path, disk_path)
+            index = self._index(tmpdir)
+            index.get_backing_file(disk_path)
+
+            self.assertEqual([disk_path, disk_path], self.lookups)
+
+    def test_save_drops_unused_entries(self):
+        with utils.tempdir() as tmpdir:
+            disk_path1 = self._make_disk(tmpdir, 'disk1')
+            disk_path2 = self._make_disk(tmpdir, 'disk2')
+            index = self._index(tmpdir)
+            index.get_backing_file(disk_path1)
+            index.get_backing_file(disk_path2)
+            index.save()
+
+            index = self._index(tmpdir)
+            index.get_backing_file(disk_path1)
+            index.save()
+
+            with open(index.path) as f:
+                entries = jsonutils.loads(f.read())
+            self.assertEqual([disk_path1], entries.keys())
+
+    def test_load_invalid_index(self):
+        with utils.tempdir() as tmpdir:
+            disk_path = self._make_disk(tmpdir, 'disk1')
+            with open(os.path.join(tmpdir, 'backing_files.json'), 'w') as f:
+                f.write('banana')
+
+            index = self._index(tmpdir)
+            self.assertEqual('backing-of-disk1',
+                             index.get_backing_file(disk_path))
+
+
 class VerifyChecksumTestCase(test.NoDBTestCase):
 
     def setUp(self):
@@ -885,3 +966,38 @@ class VerifyChecksumTestCase(test.NoDBTestCase):
             # Checksum requests for a file with no checksum now have the
             # side effect of creating the checksum
             self.assertTrue(os.path.exists(info_fname))
+
+    def test_verify_checksums(self):
+        self.flags(checksum_concurrency=2, checksum_bandwidth_mb=100,
+                   group='libvirt')
+        with utils.tempdir() as tmpdir:
+            image_cache_manager, fname = self._check_body(tmpdir, "csum valid")
+            bad_fname = os.path.join(tmpdir, 'bbb')
+            with open(bad_fname, 'w') as f:
+                f.write('banana')
+            self._write_file(imagecache.get_info_filename(bad_fname),
+                             "csum invalid, valid json", None)
+
+            image_cache_manager._verify_checksums(
+                [('42', fname), ('43', bad_fname),
+                 ('44', os.path.join(tmpdir, 'missing'))])
+
+            self.assertEqual({fname: True, bad_fname: False},
+                             image_cache_manager.checksum_results)
+
+    def test_read_throttle(self):
+        sleeps = []
+        self.stubs.Set(imagecache.time, 'time', lambda: 1000.0)
+        self.stubs.Set(imagecache.greenthread, 'sleep', sleeps.append)
+
+        throttle = imagecache._ReadThrottle(2 * units.Mi)
+        for i in range(3):
+            throttle.consume(units.Mi)
+
+        self.assertEqual([0.5, 1.0], sleeps)
+
+    def test_read_throttle_unlimited(self):
+        self.stubs.Set(imagecache.greenthread, 'sleep',
+                       lambda seconds: self.fail('Unexpected sleep'))
+        throttle = imagecache._ReadThrottle(0)
+        throttle.consume(units.Mi)
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import errno
 import functools
 import os
 import tempfile
@@ -23,6 +24,7 @@ from oslo.config import cfg
 from nova import exception
 from nova.openstack.common import fileutils
 from nova.openstack.common import processutils
+from nova.openstack.common import units
 from nova import test
 from nova import utils
 from nova.virt.disk import api as disk
@@ -396,6 +398,61 @@ disk size: 4.4M''', ''))
         finally:
             os.unlink(dst_path)
 
+    def test_copy_image_native(self):
+        self.flags(native_image_copy=True, group='libvirt')
+        with utils.tempdir() as tmpdir:
+            src_path = os.path.join(tmpdir, 'src')
+            dst_path = os.path.join(tmpdir, 'dst')
+            with open(src_path, 'w') as fp:
+                fp.write('canary')
+                fp.seek(units.Mi)
+                fp.write('canary')
+                fp.truncate(2 * units.Mi)
+
+            libvirt_utils.copy_image(src_path, dst_path)
+
+            with open(src_path) as src_fp:
+                with open(dst_path) as dst_fp:
+                    self.assertEqual(src_fp.read(), dst_fp.read())
+
+    @mock.patch('fcntl.ioctl')
+    def test_copy_file_clone(self, mock_ioctl):
+        with utils.tempdir() as tmpdir:
+            src_path = os.path.join(tmpdir, 'src')
+            with open(src_path, 'w') as fp:
+                fp.write('canary')
+
+            copied = libvirt_utils._copy_file(src_path, tmpdir + '/dst')
+
+            self.assertEqual(0, copied)
+            self.assertEqual(1, mock_ioctl.call_count)
+
+    @mock.patch('fcntl.ioctl')
+    def test_copy_file_clone_unsupported(self, mock_ioctl):
+        mock_ioctl.side_effect = IOError(errno.EOPNOTSUPP, 'not supported')
+        with utils.tempdir() as tmpdir:
+            src_path = os.path.join(tmpdir, 'src')
+            with open(src_path, 'w') as fp:
+                fp.write('canary')
+
+            with utils.tempdir() as dest_dir:
+                copied = libvirt_utils._copy_file(src_path, dest_dir)
+
+                self.assertEqual(len('canary'), copied)
+                with open(os.path.join(dest_dir, 'src')) as fp:
+                    self.assertEqual('canary', fp.read())
+
+    def test_copy_file_same_file(self):
+        with utils.tempdir() as tmpdir:
+            src_path = os.path.join(tmpdir, 'src')
+            with open(src_path, 'w') as fp:
+                fp.write('canary')
+
+            self.assertRaises(OSError, libvirt_utils._copy_file,
+                              src_path, src_path)
+            with open(src_path) as fp:
+                self.assertEqual('canary', fp.read())
+
     def test_write_to_file(self):
         dst_fd, dst_path = tempfile.mkstemp()
         try:
@@ -13,7 +13,9 @@
 #    under the License.
 
 import os
+import tempfile
 
+import fixtures
 import mock
 
 from nova import exception
@@ -42,4 +44,72 @@ class QemuTestCase(test.NoDBTestCase):
                                       utils_execute):
         image_info = images.qemu_img_info('/fake/path')
         self.assertTrue(image_info)
-        self.assertTrue(str(image_info))
\ No newline at end of file
+        self.assertTrue(str(image_info))
+
+
+class QemuImgInfoCacheTestCase(test.NoDBTestCase):
+    def setUp(self):
+        super(QemuImgInfoCacheTestCase, self).setUp()
+        self.addCleanup(images._QEMU_IMG_INFO_CACHE.clear)
+        self.tempdir = self.useFixture(fixtures.TempDir()).path
+
+    def _make_image(self, name):
+        path = os.path.join(self.tempdir, name)
+        with open(path, 'w') as f:
+            f.write('image')
+        return path
+
+    @mock.patch.object(utils, 'execute',
+                       return_value=('file format: raw', None))
+    def test_cached_until_modified(self, mock_execute):
+        path = self._make_image('disk')
+
+        info = images.qemu_img_info(path)
+        self.assertIs(info, images.qemu_img_info(path))
+        self.assertEqual(1, mock_execute.call_count)
+
+        with open(path, 'a') as f:
+            f.write('more data')
+        self.assertIsNot(info, images.qemu_img_info(path))
+        self.assertEqual(2, mock_execute.call_count)
+
+    @mock.patch.object(utils, 'execute',
+                       return_value=('file format: raw', None))
+    def test_cache_invalidated_when_replaced(self, mock_execute):
+        path = self._make_image('disk')
+        images.qemu_img_info(path)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.tempdir)
+        os.close(fd)
+        os.rename(tmp_path, path)
+        images.qemu_img_info(path)
+
+        self.assertEqual(2, mock_execute.call_count)
+
+    @mock.patch.object(utils, 'execute',
+                       return_value=('file format: raw', None))
+    def test_least_recently_used_evicted(self, mock_execute):
+        self.flags(qemu_img_info_cache_size=2)
+        path1 = self._make_image('disk1')
+        path2 = self._make_image('disk2')
+        path3 = self._make_image('disk3')
+
+        images.qemu_img_info(path1)
+        images.qemu_img_info(path2)
+        images.qemu_img_info(path1)
+        images.qemu_img_info(path3)
+
+        self.assertEqual([path1, path3], images._QEMU_IMG_INFO_CACHE.keys())
+        self.assertEqual(3, mock_execute.call_count)
+
+    @mock.patch.object(utils, 'execute',
+                       return_value=('file format: raw', None))
+    def test_cache_disabled(self, mock_execute):
+        self.flags(qemu_img_info_cache_size=0)
+        path = self._make_image('disk')
+
+        images.qemu_img_info(path)
+        images.qemu_img_info(path)
+
+        self.assertEqual(2, mock_execute.call_count)
+        self.assertEqual({}, images._QEMU_IMG_INFO_CACHE)
@@ -19,6 +19,7 @@
 Handling of VM disk images.
 """
 
+import collections
 import os
 
 from oslo.config import cfg
@@ -37,21 +38,53 @@ image_opts = [
     cfg.BoolOpt('force_raw_images',
                 default=True,
                 help='Force backing images to raw format'),
+    cfg.IntOpt('qemu_img_info_cache_size',
+               default=256,
+               help='Number of qemu-img info results cached, keyed by image '
+                    'path. A result is discarded when the inode, size or '
+                    'modification time of the image changes. Set to 0 to '
+                    'disable the cache'),
 ]
 
 CONF = cfg.CONF
 CONF.register_opts(image_opts)
 IMAGE_API = image.API()
 
+# Least recently used first, maps a path to its (file identity, info)
+_QEMU_IMG_INFO_CACHE = collections.OrderedDict()
+
+
+def _file_identity(path):
+    """Return a tuple that changes when the file at path is modified or
+    replaced, or None if path cannot be stat'ed (e.g. an rbd volume).
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime)
+
 
 def qemu_img_info(path):
-    """Return an object containing the parsed output from qemu-img info."""
+    """Return an object containing the parsed output from qemu-img info.
+
+    Results for local files are cached until the file changes.
+    """
     # TODO(mikal): this code should not be referring to a libvirt specific
     # flag.
     if not os.path.exists(path) and CONF.libvirt.images_type != 'rbd':
         msg = (_("Path does not exist %(path)s") % {'path': path})
         raise exception.InvalidDiskInfo(reason=msg)
 
+    identity = None
+    if CONF.qemu_img_info_cache_size > 0:
+        identity = _file_identity(path)
+    if identity is not None:
+        cached = _QEMU_IMG_INFO_CACHE.pop(path, None)
+        if cached is not None and cached[0] == identity:
+            _QEMU_IMG_INFO_CACHE[path] = cached
+            return cached[1]
+
     out, err = utils.execute('env', 'LC_ALL=C', 'LANG=C',
                              'qemu-img', 'info', path)
     if not out:
@@ -59,7 +92,13 @@ def qemu_img_info(path):
                {'path': path, 'error': err})
         raise exception.InvalidDiskInfo(reason=msg)
 
-    return imageutils.QemuImgInfo(out)
+    info = imageutils.QemuImgInfo(out)
+    # Don't cache the result if the file changed while qemu-img ran
+    if identity is not None and _file_identity(path) == identity:
+        _QEMU_IMG_INFO_CACHE[path] = (identity, info)
+        while len(_QEMU_IMG_INFO_CACHE) > CONF.qemu_img_info_cache_size:
+            _QEMU_IMG_INFO_CACHE.popitem(last=False)
+    return info
 
 
 def convert_image(source, dest, out_format, run_as_root=False):
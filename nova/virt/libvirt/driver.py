@@ -252,7 +252,11 @@ libvirt_opts = [
                 default=[],
                 help='List of guid targets and ranges.'
                      'Syntax is guest-gid:host-gid:count'
-                     'Maximum of 5 allowed.')
+                     'Maximum of 5 allowed.'),
+    cfg.IntOpt('disk_info_concurrency',
+               default=8,
+               help='Maximum number of domains whose disks are inspected '
+                    'concurrently when updating the host stats'),
     ]
 
 CONF = cfg.CONF
@@ -4529,9 +4533,11 @@ class LibvirtDriver(driver.ComputeDriver):
 
         return info
 
-    def _get_vcpu_used(self):
+    def _get_vcpu_used(self, domains=None):
         """Get vcpu usage number of physical computer.
 
+        :param domains: the guest domains to inspect, listed from libvirt
+                        if not given.
         :returns: The total number of vcpu(s) that are currently being used.
 
         """
@@ -4540,7 +4546,9 @@ class LibvirtDriver(driver.ComputeDriver):
         if CONF.libvirt.virt_type == 'lxc':
             return total + 1
 
-        for dom in self._list_instance_domains():
+        if domains is None:
+            domains = self._list_instance_domains()
+        for dom in domains:
             try:
                 vcpus = dom.vcpus()
             except libvirt.libvirtError as e:
@@ -4554,9 +4562,11 @@ class LibvirtDriver(driver.ComputeDriver):
             greenthread.sleep(0)
         return total
 
-    def _get_memory_mb_used(self):
+    def _get_memory_mb_used(self, domains=None):
         """Get the used memory size(MB) of physical computer.
 
+        :param domains: all the domains, including the host domain, to
+                        inspect with Xen. Listed from libvirt if not given.
         :returns: the total usage of memory(MB).
 
         """
@@ -4571,7 +4581,9 @@ class LibvirtDriver(driver.ComputeDriver):
         idx3 = m.index('Cached:')
         if CONF.libvirt.virt_type == 'xen':
             used = 0
-            for dom in self._list_instance_domains(only_guests=False):
+            if domains is None:
+                domains = self._list_instance_domains(only_guests=False)
+            for dom in domains:
                 try:
                     dom_mem = int(dom.info()[2])
                 except libvirt.libvirtError as e:
@@ -4596,6 +4608,19 @@ class LibvirtDriver(driver.ComputeDriver):
             # Convert it to MB
             return self._get_memory_mb_total() - avail / units.Ki
 
+    def _get_domains_resource_usage(self):
+        """Get the resources used by the domains, listing them only once.
+
+        :returns: a dict with the vcpus_used, memory_mb_used and
+                  disk_over_committed_size of the domains.
+        """
+        domains = self._list_instance_domains(only_guests=False)
+        guests = [dom for dom in domains if dom.ID() != 0]
+        return {'vcpus_used': self._get_vcpu_used(guests),
+                'memory_mb_used': self._get_memory_mb_used(domains),
+                'disk_over_committed_size':
+                    self._get_disk_over_committed_size_total(guests)}
+
     def _get_hypervisor_type(self):
         """Get hypervisor type.
 
@@ -5691,52 +5716,62 @@ class LibvirtDriver(driver.ComputeDriver):
         return self._get_instance_disk_info(instance_name, xml,
                                             block_device_info)
 
-    def _get_disk_over_committed_size_total(self):
-        """Return total over committed disk size for all instances."""
+    def _get_disk_over_committed_size_total(self, domains=None):
+        """Return total over committed disk size for all instances.
+
+        :param domains: the guest domains to inspect, listed from libvirt
+                        if not given.
+        """
         # Disk size that all instance uses : virtual_size - disk_size
+        if domains is None:
+            domains = self._list_instance_domains()
+        # Most of the time is spent waiting for qemu-img, so the domains
+        # are inspected concurrently
+        pool = eventlet.GreenPool(CONF.libvirt.disk_info_concurrency)
+        return sum(pool.imap(self._get_domain_over_committed_size, domains))
+
+    def _get_domain_over_committed_size(self, dom):
+        """Return the over committed disk size of a domain."""
         disk_over_committed_size = 0
-        for dom in self._list_instance_domains():
-            try:
-                xml = dom.XMLDesc(0)
-                disk_infos = jsonutils.loads(
-                        self._get_instance_disk_info(dom.name(), xml))
-                for info in disk_infos:
-                    disk_over_committed_size += int(
-                        info['over_committed_disk_size'])
-            except libvirt.libvirtError as ex:
-                error_code = ex.get_error_code()
-                LOG.warn(_LW(
-                    'Error from libvirt while getting description of '
-                    '%(instance_name)s: [Error Code %(error_code)s] %(ex)s'
-                ) % {'instance_name': dom.name(),
-                     'error_code': error_code,
-                     'ex': ex})
-            except OSError as e:
-                if e.errno == errno.ENOENT:
-                    LOG.warn(_LW('Periodic task is updating the host stat, '
-                                 'it is trying to get disk %(i_name)s, '
-                                 'but disk file was removed by concurrent '
-                                 'operations such as resize.'),
-                                {'i_name': dom.name()})
-                elif e.errno == errno.EACCES:
-                    LOG.warn(_LW('Periodic task is updating the host stat, '
-                                 'it is trying to get disk %(i_name)s, '
-                                 'but access is denied. It is most likely '
-                                 'due to a VM that exists on the compute '
-                                 'node but is not managed by Nova.'),
-                             {'i_name': dom.name()})
-                else:
-                    raise
-            except exception.VolumeBDMPathNotFound as e:
-                LOG.warn(_LW('Periodic task is updating the host stats, '
-                             'it is trying to get disk info for %(i_name)s, '
-                             'but the backing volume block device was removed '
-                             'by concurrent operations such as resize. '
-                             'Error: %(error)s'),
-                         {'i_name': dom.name(),
-                          'error': e})
-            # NOTE(gtt116): give other tasks a chance.
-            greenthread.sleep(0)
+        try:
+            xml = dom.XMLDesc(0)
+            disk_infos = jsonutils.loads(
+                    self._get_instance_disk_info(dom.name(), xml))
+            for info in disk_infos:
+                disk_over_committed_size += int(
+                    info['over_committed_disk_size'])
+        except libvirt.libvirtError as ex:
+            error_code = ex.get_error_code()
+            LOG.warn(_LW(
+                'Error from libvirt while getting description of '
+                '%(instance_name)s: [Error Code %(error_code)s] %(ex)s'
+            ) % {'instance_name': dom.name(),
+                 'error_code': error_code,
+                 'ex': ex})
+        except OSError as e:
+            if e.errno == errno.ENOENT:
+                LOG.warn(_LW('Periodic task is updating the host stat, '
+                             'it is trying to get disk %(i_name)s, '
+                             'but disk file was removed by concurrent '
+                             'operations such as resize.'),
+                            {'i_name': dom.name()})
+            elif e.errno == errno.EACCES:
+                LOG.warn(_LW('Periodic task is updating the host stat, '
+                             'it is trying to get disk %(i_name)s, '
+                             'but access is denied. It is most likely '
+                             'due to a VM that exists on the compute '
+                             'node but is not managed by Nova.'),
+                         {'i_name': dom.name()})
+            else:
+                raise
+        except exception.VolumeBDMPathNotFound as e:
+            LOG.warn(_LW('Periodic task is updating the host stats, '
+                         'it is trying to get disk info for %(i_name)s, '
+                         'but the backing volume block device was removed '
+                         'by concurrent operations such as resize. '
+                         'Error: %(error)s'),
+                     {'i_name': dom.name(),
+                      'error': e})
         return disk_over_committed_size
 
     def unfilter_instance(self, instance, network_info):
@@ -6333,14 +6368,14 @@ class HostState(object):
 
             """
             disk_free_gb = disk_info_dict['free']
-            disk_over_committed = (self.driver.
-                    _get_disk_over_committed_size_total())
+            disk_over_committed = usage['disk_over_committed_size']
             # Disk available least size
             available_least = disk_free_gb * units.Gi - disk_over_committed
             return (available_least / units.Gi)
 
         LOG.debug("Updating host stats")
         disk_info_dict = self.driver._get_local_gb_info()
+        usage = self.driver._get_domains_resource_usage()
         data = {}
 
         # NOTE(dprince): calling capabilities before getVersion works around
@@ -6353,8 +6388,8 @@ class HostState(object):
         data["vcpus"] = self.driver._get_vcpu_total()
         data["memory_mb"] = self.driver._get_memory_mb_total()
         data["local_gb"] = disk_info_dict['total']
-        data["vcpus_used"] = self.driver._get_vcpu_used()
-        data["memory_mb_used"] = self.driver._get_memory_mb_used()
+        data["vcpus_used"] = usage['vcpus_used']
+        data["memory_mb_used"] = usage['memory_mb_used']
         data["local_gb_used"] = disk_info_dict['used']
         data["hypervisor_type"] = self.driver._get_hypervisor_type()
         data["hypervisor_version"] = self.driver._get_hypervisor_version()
@@ -20,11 +20,15 @@ http://wiki.openstack.org/nova-image-cache-management.
 
 """
 
+import errno
 import hashlib
 import os
 import re
 import time
 
+from eventlet import greenpool
+from eventlet import greenthread
+from eventlet import tpool
 from oslo.config import cfg
 
 from nova.i18n import _LE
@@ -34,6 +38,7 @@ from nova.openstack.common import fileutils
 from nova.openstack.common import jsonutils
 from nova.openstack.common import log as logging
 from nova.openstack.common import processutils
+from nova.openstack.common import units
 from nova import utils
 from nova.virt import imagecache
 from nova.virt.libvirt import utils as libvirt_utils
@@ -62,6 +67,19 @@ imagecache_opts = [
     cfg.IntOpt('checksum_interval_seconds',
                default=3600,
                help='How frequently to checksum base images'),
+    cfg.IntOpt('checksum_concurrency',
+               default=1,
+               help='Number of base images to checksum at the same time'),
+    cfg.IntOpt('checksum_bandwidth_mb',
+               default=0,
+               help='Maximum combined rate, in MB per second, at which base '
+                    'images are read to be checksummed. 0 means unlimited'),
+    cfg.BoolOpt('image_cache_backing_file_index',
+                default=False,
+                help='Keep an index of the backing files of instance disks '
+                     'in the image cache directory, so that the image cache '
+                     'manager only runs qemu-img on disks created or '
+                     'replaced since its previous pass'),
     ]
 
 CONF = cfg.CONF
@@ -210,12 +228,46 @@ def write_stored_info(target, field=None, value=None):
     write_file(info_file, field, value)
 
 
-def _hash_file(filename):
-    """Generate a hash for the contents of a file."""
+class _ReadThrottle(object):
+    """Limit the combined rate of the reads accounted through an instance.
+
+    Each read is given the next free slot of time at the allowed rate, and
+    the calling green thread sleeps until its slot starts.
+    """
+
+    def __init__(self, bytes_per_second):
+        self.bytes_per_second = bytes_per_second
+        self._next_slot = 0
+
+    def consume(self, nbytes):
+        if not self.bytes_per_second:
+            return
+        now = time.time()
+        start = max(self._next_slot, now)
+        self._next_slot = start + float(nbytes) / self.bytes_per_second
+        if start > now:
+            greenthread.sleep(start - now)
+
+
+def _hash_chunk(f, checksum):
+    chunk = f.read(units.Mi)
+    checksum.update(chunk)
+    return len(chunk)
+
+
+def _hash_file(filename, throttle=None):
+    """Generate a hash for the contents of a file.
+
+    The file is read and hashed in native threads, so that checksumming
+    large images does not block other green threads.
+    """
     checksum = hashlib.sha1()
-    with open(filename) as f:
-        for chunk in iter(lambda: f.read(32768), b''):
-            checksum.update(chunk)
+    with open(filename, 'rb') as f:
+        while True:
+            if throttle is not None:
+                throttle.consume(units.Mi)
+            if not tpool.execute(_hash_chunk, f, checksum):
+                break
     return checksum.hexdigest()
 
 
@@ -227,15 +279,76 @@ def read_stored_checksum(target, timestamped=True):
     return read_stored_info(target, field='sha1', timestamped=timestamped)
 
 
-def write_stored_checksum(target):
+def write_stored_checksum(target, throttle=None):
     """Write a checksum to disk for a file in _base."""
-    write_stored_info(target, field='sha1', value=_hash_file(target))
+    write_stored_info(target, field='sha1',
+                      value=_hash_file(target, throttle=throttle))
+
+
+class BackingFileIndex(object):
+    """Persistent index of the backing files of instance disks.
+
+    Each backing file is recorded with the device and inode of the disk
+    using it. Nova never changes the backing file of an existing instance
+    disk in place, so qemu-img only needs to run on disks created or
+    replaced since the index was written.
+    """
+
+    def __init__(self, path, lock_path):
+        self.path = path
+        self.lock_path = lock_path
+        self._entries = {}
+        self._seen = {}
+
+    def load(self):
+        """Read the index, starting a new one if it is missing or bad."""
+        self._seen = {}
+        try:
+            with open(self.path) as f:
+                self._entries = _read_possible_json(f.read(), self.path)
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                LOG.warn(_LW('Failed to read backing file index %(path)s: '
+                             '%(error)s'), {'path': self.path, 'error': e})
+            self._entries = {}
+
+    def get_backing_file(self, disk_path):
+        """Return the backing file of disk_path, as
+        libvirt_utils.get_disk_backing_file() does.
+        """
+        st = os.stat(disk_path)
+        identity = [st.st_dev, st.st_ino]
+        entry = self._entries.get(disk_path)
+        if entry and entry.get('identity') == identity:
+            backing_file = entry['backing_file']
+        else:
+            backing_file = libvirt_utils.get_disk_backing_file(disk_path)
+        self._seen[disk_path] = {'identity': identity,
+                                 'backing_file': backing_file}
+        return backing_file
+
+    def save(self):
+        """Write the entries of the disks looked up since load()."""
+        if self._seen == self._entries:
+            return
+
+        @utils.synchronized('backing-file-index', external=True,
+                            lock_path=self.lock_path)
+        def write_index(entries):
+            tmp_path = '%s.tmp' % self.path
+            with open(tmp_path, 'w') as f:
+                f.write(jsonutils.dumps(entries))
+            os.rename(tmp_path, self.path)
+
+        write_index(self._seen)
+        self._entries = self._seen
 
 
 class ImageCacheManager(imagecache.ImageCacheManager):
     def __init__(self):
         super(ImageCacheManager, self).__init__()
         self.lock_path = os.path.join(CONF.instances_path, 'locks')
+        self.backing_file_index = None
         self._reset_state()
 
     def _reset_state(self):
@@ -250,6 +363,7 @@ class ImageCacheManager(imagecache.ImageCacheManager):
         self.originals = []
         self.removable_base_files = []
         self.unexplained_images = []
+        self.checksum_results = {}
 
     def _store_image(self, base_dir, ent, original=False):
         """Store a base image for later examination."""
@@ -290,9 +404,8 @@ class ImageCacheManager(imagecache.ImageCacheManager):
                 if os.path.exists(disk_path):
                     LOG.debug('%s has a disk file', ent)
                     try:
-                        backing_file = libvirt_utils.get_disk_backing_file(
-                            disk_path)
-                    except processutils.ProcessExecutionError:
+                        backing_file = self._get_disk_backing_file(disk_path)
+                    except (processutils.ProcessExecutionError, OSError):
                         # (for bug 1261442)
                         if not os.path.exists(disk_path):
                             LOG.debug('Failed to get disk backing file: %s',
@@ -323,6 +436,11 @@ class ImageCacheManager(imagecache.ImageCacheManager):
                             self.unexplained_images.remove(backing_path)
         return inuse_images
 
+    def _get_disk_backing_file(self, disk_path):
+        if self.backing_file_index is not None:
+            return self.backing_file_index.get_backing_file(disk_path)
+        return libvirt_utils.get_disk_backing_file(disk_path)
+
     def _find_base_file(self, base_dir, fingerprint):
         """Find the base file matching this fingerprint.
 
@@ -350,7 +468,8 @@ class ImageCacheManager(imagecache.ImageCacheManager):
             if m:
                 yield img, False, True
 
-    def _verify_checksum(self, img_id, base_file, create_if_missing=True):
+    def _verify_checksum(self, img_id, base_file, create_if_missing=True,
+                         throttle=None):
         """Compare the checksum stored on disk with the current file.
 
         Note that if the checksum fails to verify this is logged, but no actual
@@ -384,7 +503,7 @@ class ImageCacheManager(imagecache.ImageCacheManager):
                     write_stored_info(base_file, field='sha1',
                                       value=stored_checksum)
 
-                current_checksum = _hash_file(base_file)
+                current_checksum = _hash_file(base_file, throttle=throttle)
 
                 if current_checksum != stored_checksum:
                     LOG.error(_LE('image %(id)s at (%(base_file)s): image '
@@ -410,12 +529,34 @@ class ImageCacheManager(imagecache.ImageCacheManager):
                                  'checksum'),
                              {'id': img_id,
                               'base_file': base_file})
-                    write_stored_checksum(base_file)
+                    write_stored_checksum(base_file, throttle=throttle)
 
                 return None
 
         return inner_verify_checksum()
 
+    def _verify_checksums(self, images):
+        """Verify the checksums of several base images at the same time.
+
+        images is a list of (img_id, base_file) tuples. The results are
+        stored in checksum_results, keyed by base file, for
+        _handle_base_image() to use.
+        """
+        if not CONF.libvirt.checksum_base_images:
+            return
+
+        throttle = _ReadThrottle(CONF.libvirt.checksum_bandwidth_mb * units.Mi)
+        images = [(img_id, base_file) for img_id, base_file in images
+                  if base_file and os.path.isfile(base_file)]
+
+        def verify(image):
+            img_id, base_file = image
+            return base_file, self._verify_checksum(img_id, base_file,
+                                                    throttle=throttle)
+
+        pool = greenpool.GreenPool(max(CONF.libvirt.checksum_concurrency, 1))
+        self.checksum_results.update(pool.imap(verify, images))
+
     def _remove_base_file(self, base_file):
         """Remove a single base file if it is old enough.
 
@@ -466,7 +607,10 @@ class ImageCacheManager(imagecache.ImageCacheManager):
                 and os.path.isfile(base_file)):
             # _verify_checksum returns True if the checksum is ok, and None if
             # there is no checksum file
-            checksum_result = self._verify_checksum(img_id, base_file)
+            if base_file in self.checksum_results:
+                checksum_result = self.checksum_results.pop(base_file)
+            else:
+                checksum_result = self._verify_checksum(img_id, base_file)
             if checksum_result is not None:
                 image_bad = not checksum_result
 
@@ -521,17 +665,23 @@ class ImageCacheManager(imagecache.ImageCacheManager):
     def _age_and_verify_cached_images(self, context, all_instances, base_dir):
         LOG.debug('Verify base images')
         # Determine what images are on disk because they're in use
+        base_images = []
         for img in self.used_images:
             fingerprint = hashlib.sha1(img).hexdigest()
             LOG.debug('Image id %(id)s yields fingerprint %(fingerprint)s',
                       {'id': img,
                        'fingerprint': fingerprint})
             for result in self._find_base_file(base_dir, fingerprint):
-                base_file, image_small, image_resized = result
-                self._handle_base_image(img, base_file)
+                base_images.append((img, result))
 
-                if not image_small and not image_resized:
-                    self.originals.append(base_file)
+        self._verify_checksums([(img, result[0])
+                                for img, result in base_images])
+        for img, result in base_images:
+            base_file, image_small, image_resized = result
+            self._handle_base_image(img, base_file)
+
+            if not image_small and not image_resized:
+                self.originals.append(base_file)
 
         # Elements remaining in unexplained_images might be in use
         inuse_backing_images = self._list_backing_images()
@@ -596,5 +746,13 @@ class ImageCacheManager(imagecache.ImageCacheManager):
         self.used_images = running['used_images']
         self.image_popularity = running['image_popularity']
         self.instance_names = running['instance_names']
+        if CONF.libvirt.image_cache_backing_file_index:
+            self.backing_file_index = BackingFileIndex(
+                os.path.join(base_dir, 'backing_files.json'), self.lock_path)
+            self.backing_file_index.load()
+        else:
+            self.backing_file_index = None
         # perform the aging and image verification
         self._age_and_verify_cached_images(context, all_instances, base_dir)
+        if self.backing_file_index is not None:
+            self.backing_file_index.save()
@@ -19,10 +19,12 @@
 #    under the License.
 
 import errno
+import fcntl
 import os
 import platform
 import re
 
+from eventlet import tpool
 from lxml import etree
 from oslo.config import cfg
 
@@ -31,6 +33,7 @@ from nova.i18n import _LI
 from nova.i18n import _LW
 from nova.openstack.common import log as logging
 from nova.openstack.common import processutils
+from nova.openstack.common import units
 from nova import utils
 from nova.virt import images
 from nova.virt.libvirt import config as vconfig
@@ -41,6 +44,11 @@ libvirt_opts = [
                 default=False,
                 help='Compress snapshot images when possible. This '
                      'currently applies exclusively to qcow2 images'),
+    cfg.BoolOpt('native_image_copy',
+                default=False,
+                help='Copy local disk images natively instead of with cp: '
+                     'clone them when the filesystem supports reflinks, and '
+                     'otherwise copy only their allocated extents'),
     ]
 
 CONF = cfg.CONF
@@ -259,6 +267,104 @@ def get_disk_backing_file(path, basename=True):
     return backing_file
 
 
+# ioctl cloning a whole file on filesystems supporting reflinks
+_FICLONE = 0x40049409
+# lseek() whences finding the data and holes of sparse files
+_SEEK_DATA = 3
+_SEEK_HOLE = 4
+_COPY_BUFFER_SIZE = 4 * units.Mi
+
+
+def _clone_file(src_fd, dest_fd):
+    """Make dest_fd share the extents of src_fd.
+
+    Returns False if the filesystem cannot clone between the two files.
+    """
+    try:
+        fcntl.ioctl(dest_fd, _FICLONE, src_fd)
+    except IOError as e:
+        if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV,
+                       errno.EINVAL, errno.ENOSYS):
+            return False
+        raise
+    return True
+
+
+def _copy_data(src_fd, dest_fd, offset, length):
+    """Copy length bytes from offset in src_fd to the same offset in dest_fd.
+
+    Returns the number of bytes copied, which is less than length if src_fd
+    ends earlier.
+    """
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    os.lseek(dest_fd, offset, os.SEEK_SET)
+    copied = 0
+    while copied < length:
+        buf = os.read(src_fd, min(length - copied, _COPY_BUFFER_SIZE))
+        if not buf:
+            break
+        written = 0
+        while written < len(buf):
+            written += os.write(dest_fd, buf[written:])
+        copied += len(buf)
+    return copied
+
+
+def _copy_sparse_file(src_fd, dest_fd, size):
+    """Copy the data extents of src_fd to dest_fd, leaving holes unwritten.
+
+    Returns the number of bytes copied.
+    """
+    copied = 0
+    offset = 0
+    while offset < size:
+        try:
+            data_start = os.lseek(src_fd, offset, _SEEK_DATA)
+            data_end = os.lseek(src_fd, data_start, _SEEK_HOLE)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                # Only a hole is left up to the end of the file
+                break
+            if e.errno != errno.EINVAL:
+                raise
+            # The filesystem cannot report holes, copy everything left
+            data_start, data_end = offset, size
+        copied += _copy_data(src_fd, dest_fd, data_start,
+                             data_end - data_start)
+        offset = data_end
+    os.ftruncate(dest_fd, size)
+    return copied
+
+
+def _copy_file(src, dest):
+    """Copy src to dest, cloning it when possible.
+
+    Returns the number of bytes which had to be copied.
+    """
+    if os.path.isdir(dest):
+        dest = os.path.join(dest, os.path.basename(src))
+    src_fd = os.open(src, os.O_RDONLY)
+    try:
+        src_stat = os.fstat(src_fd)
+        dest_fd = os.open(dest, os.O_WRONLY | os.O_CREAT,
+                          src_stat.st_mode & 0o777)
+        try:
+            dest_stat = os.fstat(dest_fd)
+            if ((dest_stat.st_dev, dest_stat.st_ino) ==
+                    (src_stat.st_dev, src_stat.st_ino)):
+                raise OSError(errno.EINVAL,
+                              _('%(src)s and %(dest)s are the same file') %
+                              {'src': src, 'dest': dest})
+            os.ftruncate(dest_fd, 0)
+            if _clone_file(src_fd, dest_fd):
+                return 0
+            return _copy_sparse_file(src_fd, dest_fd, src_stat.st_size)
+        finally:
+            os.close(dest_fd)
+    finally:
+        os.close(src_fd)
+
+
 def copy_image(src, dest, host=None):
     """Copy a disk image to an existing directory
 
@@ -268,6 +374,13 @@ def copy_image(src, dest, host=None):
     """
 
     if not host:
+        if CONF.libvirt.native_image_copy:
+            # Copy in a native thread, so as not to block other green
+            # threads for the whole copy
+            copied = tpool.execute(_copy_file, src, dest)
+            LOG.debug('Copied %(src)s to %(dest)s: %(copied)d bytes written',
+                      {'src': src, 'dest': dest, 'copied': copied})
+            return
         # We shell out to cp because that will intelligently copy
         # sparse files.  I.E. holes will not be written to DEST,
         # rather recreated efficiently.  In addition, since
@@ -85,6 +85,16 @@ class BaseWeigher(object):
         """
         return 1.0
 
+    def _record_bounds(self, lowest, highest):
+        """Widen minval and maxval to cover the given range of weights.
+
+        For use by subclasses overriding weigh_objects().
+        """
+        if self.minval is None or lowest < self.minval:
+            self.minval = lowest
+        if self.maxval is None or highest > self.maxval:
+            self.maxval = highest
+
     @abc.abstractmethod
     def _weigh_object(self, obj, weight_properties):
         """Weigh an specific object."""
@@ -124,13 +134,22 @@ class BaseWeightHandler(loadables.BaseLoader):
     def get_weighed_objects(self, weigher_classes, obj_list,
             weighing_properties):
         """Return a sorted (descending), normalized list of WeighedObjects."""
+        weighers = [weigher_cls() for weigher_cls in weigher_classes]
+        return self.weigh_objects(weighers, obj_list, weighing_properties)
+
+    def weigh_objects(self, weighers, obj_list, weighing_properties):
+        """Return a sorted (descending), normalized list of WeighedObjects
+        using the given weigher instances.
+
+        The weighers keep the normalization bounds found, which
+        reweigh_object() uses afterwards.
+        """
 
         if not obj_list:
             return []
 
         weighed_objs = [self.object_class(obj, 0.0) for obj in obj_list]
-        for weigher_cls in weigher_classes:
-            weigher = weigher_cls()
+        for weigher in weighers:
             weights = weigher.weigh_objects(weighed_objs, weighing_properties)
 
             # Normalize the weights
@@ -143,3 +162,18 @@ class BaseWeightHandler(loadables.BaseLoader):
                 obj.weight += weigher.weight_multiplier() * weight
 
         return sorted(weighed_objs, key=lambda x: x.weight, reverse=True)
+
+    def reweigh_object(self, weighers, weighed_obj, weighing_properties):
+        """Recompute the weight of a single WeighedObject.
+
+        The weight is normalized against the bounds found by the weighers
+        when they last weighed all objects in weigh_objects().
+        """
+        weighed_obj.weight = 0.0
+        for weigher in weighers:
+            weight = weigher._weigh_object(weighed_obj.obj,
+                                           weighing_properties)
+            weight = list(normalize([weight],
+                                    minval=weigher.minval,
+                                    maxval=weigher.maxval))[0]
+            weighed_obj.weight += weigher.weight_multiplier() * weight